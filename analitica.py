@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""Motor analítico en memoria (opcional, se activa con ANALITICA_MEMORIA=1).
+
+Carga las líneas de venta en columnas NumPy: ids en int32, montos en
+float64, fechas en datetime64[D] y vendedor, medio de pago, categoría, marca
+y producto (nombre canónico) como códigos de un diccionario. Las
+agrupaciones de /api/series y del gráfico por vendedor se resuelven con
+operaciones vectorizadas (np.unique + np.bincount) sin ir a la base.
+
+Cada worker tiene su copia. Cuando cambia la versión de los datos
+(versiones.py) y el contador de ediciones no cambió (solo hubo ventas
+nuevas), se agregan las ventas con id_venta mayor a la última cargada y se
+comparan los tickets y el importe total con `resumen_diario_ventas`. Si
+cambió el contador (una venta editada o eliminada, productos reagrupados)
+o los totales no cuadran, se recarga todo. Además se recarga todo cada
+ANALITICA_RECARGA segundos, por si algo escribió sin pasar por versiones.py.
+"""
+import os
+import threading
+import time
+
+import mysql.connector
+import numpy as np
+
+import registro
+import series as series_sql
+import versiones
+
+
+RECARGA_SEGUNDOS = float(os.environ.get('ANALITICA_RECARGA', 900))
+FILAS_POR_LOTE = 10000
+
+log = registro.obtener('analitica')
+
+CONSULTA_LINEAS = """
+SELECT
+    v.id_venta,
+    v.fecha,
+    NULLIF(v.vendedor, '') AS vendedor,
+    NULLIF(v.medio_pago, '') AS medio_pago,
+    dv.id_producto,
+    COALESCE(p.categoria, 'Otros') AS categoria,
+    COALESCE(p.marca, 'OTROS') AS marca,
+    COALESCE(pc.nombre_canonico, p.nombre_original) AS producto,
+    dv.cantidad,
+    dv.importe_soles
+FROM ventas v
+LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+LEFT JOIN productos p ON dv.id_producto = p.id_producto
+LEFT JOIN producto_canonico pc ON pc.id_producto = dv.id_producto
+WHERE v.id_venta > %s
+ORDER BY v.id_venta
+"""
+
+CONSULTA_TOTALES = "SELECT COALESCE(SUM(tickets), 0), COALESCE(SUM(importe), 0) FROM resumen_diario_ventas"
+
+DIMENSIONES = ('vendedor', 'medio_pago', 'categoria', 'marca', 'producto')
+SIN_PRODUCTO = -1
+
+
+class Diccionario:
+    """Codificación por diccionario: valor -> código entero. Solo crece, así
+    los códigos de una copia anterior de las columnas siguen siendo válidos."""
+
+    def __init__(self):
+        self.valores = []
+        self.indice = {}
+
+    def codigo(self, valor):
+        codigo = self.indice.get(valor)
+        if codigo is None:
+            codigo = self.indice[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+
+class Columnas:
+    """Una copia inmutable de las columnas; el motor la reemplaza entera."""
+
+    def __init__(self, id_venta, fecha, id_producto, cantidad, importe, codigos):
+        self.id_venta = id_venta
+        self.fecha = fecha
+        self.id_producto = id_producto
+        self.cantidad = cantidad
+        self.importe = importe
+        self.codigos = codigos
+        self.filas = len(id_venta)
+
+    @classmethod
+    def vacias(cls):
+        return cls(np.empty(0, np.int32), np.empty(0, 'datetime64[D]'), np.empty(0, np.int32),
+                   np.empty(0, np.float64), np.empty(0, np.float64),
+                   {d: np.empty(0, np.int32) for d in DIMENSIONES})
+
+    def agregar(self, otras):
+        if not otras.filas:
+            return self
+        return Columnas(
+            np.concatenate([self.id_venta, otras.id_venta]),
+            np.concatenate([self.fecha, otras.fecha]),
+            np.concatenate([self.id_producto, otras.id_producto]),
+            np.concatenate([self.cantidad, otras.cantidad]),
+            np.concatenate([self.importe, otras.importe]),
+            {d: np.concatenate([self.codigos[d], otras.codigos[d]]) for d in DIMENSIONES},
+        )
+
+    def tickets(self):
+        return len(np.unique(self.id_venta))
+
+
+class MotorAnalitico:
+    """Columnas de ventas en memoria con actualización por marca de agua."""
+
+    def __init__(self, recarga_segundos=RECARGA_SEGUNDOS):
+        self.recarga_segundos = recarga_segundos
+        self._lock = threading.Lock()
+        self._columnas = None
+        self._diccionarios = {d: Diccionario() for d in DIMENSIONES}
+        self._version = None
+        self._ediciones = None
+        self._marca_agua = 0
+        self._cargado = 0.0
+        self.recargas = 0
+        self.incrementales = 0
+
+    # --- Carga ---
+
+    def _leer(self, conn, desde_id):
+        """Lee las líneas con id_venta > desde_id y las codifica en columnas."""
+        ids, fechas, productos, cantidades, importes = [], [], [], [], []
+        codigos = {d: [] for d in DIMENSIONES}
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(CONSULTA_LINEAS, (desde_id,))
+            while True:
+                filas = cursor.fetchmany(FILAS_POR_LOTE)
+                if not filas:
+                    break
+                for (id_venta, fecha, vendedor, medio_pago, id_producto, categoria, marca, producto,
+                     cantidad, importe) in filas:
+                    ids.append(id_venta)
+                    fechas.append(fecha)
+                    sin_producto = id_producto is None
+                    productos.append(SIN_PRODUCTO if sin_producto else id_producto)
+                    cantidades.append(cantidad or 0)
+                    importes.append(importe or 0)
+                    for dimension, valor in zip(DIMENSIONES, (vendedor, medio_pago, categoria, marca, producto)):
+                        if sin_producto and dimension in series_sql.DIMENSIONES_PRODUCTO:
+                            valor = None
+                        codigos[dimension].append(self._diccionarios[dimension].codigo(valor))
+        finally:
+            # Con un cursor sin buffer hay que descartar lo no leído antes de cerrarlo
+            if conn.unread_result:
+                conn.consume_results()
+            cursor.close()
+        return Columnas(
+            np.array(ids, dtype=np.int32),
+            np.array(fechas, dtype='datetime64[D]'),
+            np.array(productos, dtype=np.int32),
+            np.array(cantidades, dtype=np.float64),
+            np.array(importes, dtype=np.float64),
+            {d: np.array(codigos[d], dtype=np.int32) for d in DIMENSIONES},
+        )
+
+    def _cuadra(self, conn, columnas):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(CONSULTA_TOTALES)
+            tickets, importe = cursor.fetchone()
+        finally:
+            cursor.close()
+        return int(tickets) == columnas.tickets() and abs(float(importe) - columnas.importe.sum()) < 0.005
+
+    def actualizar(self, conn):
+        """Trae a memoria los cambios desde la última versión cargada.
+        Solo consulta la versión si no hubo cambios."""
+        version, ediciones = versiones.leer_contadores(conn)
+        vencida = time.monotonic() - self._cargado > self.recarga_segundos
+        if self._columnas is not None and version == self._version and not vencida:
+            return
+        with self._lock:
+            vencida = time.monotonic() - self._cargado > self.recarga_segundos
+            if self._columnas is not None and version == self._version and not vencida:
+                return
+            inicio = time.perf_counter()
+            columnas = None
+            # Con ediciones de por medio no basta con leer las ventas nuevas
+            if self._columnas is not None and not vencida and ediciones == self._ediciones:
+                columnas = self._columnas.agregar(self._leer(conn, self._marca_agua))
+                if self._cuadra(conn, columnas):
+                    self.incrementales += 1
+                else:
+                    columnas = None
+            if columnas is None:
+                columnas = self._leer(conn, 0)
+                self._cargado = time.monotonic()
+                self.recargas += 1
+            self._marca_agua = int(columnas.id_venta.max()) if columnas.filas else 0
+            self._columnas = columnas
+            self._version = version
+            self._ediciones = ediciones
+            log.info("Motor analítico actualizado", version=version, lineas=columnas.filas,
+                     segundos=round(time.perf_counter() - inicio, 3))
+
+    def precargar(self, obtener_conexion):
+        """Carga las columnas en un hilo al arrancar el worker."""
+        def cargar():
+            conn = obtener_conexion()
+            if not conn:
+                return
+            try:
+                self.actualizar(conn)
+            except mysql.connector.Error as err:
+                log.error("No se pudo precargar el motor analítico", error=str(err))
+            finally:
+                conn.close()
+        threading.Thread(target=cargar, name="precarga-analitica", daemon=True).start()
+
+    def columnas(self):
+        return self._columnas if self._columnas is not None else Columnas.vacias()
+
+    # --- Consultas ---
+
+    def total_por_vendedor(self):
+        """Mismo resultado que resumenes.total_por_vendedor."""
+        c = self.columnas()
+        codigos = c.codigos['vendedor']
+        totales = np.bincount(codigos, weights=c.importe, minlength=len(self._diccionarios['vendedor'].valores))
+        presentes = np.unique(codigos)
+        orden = presentes[np.argsort(-totales[presentes], kind='stable')]
+        valores = self._diccionarios['vendedor'].valores
+        return [{"vendedor": valores[i], "total_ventas": round(float(totales[i]), 2)} for i in orden]
+
+    def series(self, desde=None, hasta=None, granularidad='mes', por=(), metricas=('importe_soles',),
+               filtros=None, limite=series_sql.LIMITE_SERIES):
+        """Misma respuesta que series.construir_series; los tickets son
+        siempre exactos (ventas distintas por grupo)."""
+        filtros = filtros or {}
+        por = list(por)
+        metricas = list(metricas)
+        c = self.columnas()
+        respuesta = {"granularidad": granularidad, "desde": None, "hasta": None, "por": por, "metricas": metricas,
+                     "periodos": [], "series": [], "total_series": 0, "tickets_exactos": True}
+        if not c.filas:
+            return respuesta
+        desde = desde or c.fecha.min().astype(object)
+        hasta = hasta or c.fecha.max().astype(object)
+        periodos = series_sql.rango_periodos(desde, hasta, granularidad)
+        if len(periodos) > series_sql.MAXIMO_PERIODOS:
+            raise ValueError(f"El rango pide {len(periodos)} periodos; el máximo es {series_sql.MAXIMO_PERIODOS}. "
+                             "Use una granularidad mayor o un rango más corto.")
+        respuesta.update(desde=desde.isoformat(), hasta=hasta.isoformat(),
+                         periodos=[p.isoformat() for p in periodos])
+
+        filtro = (c.fecha >= np.datetime64(desde, 'D')) & (c.fecha <= np.datetime64(hasta, 'D'))
+        if any(d in series_sql.DIMENSIONES_PRODUCTO for d in por + list(filtros)):
+            filtro &= c.id_producto != SIN_PRODUCTO
+        for dimension, valor in filtros.items():
+            codigo = self._diccionarios[dimension].indice.get(valor)
+            if codigo is None:
+                return respuesta
+            filtro &= c.codigos[dimension] == codigo
+        if not filtro.any():
+            return respuesta
+
+        fechas = c.fecha[filtro]
+        if granularidad == 'mes':
+            periodo = fechas.astype('datetime64[M]').astype(np.int64) - np.datetime64(periodos[0], 'M').astype(np.int64)
+        else:
+            periodo = (fechas - np.datetime64(periodos[0], 'D')).astype(np.int64)
+            if granularidad == 'semana':
+                periodo //= 7
+
+        # Clave de grupo en base mixta: periodo, luego cada dimensión
+        cardinalidades = [len(self._diccionarios[d].valores) for d in por]
+        clave = periodo
+        for dimension, cardinalidad in zip(por, cardinalidades):
+            clave = clave * cardinalidad + c.codigos[dimension][filtro]
+        grupos, inversa = np.unique(clave, return_inverse=True)
+
+        valores = {}
+        if 'cantidad' in metricas:
+            valores['cantidad'] = np.bincount(inversa, weights=c.cantidad[filtro], minlength=len(grupos))
+        if 'importe_soles' in metricas:
+            valores['importe_soles'] = np.bincount(inversa, weights=c.importe[filtro], minlength=len(grupos))
+        if 'tickets' in metricas:
+            base = np.int64(c.id_venta.max()) + 1
+            pares = np.unique(inversa.astype(np.int64) * base + c.id_venta[filtro])
+            valores['tickets'] = np.bincount(pares // base, minlength=len(grupos))
+
+        # Decodifica las claves: las dimensiones salen del resto, de la última a la primera
+        restos = grupos.copy()
+        codigos_grupo = {}
+        for dimension, cardinalidad in reversed(list(zip(por, cardinalidades))):
+            codigos_grupo[dimension] = restos % cardinalidad
+            restos //= cardinalidad
+        indices_periodo = restos
+
+        resultado = {}
+        for g in range(len(grupos)):
+            clave_serie = tuple(self._diccionarios[d].valores[codigos_grupo[d][g]] for d in por)
+            serie = resultado.setdefault(clave_serie, {m: [0] * len(periodos) for m in metricas})
+            for m in metricas:
+                valor = valores[m][g]
+                serie[m][indices_periodo[g]] = int(valor) if m == 'tickets' else round(float(valor), 2)
+
+        primera = metricas[0]
+        ordenadas = sorted(resultado.items(), key=lambda item: sum(item[1][primera]), reverse=True)[:limite]
+        respuesta.update(series=[{"clave": dict(zip(por, clave_serie)), "valores": serie}
+                                 for clave_serie, serie in ordenadas],
+                         total_series=len(resultado))
+        return respuesta
+
+    def estadisticas(self):
+        c = self.columnas()
+        return {"lineas": c.filas, "version": self._version, "marca_agua": self._marca_agua,
+                "recargas": self.recargas, "incrementales": self.incrementales}
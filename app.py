@@ -1,85 +1,119 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, g, render_template_string, request, jsonify, make_response
 import mysql.connector
 from datetime import date
+from decimal import Decimal
+from functools import wraps
+import base64
+import hashlib
 import json
+import os
+import tempfile
+import time
+import zlib
 from flask import render_template
 
 
 # --- CONFIGURACIÓN DE LA BASE DE DATOS ---
-# Reemplaza los valores de 'user', 'password' y 'database' según tu configuración.
-# --- CONFIGURACIÓN DE LA BASE DE DATOS ---
-import os
-from urllib.parse import urlparse
-
-# Analiza la URL de la base de datos de Render
-db_url = os.environ.get('DATABASE_URL')
-if db_url:
-    url = urlparse(db_url)
-    DB_CONFIG = {
-        'user': url.username,
-        'password': url.password,
-        'host': url.hostname,
-        'database': url.path[1:],
-        'port': url.port
-    }
-else:
-    # Configuración local de fallback (solo para desarrollo)
-    DB_CONFIG = {
-        'user': 'root',
-        'password': '',
-        'host': 'localhost',
-        'database': 'reporte'
-    }
+# La configuración (DATABASE_URL o valores locales) y el pool viven en conexiones.py.
+from conexiones import obtener_pool
+import busqueda
+import catalogo
+import exportar
+import metricas
+import registro
+import resumenes
+import versiones
+import importaciones
+import reporte as reporte_datos
+import series
+
+# Motor analítico en memoria (opcional, requiere numpy): ANALITICA_MEMORIA=1
+motor_analitico = None
+if os.environ.get('ANALITICA_MEMORIA', '').lower() in ('1', 'true', 'si'):
+    import analitica
+    motor_analitico = analitica.MotorAnalitico()
+
+# Registro estructurado (registro.py); el de lecturas es muestreado
+log = registro.obtener('app')
+log_lecturas = registro.obtener('app.lecturas', muestreado=True)
 
 # --- FUNCIONES DE GESTIÓN (CRUD) ---
-def get_db_connection():
-    """Establece y retorna una conexión a la base de datos."""
+def get_db_connection(consulta=None):
+    """Presta una conexión del pool; al llamar `close()` vuelve al pool.
+    `consulta` nombra las sentencias que se ejecuten con ella en /metrics."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        print("INFO: Conexión a la base de datos exitosa.")
-        return conn
+        return obtener_pool().obtener(consulta)
     except mysql.connector.Error as err:
-        print(f"ERROR: Error de conexión a la base de datos: {err}")
+        log.error("Error de conexión a la base de datos", consulta=consulta, error=str(err))
         return None
 
+def items_de_venta(datos):
+    """Líneas de una venta: la lista `items` ([{articulos, cantidad,
+    importe_soles}, ...]) o, en el formato de un solo artículo, los campos
+    del mismo nombre al nivel de la venta."""
+    items = datos.get('items')
+    if items is None:
+        items = [{clave: datos.get(clave) for clave in ('articulos', 'cantidad', 'importe_soles')}]
+    return [item for item in items if item.get('articulos')]
+
+# Campos que debe traer toda venta; al agregar también el cliente
+CAMPOS_VENTA = ('fecha', 'documento', 'nro_doc', 'medio_pago', 'vendedor')
+CAMPOS_VENTA_NUEVA = CAMPOS_VENTA + ('doc_cliente', 'cliente')
+
+def campos_faltantes(datos, campos):
+    """Campos requeridos que no vienen en los datos de la venta."""
+    return [campo for campo in campos if campo not in datos]
+
+def _insertar_detalle(cursor, id_venta, items, resueltos):
+    """Resuelve los productos de todas las líneas y las inserta con un INSERT multi-fila."""
+    productos = catalogo.resolver_productos(cursor, [item['articulos'] for item in items], resueltos)
+    cursor.executemany(
+        "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe_soles) VALUES (%s, %s, %s, %s)",
+        [(id_venta, productos[item['articulos']], item.get('cantidad'), item.get('importe_soles')) for item in items]
+    )
+
 def agregar_venta(venta_data):
-    """Inserta una nueva venta en la base de datos.
-    Crea el cliente y el producto si no existen."""
-    conn = get_db_connection()
+    """Inserta una nueva venta con una o varias líneas en una transacción.
+    Crea el cliente y los productos si no existen (por clave única)."""
+    # Se valida todo antes de escribir: un campo faltante a mitad de la
+    # transacción dejaría el cliente o los productos ya insertados
+    faltantes = campos_faltantes(venta_data, CAMPOS_VENTA_NUEVA)
+    if faltantes:
+        log.error("Faltan campos de la venta", campos=faltantes)
+        return False
+    items = items_de_venta(venta_data)
+    if not items:
+        log.error("La venta no tiene artículos")
+        return False
+    conn = get_db_connection('agregar_venta')
     if not conn: return False
     cursor = conn.cursor()
+    resueltos = catalogo.Resueltos()
     try:
-        # Busca o crea el cliente
-        cursor.execute("SELECT id_cliente FROM clientes WHERE doc_cliente = %s", (venta_data['doc_cliente'],))
-        id_cliente = cursor.fetchone()
-        if id_cliente is None:
-            cursor.execute("INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)",
-                           (venta_data['doc_cliente'], venta_data['cliente'], venta_data['telefono']))
-            id_cliente = (cursor.lastrowid,)
-            
-        # Busca o crea el producto
-        cursor.execute("SELECT id_producto FROM productos WHERE nombre_original = %s", (venta_data['articulos'],))
-        id_producto = cursor.fetchone()
-        if id_producto is None:
-            cursor.execute("INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca) VALUES (%s, %s, %s, %s)",
-                           (venta_data['articulos'], venta_data['articulos'].strip().lower(), 'Sin Categoría', 'Sin Marca'))
-            id_producto = (cursor.lastrowid,)
-            
+        id_cliente = catalogo.resolver_cliente(cursor, venta_data['doc_cliente'], venta_data['cliente'],
+                                               venta_data.get('telefono'), resueltos)
+
         # Inserta la nueva venta
         cursor.execute("INSERT INTO ventas (fecha, documento, nro_doc, medio_pago, vendedor, id_cliente) VALUES (%s, %s, %s, %s, %s, %s)",
-                       (venta_data['fecha'], venta_data['documento'], venta_data['nro_doc'], venta_data['medio_pago'], venta_data['vendedor'], id_cliente[0]))
+                       (venta_data['fecha'], venta_data['documento'], venta_data['nro_doc'], venta_data['medio_pago'], venta_data['vendedor'], id_cliente))
         id_venta = cursor.lastrowid
-        
+
         # Inserta el detalle de la venta
-        cursor.execute("INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe_soles) VALUES (%s, %s, %s, %s)",
-                       (id_venta, id_producto[0], venta_data['cantidad'], venta_data['importe_soles']))
-        
+        _insertar_detalle(cursor, id_venta, items, resueltos)
+
+        # Mantiene el índice de búsqueda y el resumen por vendedor en la misma transacción
+        busqueda.indexar_venta(conn, id_venta)
+        resumenes.sumar_venta(conn, id_venta)
+        versiones.incrementar_version(conn)
+
         conn.commit()
-        print(f"ÉXITO: Venta {id_venta} agregada con éxito.")
+        # Recién confirmados, los ids de clientes y productos pueden ir a la caché
+        resueltos.publicar()
+        log.info("Venta agregada", id_venta=id_venta, articulos=len(items))
         return True
     except mysql.connector.Error as err:
-        print(f"ERROR: Error al agregar venta: {err}")
+        log.error("Error al agregar venta", error=str(err))
         conn.rollback()
         return False
     finally:
@@ -87,54 +121,71 @@ def agregar_venta(venta_data):
         if conn: conn.close()
 
 def editar_venta(id_venta, nuevos_datos):
-    """Actualiza una venta existente.
-    Si el artículo cambia, crea o actualiza el producto correspondiente."""
-    conn = get_db_connection()
+    """Actualiza una venta existente y sus líneas de detalle.
+    Con la lista `items` reemplaza todas las líneas; en el formato de un solo
+    artículo solo cambia la primera línea y conserva las demás.
+    El cliente y los productos se resuelven (o crean) por clave única.
+    Retorna None si la venta no existe."""
+    faltantes = campos_faltantes(nuevos_datos, CAMPOS_VENTA)
+    if faltantes:
+        log.error("Faltan campos de la venta", id_venta=id_venta, campos=faltantes)
+        return False
+    items = items_de_venta(nuevos_datos)
+    if not items:
+        log.error("La venta no tiene artículos", id_venta=id_venta)
+        return False
+    conn = get_db_connection('editar_venta')
     if not conn: return False
     cursor = conn.cursor()
+    resueltos = catalogo.Resueltos()
     try:
-        print(f"INFO: Editando venta con ID: {id_venta}, nuevos datos: {nuevos_datos}")
-
-        # Lógica de actualización del producto
-        cursor.execute("SELECT dv.id_producto FROM detalle_venta dv WHERE dv.id_venta = %s", (id_venta,))
-        id_producto_actual_tuple = cursor.fetchone()
-
-        if id_producto_actual_tuple:
-            id_producto_actual = id_producto_actual_tuple[0]
-            cursor.execute("SELECT nombre_original FROM productos WHERE id_producto = %s", (id_producto_actual,))
-            nombre_original_actual_tuple = cursor.fetchone()
-            nombre_original_actual = nombre_original_actual_tuple[0] if nombre_original_actual_tuple else ""
-
-            if nombre_original_actual != nuevos_datos['articulos']:
-                print("INFO: El artículo ha cambiado. Creando/actualizando producto...")
-                cursor.execute("SELECT id_producto FROM productos WHERE nombre_original = %s", (nuevos_datos['articulos'],))
-                id_producto_nuevo_tuple = cursor.fetchone()
-                
-                if id_producto_nuevo_tuple is None:
-                    cursor.execute("INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca) VALUES (%s, %s, %s, %s)",
-                                   (nuevos_datos['articulos'], nuevos_datos['articulos'].strip().lower(), 'Sin Categoría', 'Sin Marca'))
-                    id_producto_nuevo = cursor.lastrowid
-                else:
-                    id_producto_nuevo = id_producto_nuevo_tuple[0]
-                
-                # Actualiza el id_producto en la tabla detalle_venta
-                cursor.execute("UPDATE detalle_venta SET id_producto = %s WHERE id_venta = %s", (id_producto_nuevo, id_venta))
-        
+        # Bloquea la venta antes de tocar resúmenes o detalle; el rowcount del
+        # UPDATE no sirve para esto: cuenta filas cambiadas, no encontradas
+        cursor.execute("SELECT id_venta FROM ventas WHERE id_venta = %s FOR UPDATE", (id_venta,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            log.error("La venta no existe", id_venta=id_venta)
+            return None
+
+        # Retira el aporte anterior de la venta del resumen; se vuelve a sumar al final
+        resumenes.restar_venta(conn, id_venta)
+
         # Actualiza la tabla de ventas
-        update_venta_query = "UPDATE ventas SET fecha = %s, documento = %s, nro_doc = %s, medio_pago = %s, vendedor = %s WHERE id_venta = %s"
-        update_venta_params = (nuevos_datos['fecha'], nuevos_datos['documento'], nuevos_datos['nro_doc'], nuevos_datos['medio_pago'], nuevos_datos['vendedor'], id_venta)
-        cursor.execute(update_venta_query, update_venta_params)
-
-        # Actualiza la tabla de detalle_venta
-        update_detalle_query = "UPDATE detalle_venta SET cantidad = %s, importe_soles = %s WHERE id_venta = %s"
-        update_detalle_params = (nuevos_datos['cantidad'], nuevos_datos['importe_soles'], id_venta)
-        cursor.execute(update_detalle_query, update_detalle_params)
-        
+        update_venta_query = "UPDATE ventas SET fecha = %s, documento = %s, nro_doc = %s, medio_pago = %s, vendedor = %s"
+        update_venta_params = [nuevos_datos['fecha'], nuevos_datos['documento'], nuevos_datos['nro_doc'], nuevos_datos['medio_pago'], nuevos_datos['vendedor']]
+        if nuevos_datos.get('doc_cliente'):
+            update_venta_query += ", id_cliente = %s"
+            update_venta_params.append(catalogo.resolver_cliente(cursor, nuevos_datos['doc_cliente'],
+                                                                 nuevos_datos.get('cliente'), nuevos_datos.get('telefono'),
+                                                                 resueltos))
+        cursor.execute(update_venta_query + " WHERE id_venta = %s", update_venta_params + [id_venta])
+
+        if nuevos_datos.get('items') is not None:
+            # Reemplaza todas las líneas de detalle
+            cursor.execute("DELETE FROM detalle_venta WHERE id_venta = %s", (id_venta,))
+            _insertar_detalle(cursor, id_venta, items, resueltos)
+        else:
+            # Un solo artículo: cambia la primera línea (la que muestra el listado)
+            item = items[0]
+            productos = catalogo.resolver_productos(cursor, [item['articulos']], resueltos)
+            cursor.execute(
+                "UPDATE detalle_venta SET id_producto = %s, cantidad = %s, importe_soles = %s "
+                "WHERE id_venta = %s ORDER BY id_detalle LIMIT 1",
+                (productos[item['articulos']], item.get('cantidad'), item.get('importe_soles'), id_venta))
+            cursor.execute("SELECT COUNT(*) FROM detalle_venta WHERE id_venta = %s", (id_venta,))
+            if cursor.fetchone()[0] == 0:
+                _insertar_detalle(cursor, id_venta, items, resueltos)
+
+        busqueda.indexar_venta(conn, id_venta)
+        resumenes.sumar_venta(conn, id_venta)
+        versiones.incrementar_version(conn, edicion=True)
+
         conn.commit()
-        print(f"ÉXITO: Venta {id_venta} editada con éxito.")
+        resueltos.publicar()
+        log.info("Venta editada", id_venta=id_venta, articulos=len(items))
         return True
     except mysql.connector.Error as err:
-        print(f"ERROR: Error al editar venta: {err}")
+        log.error("Error al editar venta", id_venta=id_venta, error=str(err))
         conn.rollback()
         return False
     finally:
@@ -142,104 +193,292 @@ def editar_venta(id_venta, nuevos_datos):
         if conn: conn.close()
 
 def eliminar_venta(id_venta):
-    """Elimina una venta existente de la base de datos, incluyendo su detalle."""
-    conn = get_db_connection()
+    """Elimina una venta existente de la base de datos, incluyendo su detalle.
+    Retorna None si la venta no existe."""
+    conn = get_db_connection('eliminar_venta')
     if not conn: return False
     cursor = conn.cursor()
     try:
-        print(f"INFO: Eliminando venta con ID: {id_venta}...")
+        # Sin la venta no hay nada que borrar ni versión que subir: cada
+        # incremento con edición invalida los ETag y recarga el motor analítico
+        cursor.execute("SELECT id_venta FROM ventas WHERE id_venta = %s FOR UPDATE", (id_venta,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            log.error("La venta no existe", id_venta=id_venta)
+            return None
+
+        resumenes.restar_venta(conn, id_venta)
         
         # Elimina de la tabla de detalle
         cursor.execute("DELETE FROM detalle_venta WHERE id_venta = %s", (id_venta,))
         
         # Elimina de la tabla de ventas
         cursor.execute("DELETE FROM ventas WHERE id_venta = %s", (id_venta,))
+
+        busqueda.desindexar_venta(conn, id_venta)
+        versiones.incrementar_version(conn, edicion=True)
         
         conn.commit()
-        print(f"ÉXITO: Venta {id_venta} eliminada con éxito.")
+        log.info("Venta eliminada", id_venta=id_venta)
         return True
     except mysql.connector.Error as err:
-        print(f"ERROR: Error al eliminar venta: {err}")
+        log.error("Error al eliminar venta", id_venta=id_venta, error=str(err))
         conn.rollback()
         return False
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-def obtener_ventas(search_term=None):
+# Columnas por las que se puede ordenar el listado (nombre público -> expresión SQL).
+# La página se arma solo sobre `ventas`: cada orden tiene un índice que
+# entrega las filas ya ordenadas por (columna, id_venta), sin filesort
+# (idx_ventas_fecha y la clave primaria). Todas son NOT NULL para que la
+# comparación del cursor sea válida.
+# 'relevancia' solo aplica cuando hay término de búsqueda: ordena las
+# coincidencias que entrega el índice de busqueda.py, no la tabla.
+COLUMNAS_ORDEN = {
+    'fecha': 'v.fecha',
+    'id_venta': 'v.id_venta',
+    'relevancia': 'b.relevancia',
+}
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 500
+
+def codificar_cursor(valor, id_venta):
+    """Empaqueta la posición de la última venta en un token opaco para la URL."""
+    if isinstance(valor, date):
+        valor = valor.isoformat()
+    elif isinstance(valor, Decimal):
+        valor = str(valor)
+    crudo = json.dumps([valor, id_venta]).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii')
+
+def decodificar_cursor(token):
+    """Retorna (valor, id_venta) o None si el token no es válido."""
+    try:
+        valor, id_venta = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return valor, int(id_venta)
+    except (ValueError, TypeError):
+        return None
+
+# Ventas por consulta al recorrer el listado completo (limit=0)
+VENTAS_POR_LOTE = 500
+
+def _consulta_ventas(search_term, limite, cursor_token, orden, descendente):
+    """Arma la consulta de una página de ventas (sin sus líneas).
+    `limite` None = sin límite. Retorna (query, params)."""
+    filtro = busqueda.subconsulta_busqueda(search_term) if search_term else None
+    if orden == 'relevancia' and not filtro:
+        orden = 'fecha'
+    columna = COLUMNAS_ORDEN.get(orden, COLUMNAS_ORDEN['fecha'])
+    query = f"""
+    SELECT
+        v.id_venta,
+        v.fecha,
+        v.documento,
+        v.nro_doc,
+        v.medio_pago,
+        v.vendedor,
+        c.doc_cliente,
+        c.cliente,
+        c.telefono,
+        {columna} AS valor_orden
+    FROM ventas v
+    JOIN clientes c ON v.id_cliente = c.id_cliente
     """
-    Obtiene todas las ventas de la base de datos, uniendo tablas.
-    Permite filtrar por un término de búsqueda.
+    params = []
+    if filtro:
+        # Las ventas que coinciden salen del índice; el join solo trae sus filas
+        sql_busqueda, params_busqueda = filtro
+        query += f" JOIN ({sql_busqueda}) b ON b.id_venta = v.id_venta"
+        params += params_busqueda
+
+    posicion = decodificar_cursor(cursor_token) if cursor_token else None
+    op = '<' if descendente else '>'
+    if posicion and columna == 'v.id_venta':
+        query += f" WHERE v.id_venta {op} %s"
+        params.append(posicion[1])
+    elif posicion:
+        # Forma expandida de (col, id_venta) < (...) para que MySQL recorra el índice
+        query += f" WHERE ({columna} {op} %s OR ({columna} = %s AND v.id_venta {op} %s))"
+        valor, id_venta = posicion
+        params += [valor, valor, id_venta]
+
+    direccion = 'DESC' if descendente else 'ASC'
+    if columna == 'v.id_venta':
+        query += f" ORDER BY v.id_venta {direccion}"
+    else:
+        query += f" ORDER BY {columna} {direccion}, v.id_venta {direccion}"
+    if limite is not None:
+        # Se pide una venta extra para saber si hay otra página
+        query += " LIMIT %s"
+        params.append(limite + 1)
+    return query, params
+
+# Líneas de las ventas de una página, por idx_detalle_venta (id_venta, id_detalle)
+CONSULTA_LINEAS = """
+SELECT
+    dv.id_venta,
+    dv.id_detalle,
+    p.nombre_original AS articulos,
+    dv.cantidad,
+    dv.importe_soles
+FROM detalle_venta dv
+JOIN productos p ON dv.id_producto = p.id_producto
+WHERE dv.id_venta IN ({marcadores})
+ORDER BY dv.id_venta, dv.id_detalle
+"""
+
+def _lineas_de_ventas(cursor, ids):
+    """{id_venta: [líneas]} de las ventas indicadas."""
+    cursor.execute(CONSULTA_LINEAS.format(marcadores=', '.join(['%s'] * len(ids))), ids)
+    lineas = {}
+    for linea in cursor.fetchall():
+        lineas.setdefault(linea.pop('id_venta'), []).append(linea)
+    return lineas
+
+def iterar_ventas(search_term=None, limite=LIMITE_POR_DEFECTO, cursor_token=None, orden='fecha',
+                  descendente=True, resultado=None):
+    """
+    Generador de las filas (una por línea de venta) de una página del listado.
+    Permite filtrar por un término de búsqueda (resuelto por el índice de
+    busqueda.py) y ordenar por una columna de COLUMNAS_ORDEN. La paginación
+    es por keyset (valor de orden, id_venta) sobre `ventas`: `limite` cuenta
+    ventas, cada una con todas sus líneas, y el costo de cada página no
+    depende de su posición. Las líneas se leen después, con una consulta
+    por clave para las ventas de la página. `limite` 0 o None recorre todo,
+    en lotes de VENTAS_POR_LOTE, así la memoria no depende del tamaño del
+    resultado. Al terminar deja en `resultado` el token de la página
+    siguiente ('siguiente', None en la última) y 'error' si falló la base.
     """
-    conn = get_db_connection()
-    if not conn: return []
+    resultado = {} if resultado is None else resultado
+    resultado['siguiente'] = None
+    limite = max(1, min(int(limite), LIMITE_MAXIMO)) if limite else None
+    conn = get_db_connection('obtener_ventas')
+    if not conn:
+        resultado['error'] = "No hay conexión con la base de datos."
+        return
     cursor = conn.cursor(dictionary=True)
+    enviadas = 0
     try:
-        query = """
-        SELECT
-            v.id_venta,
-            v.fecha,
-            v.documento,
-            v.nro_doc,
-            v.medio_pago,
-            v.vendedor,
-            c.doc_cliente,
-            c.cliente,
-            c.telefono,
-            p.nombre_original AS articulos,
-            dv.cantidad,
-            dv.importe_soles
-        FROM ventas v
-        JOIN clientes c ON v.id_cliente = c.id_cliente
-        JOIN detalle_venta dv ON v.id_venta = dv.id_venta
-        JOIN productos p ON dv.id_producto = p.id_producto
-        """
-        params = []
-        if search_term:
-            query += """
-            WHERE c.cliente LIKE %s OR c.doc_cliente LIKE %s OR p.nombre_original LIKE %s OR v.documento LIKE %s OR v.nro_doc LIKE %s OR v.vendedor LIKE %s
-            """
-            search_pattern = f"%{search_term}%"
-            params = [search_pattern] * 6
-            
-        query += " ORDER BY v.fecha DESC, v.id_venta DESC"
-
-        cursor.execute(query, params)
-        ventas = cursor.fetchall()
-        for venta in ventas:
-            if isinstance(venta['fecha'], date):
-                venta['fecha'] = venta['fecha'].isoformat()
-        print(f"INFO: Se obtuvieron {len(ventas)} registros de ventas.")
-        return ventas
+        while True:
+            lote = VENTAS_POR_LOTE if limite is None else limite - enviadas
+            query, params = _consulta_ventas(search_term, lote, cursor_token, orden, descendente)
+            cursor.execute(query, params)
+            ventas = cursor.fetchall()
+            hay_mas = len(ventas) > lote
+            ventas = ventas[:lote]
+            if not ventas:
+                break
+            lineas = _lineas_de_ventas(cursor, [venta['id_venta'] for venta in ventas])
+            for venta in ventas:
+                cursor_token = codificar_cursor(venta.pop('valor_orden'), venta['id_venta'])
+                if isinstance(venta['fecha'], date):
+                    venta['fecha'] = venta['fecha'].isoformat()
+                for linea in lineas.get(venta['id_venta'], ()):
+                    yield dict(venta, **linea)
+            enviadas += len(ventas)
+            if not hay_mas:
+                break
+            if limite is not None:
+                # La venta extra: hay otra página a partir de la última enviada
+                resultado['siguiente'] = cursor_token
+                break
+        log_lecturas.info("Ventas obtenidas", ventas=enviadas)
+    except mysql.connector.Error as err:
+        log.error("Error al obtener ventas", error=str(err))
+        resultado['error'] = "Error al obtener ventas."
+    finally:
+        cursor.close()
+        conn.close()
+
+def obtener_ventas(search_term=None, limite=LIMITE_POR_DEFECTO, cursor_token=None, orden='fecha', descendente=True):
+    """Versión en lista de iterar_ventas. Retorna (ventas, siguiente_cursor);
+    siguiente_cursor es None en la última página."""
+    resultado = {}
+    ventas = list(iterar_ventas(search_term, limite, cursor_token, orden, descendente, resultado))
+    return ventas, resultado['siguiente']
+
+# Una venta por clave primaria con su cliente y sus líneas (GET /ventas/<id>)
+CONSULTA_VENTA = """
+SELECT
+    v.id_venta,
+    v.fecha,
+    v.documento,
+    v.nro_doc,
+    v.medio_pago,
+    v.vendedor,
+    c.doc_cliente,
+    c.cliente,
+    c.telefono,
+    dv.id_detalle,
+    p.nombre_original AS articulos,
+    dv.cantidad,
+    dv.importe_soles
+FROM ventas v
+JOIN clientes c ON v.id_cliente = c.id_cliente
+LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+LEFT JOIN productos p ON dv.id_producto = p.id_producto
+WHERE v.id_venta = %s
+ORDER BY dv.id_detalle
+"""
+
+def obtener_venta(id_venta):
+    """
+    Obtiene una venta por su id (búsqueda por clave primaria) con su cliente
+    y sus líneas de detalle. Los campos de la primera línea (articulos,
+    cantidad, importe_soles) se repiten al nivel de la venta, igual que en
+    el listado, y todas las líneas van en `detalles`.
+    Retorna el diccionario de la venta, None si no existe o False si falla
+    la base de datos.
+    """
+    conn = get_db_connection('obtener_venta')
+    if not conn: return False
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(CONSULTA_VENTA, (id_venta,))
+        filas = cursor.fetchall()
+        if not filas:
+            return None
+        venta = dict(filas[0])
+        if isinstance(venta['fecha'], date):
+            venta['fecha'] = venta['fecha'].isoformat()
+        venta['detalles'] = [
+            {"id_detalle": f['id_detalle'], "articulos": f['articulos'],
+             "cantidad": f['cantidad'], "importe_soles": f['importe_soles']}
+            for f in filas if f['id_detalle'] is not None
+        ]
+        return venta
     except mysql.connector.Error as err:
-        print(f"ERROR: Error al obtener ventas: {err}")
-        return []
+        log.error("Error al obtener la venta", id_venta=id_venta, error=str(err))
+        return False
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
 def obtener_ventas_agregadas_por_vendedor():
-    """Obtiene el total de ventas (importe) por cada vendedor."""
-    conn = get_db_connection()
-    if not conn: return []
+    """Obtiene el total de ventas (importe) por cada vendedor.
+    Lee la tabla de resumen que mantienen los helpers de escritura, o el
+    motor analítico en memoria si está activo. Retorna None si falla la base."""
+    conn = get_db_connection('ventas_por_vendedor')
+    if not conn: return None
+    if motor_analitico is not None:
+        try:
+            motor_analitico.actualizar(conn)
+            return motor_analitico.total_por_vendedor()
+        except mysql.connector.Error as err:
+            log.error("Error al actualizar el motor analítico", error=str(err))
+            return None
+        finally:
+            conn.close()
     cursor = conn.cursor(dictionary=True)
     try:
-        query = """
-        SELECT
-            v.vendedor,
-            SUM(dv.importe_soles) AS total_ventas
-        FROM ventas v
-        JOIN detalle_venta dv ON v.id_venta = dv.id_venta
-        GROUP BY v.vendedor
-        ORDER BY total_ventas DESC
-        """
-        cursor.execute(query)
-        ventas_agregadas = cursor.fetchall()
-        print(f"INFO: Se obtuvieron {len(ventas_agregadas)} datos agregados para el gráfico.")
+        ventas_agregadas = resumenes.total_por_vendedor(cursor)
+        log_lecturas.info("Datos agregados para el gráfico", filas=len(ventas_agregadas))
         return ventas_agregadas
     except mysql.connector.Error as err:
-        print(f"ERROR: Error al obtener ventas agregadas: {err}")
-        return []
+        log.error("Error al obtener ventas agregadas", error=str(err))
+        return None
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
@@ -247,6 +486,68 @@ def obtener_ventas_agregadas_por_vendedor():
 # --- CÓDIGO DEL SERVIDOR FLASK ---
 app = Flask(__name__)
 
+if motor_analitico is not None:
+    # Cada worker carga sus columnas al arrancar, sin esperar la primera petición
+    motor_analitico.precargar(lambda: get_db_connection('motor_analitico'))
+
+# --- MÉTRICAS (GET /metrics) ---
+# Las peticiones que tardan más que esto se registran como advertencia
+PETICION_LENTA_SEGUNDOS = float(os.environ.get('LOG_PETICION_LENTA', 1.0))
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+
+@app.after_request
+def medir_peticion(respuesta):
+    """Registra la latencia y el código de estado por ruta. Se mide al cerrar
+    la respuesta, así las respuestas en streaming cuentan hasta el último byte."""
+    inicio = g.get('inicio_peticion')
+    if inicio is None:
+        return respuesta
+    ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    metodo, estado = request.method, respuesta.status_code
+
+    def registrar():
+        duracion = time.perf_counter() - inicio
+        metricas.PETICIONES.incrementar(ruta=ruta, metodo=metodo, estado=estado)
+        metricas.PETICIONES_DURACION.observar(duracion, ruta=ruta, metodo=metodo)
+        if duracion >= PETICION_LENTA_SEGUNDOS:
+            log.advertencia("Petición lenta", ruta=ruta, metodo=metodo, estado=estado,
+                            segundos=round(duracion, 3))
+
+    respuesta.call_on_close(registrar)
+    return respuesta
+
+def _estado_pool():
+    estado = obtener_pool().estadisticas()
+    return [({"estado": clave}, estado[clave]) for clave in ('tamano', 'creadas', 'libres')]
+
+def _cache_ids(campo):
+    return lambda: [({"cache": cache}, datos[campo]) for cache, datos in catalogo.estadisticas_cache().items()]
+
+metricas.registrar(metricas.Medidor(
+    'reporte_pool_conexiones', 'Conexiones del pool del worker (tamaño máximo, creadas y libres).',
+    _estado_pool, ('estado',)))
+metricas.registrar(metricas.Medidor(
+    'reporte_cache_ids_entradas', 'Entradas en las cachés de ids de catalogo.py.',
+    _cache_ids('entradas'), ('cache',)))
+metricas.registrar(metricas.Medidor(
+    'reporte_cache_ids_aciertos_total', 'Aciertos de las cachés de ids.',
+    _cache_ids('aciertos'), ('cache',), tipo='counter'))
+metricas.registrar(metricas.Medidor(
+    'reporte_cache_ids_fallos_total', 'Fallos de las cachés de ids.',
+    _cache_ids('fallos'), ('cache',), tipo='counter'))
+if motor_analitico is not None:
+    metricas.registrar(metricas.Medidor(
+        'reporte_analitica_lineas', 'Líneas de venta cargadas en el motor analítico.',
+        lambda: motor_analitico.estadisticas()['lineas']))
+    metricas.registrar(metricas.Medidor(
+        'reporte_analitica_cargas_total', 'Cargas del motor analítico por tipo.',
+        lambda: [({"tipo": "completa"}, motor_analitico.recargas),
+                 ({"tipo": "incremental"}, motor_analitico.incrementales)],
+        ('tipo',), tipo='counter'))
+
 # Plantilla HTML y JavaScript integrados para la página principal
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -304,22 +605,17 @@ HTML_TEMPLATE = """
                     <label for="telefono" class="block text-sm font-medium text-gray-700">Teléfono</label>
                     <input type="text" id="telefono" name="telefono" class="mt-1 block w-full px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500">
                 </div>
-                <div>
-                    <label for="articulos" class="block text-sm font-medium text-gray-700">Artículos</label>
-                    <input type="text" id="articulos" name="articulos" required class="mt-1 block w-full px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500">
-                </div>
-                <div>
-                    <label for="cantidad" class="block text-sm font-medium text-gray-700">Cantidad</label>
-                    <input type="number" id="cantidad" name="cantidad" required class="mt-1 block w-full px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500">
-                </div>
-                <div>
-                    <label for="importe_soles" class="block text-sm font-medium text-gray-700">Importe en Soles</label>
-                    <input type="number" id="importe_soles" name="importe_soles" step="0.01" required class="mt-1 block w-full px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500">
-                </div>
                 <div>
                     <label for="vendedor" class="block text-sm font-medium text-gray-700">Vendedor</label>
                     <input type="text" id="vendedor" name="vendedor" required class="mt-1 block w-full px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500">
                 </div>
+                <div class="col-span-1 md:col-span-2 lg:col-span-3">
+                    <div class="flex justify-between items-center mb-2">
+                        <span class="block text-sm font-medium text-gray-700">Artículos</span>
+                        <button type="button" id="agregar-linea-btn" class="px-3 py-1 text-sm bg-gray-200 text-gray-800 rounded-md hover:bg-gray-300">Agregar línea</button>
+                    </div>
+                    <div id="lineas-venta" class="space-y-2"></div>
+                </div>
                 <div class="col-span-1 md:col-span-2 lg:col-span-3 flex justify-end space-x-4">
                     <button type="submit" class="px-6 py-2 bg-indigo-600 text-white font-semibold rounded-md shadow-md hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 transition ease-in-out duration-150">Guardar Venta</button>
                     <button type="button" id="cancel-edit-btn" class="hidden px-6 py-2 bg-gray-300 text-gray-800 font-semibold rounded-md shadow-md hover:bg-gray-400 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-gray-500 transition ease-in-out duration-150">Cancelar</button>
@@ -344,12 +640,12 @@ HTML_TEMPLATE = """
                     <button id="search-button" class="px-4 py-2 bg-indigo-600 text-white font-semibold rounded-r-md shadow-md hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 transition ease-in-out duration-150">Buscar</button>
                 </div>
             </div>
-            <div class="overflow-x-auto overflow-y-auto max-h-[500px] bg-white rounded-xl shadow-lg">
+            <div id="ventas-scroll" class="overflow-x-auto overflow-y-auto max-h-[500px] bg-white rounded-xl shadow-lg">
                 <table class="min-w-full divide-y divide-gray-200">
                     <thead class="bg-gray-50 sticky top-0">
                         <tr>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">ID</th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Fecha</th>
+                            <th scope="col" data-orden="id_venta" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider cursor-pointer hover:text-indigo-600">ID</th>
+                            <th scope="col" data-orden="fecha" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider cursor-pointer hover:text-indigo-600">Fecha</th>
                             <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Documento</th>
                             <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Nro. Doc</th>
                             <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Cliente</th>
@@ -400,9 +696,15 @@ HTML_TEMPLATE = """
         const searchInput = document.getElementById('search-input');
         const searchButton = document.getElementById('search-button');
         const ventasChartCtx = document.getElementById('ventasChart').getContext('2d');
+        const ventasScroll = document.getElementById('ventas-scroll');
+        const lineasVenta = document.getElementById('lineas-venta');
+        const agregarLineaBtn = document.getElementById('agregar-linea-btn');
         let ventasChartInstance;
         let currentDeleteId = null;
 
+        // Estado del listado paginado (cursor del servidor, orden y filas cargadas)
+        const listado = { busqueda: '', orden: 'fecha', dir: 'desc', siguiente: null, cargando: false, ventas: [] };
+
         // Función para mostrar mensajes de notificación
         function showNotification(message, isSuccess = true) {
             const notification = document.createElement('div');
@@ -416,40 +718,66 @@ HTML_TEMPLATE = """
             }, 3000);
         }
 
-        // Función para renderizar la tabla con los datos de ventas
-        async function renderVentas(searchTerm = '') {
+        // Agrega una fila a la tabla
+        function agregarFila(venta) {
+            const row = document.createElement('tr');
+            row.innerHTML = `
+                <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">${venta.id_venta}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.fecha}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.documento}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.nro_doc}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.cliente}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.articulos}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.cantidad}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.importe_soles}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.vendedor}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
+                    <button onclick="editarVenta(${venta.id_venta})" class="text-indigo-600 hover:text-indigo-900 mr-2">Editar</button>
+                    <button onclick="confirmarEliminar(${venta.id_venta})" class="text-red-600 hover:text-red-900">Eliminar</button>
+                </td>
+            `;
+            ventasBody.appendChild(row);
+        }
+
+        // Carga la siguiente página del listado (o la primera si se reinicia)
+        async function cargarPaginaVentas(reiniciar = false) {
+            if (listado.cargando || (!reiniciar && !listado.siguiente)) return;
+            listado.cargando = true;
             try {
-                const url = searchTerm ? `/ventas?q=${encodeURIComponent(searchTerm)}` : '/ventas';
-                const response = await fetch(url);
+                const params = new URLSearchParams({ orden: listado.orden, dir: listado.dir });
+                if (listado.busqueda) params.set('q', listado.busqueda);
+                if (!reiniciar) params.set('cursor', listado.siguiente);
+                const response = await fetch(`/ventas?${params}`);
                 if (!response.ok) throw new Error('Error al obtener ventas');
-                const ventas = await response.json();
-                
-                ventasBody.innerHTML = '';
-                ventas.forEach(venta => {
-                    const row = document.createElement('tr');
-                    row.innerHTML = `
-                        <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">${venta.id_venta}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.fecha}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.documento}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.nro_doc}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.cliente}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.articulos}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.cantidad}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.importe_soles}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${venta.vendedor}</td>
-                        <td class="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
-                            <button onclick="editarVenta(${venta.id_venta})" class="text-indigo-600 hover:text-indigo-900 mr-2">Editar</button>
-                            <button onclick="confirmarEliminar(${venta.id_venta})" class="text-red-600 hover:text-red-900">Eliminar</button>
-                        </td>
-                    `;
-                    ventasBody.appendChild(row);
-                });
+                const pagina = await response.json();
+
+                if (reiniciar) {
+                    ventasBody.innerHTML = '';
+                    listado.ventas = [];
+                    ventasScroll.scrollTop = 0;
+                }
+                pagina.ventas.forEach(agregarFila);
+                listado.ventas.push(...pagina.ventas);
+                listado.siguiente = pagina.siguiente;
             } catch (error) {
                 console.error('Error al renderizar ventas:', error);
                 showNotification('Error al cargar las ventas.', false);
+            } finally {
+                listado.cargando = false;
             }
         }
-        
+
+        // Función para renderizar la tabla con los datos de ventas
+        function renderVentas(searchTerm = listado.busqueda) {
+            if (searchTerm !== listado.busqueda) {
+                // Con búsqueda se ordena por relevancia; sin ella, por fecha
+                listado.orden = searchTerm ? 'relevancia' : 'fecha';
+                listado.dir = 'desc';
+            }
+            listado.busqueda = searchTerm;
+            return cargarPaginaVentas(true);
+        }
+
         // Función para renderizar el gráfico
         async function renderChart() {
             try {
@@ -512,6 +840,23 @@ HTML_TEMPLATE = """
         document.addEventListener('DOMContentLoaded', () => {
             renderVentas();
             renderChart(); // Carga el gráfico al iniciar
+
+            // Carga más filas al acercarse al final de la tabla
+            ventasScroll.addEventListener('scroll', () => {
+                if (ventasScroll.scrollTop + ventasScroll.clientHeight >= ventasScroll.scrollHeight - 200) {
+                    cargarPaginaVentas();
+                }
+            });
+
+            // Ordenar en el servidor al hacer clic en una cabecera
+            document.querySelectorAll('th[data-orden]').forEach(th => {
+                th.addEventListener('click', () => {
+                    const orden = th.dataset.orden;
+                    listado.dir = (listado.orden === orden && listado.dir === 'desc') ? 'asc' : 'desc';
+                    listado.orden = orden;
+                    renderVentas();
+                });
+            });
             
             // Agregar listeners para el buscador
             searchButton.addEventListener('click', handleSearch);
@@ -523,15 +868,57 @@ HTML_TEMPLATE = """
             });
         });
 
+        // Agrega una línea (artículo, cantidad, importe) al formulario
+        function agregarLinea(linea = {}) {
+            const fila = document.createElement('div');
+            fila.className = 'linea-venta grid grid-cols-12 gap-2';
+            const clases = 'px-3 py-2 bg-white border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500';
+            fila.innerHTML = `
+                <input type="text" data-campo="articulos" placeholder="Artículo" required class="col-span-6 ${clases}">
+                <input type="number" data-campo="cantidad" placeholder="Cantidad" required class="col-span-2 ${clases}">
+                <input type="number" data-campo="importe_soles" placeholder="Importe en Soles" step="0.01" required class="col-span-3 ${clases}">
+                <button type="button" class="col-span-1 text-red-600 hover:text-red-900">Quitar</button>
+            `;
+            fila.querySelector('[data-campo="articulos"]').value = linea.articulos ?? '';
+            fila.querySelector('[data-campo="cantidad"]').value = linea.cantidad ?? '';
+            fila.querySelector('[data-campo="importe_soles"]').value = linea.importe_soles ?? '';
+            fila.querySelector('button').addEventListener('click', () => {
+                // La venta conserva al menos una línea
+                if (lineasVenta.children.length > 1) fila.remove();
+            });
+            lineasVenta.appendChild(fila);
+        }
+
+        // Todas las líneas del formulario, en orden
+        function leerLineas() {
+            return Array.from(lineasVenta.querySelectorAll('.linea-venta')).map(fila => ({
+                articulos: fila.querySelector('[data-campo="articulos"]').value,
+                cantidad: parseFloat(fila.querySelector('[data-campo="cantidad"]').value),
+                importe_soles: parseFloat(fila.querySelector('[data-campo="importe_soles"]').value)
+            }));
+        }
+
+        // Deja el formulario listo para una venta nueva
+        function reiniciarFormulario() {
+            form.reset();
+            ventaIdInput.value = '';
+            formTitle.textContent = 'Añadir Nueva Venta';
+            cancelEditBtn.classList.add('hidden');
+            lineasVenta.innerHTML = '';
+            agregarLinea();
+        }
+
+        agregarLineaBtn.addEventListener('click', () => agregarLinea());
+        agregarLinea();
+
         // Manejar el envío del formulario (Añadir/Editar)
         form.addEventListener('submit', async (e) => {
             e.preventDefault();
             const formData = new FormData(form);
             const data = Object.fromEntries(formData.entries());
-            
-            // Convertir cantidad e importe a números
-            data.cantidad = parseFloat(data.cantidad);
-            data.importe_soles = parseFloat(data.importe_soles);
+
+            // Todas las líneas de la venta; al editar reemplazan a las guardadas
+            data.items = leerLineas();
 
             const ventaId = ventaIdInput.value;
             const url = ventaId ? '/editar-venta' : '/agregar-venta';
@@ -551,10 +938,7 @@ HTML_TEMPLATE = """
                 const result = await response.json();
                 if (result.success) {
                     showNotification(result.message, true);
-                    form.reset();
-                    ventaIdInput.value = '';
-                    formTitle.textContent = 'Añadir Nueva Venta';
-                    cancelEditBtn.classList.add('hidden');
+                    reiniciarFormulario();
                     renderVentas();
                     renderChart(); // Actualiza el gráfico después de una operación exitosa
                 } else {
@@ -569,9 +953,8 @@ HTML_TEMPLATE = """
         // Llenar el formulario para editar una venta
         window.editarVenta = async (id) => {
             try {
-                const response = await fetch('/ventas');
-                const ventas = await response.json();
-                const venta = ventas.find(v => v.id_venta === id);
+                const response = await fetch(`/ventas/${id}`);
+                const venta = response.ok ? await response.json() : null;
 
                 if (venta) {
                     ventaIdInput.value = venta.id_venta;
@@ -583,9 +966,10 @@ HTML_TEMPLATE = """
                     document.getElementById('doc_cliente').value = venta.doc_cliente;
                     document.getElementById('cliente').value = venta.cliente;
                     document.getElementById('telefono').value = venta.telefono;
-                    document.getElementById('articulos').value = venta.articulos;
-                    document.getElementById('cantidad').value = venta.cantidad;
-                    document.getElementById('importe_soles').value = venta.importe_soles;
+                    // Carga todas las líneas de la venta, no solo la primera
+                    lineasVenta.innerHTML = '';
+                    venta.detalles.forEach(linea => agregarLinea(linea));
+                    if (!venta.detalles.length) agregarLinea();
                     document.getElementById('vendedor').value = venta.vendedor;
                     cancelEditBtn.classList.remove('hidden');
                 } else {
@@ -598,12 +982,7 @@ HTML_TEMPLATE = """
         };
 
         // Cancelar la edición
-        cancelEditBtn.addEventListener('click', () => {
-            form.reset();
-            ventaIdInput.value = '';
-            formTitle.textContent = 'Añadir Nueva Venta';
-            cancelEditBtn.classList.add('hidden');
-        });
+        cancelEditBtn.addEventListener('click', reiniciarFormulario);
 
         // Mostrar modal de confirmación para eliminar
         window.confirmarEliminar = (id) => {
@@ -706,6 +1085,84 @@ REPORTE_TEMPLATE = """
 </html>
 """
 
+# --- GET CONDICIONAL (ETag / Last-Modified) ---
+def etag_lectura(version):
+    """ETag de una lectura: versión de los datos + ruta y query string."""
+    resumen = hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()[:16]
+    return f"v{version}-{resumen}"
+
+def condicional(vista):
+    """Decora una ruta de lectura: si el cliente ya tiene la respuesta de la
+    versión actual de los datos (If-None-Match / If-Modified-Since) responde
+    304 sin ejecutar la vista. La ETag es débil porque la misma respuesta
+    puede ir comprimida o no. Leer la versión es una búsqueda por clave
+    primaria; si falla, la vista se ejecuta sin cabeceras de caché.
+    Solo las respuestas 200 completas (no en streaming) llevan ETag: un
+    error o un cuerpo que pudo quedar a medias no se revalida con 304."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        conn = get_db_connection('version_datos')
+        if not conn: return vista(*args, **kwargs)
+        try:
+            version, actualizado = versiones.leer_version(conn)
+        except mysql.connector.Error as err:
+            log.error("Error al leer la versión de los datos", error=str(err))
+            return vista(*args, **kwargs)
+        finally:
+            conn.close()
+
+        etag = etag_lectura(version)
+        if request.if_none_match:
+            sin_cambios = request.if_none_match.contains_weak(etag)
+        else:
+            # If-Modified-Since solo se usa si el cliente no envió If-None-Match
+            sin_cambios = bool(actualizado and request.if_modified_since
+                               and actualizado.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))
+        # Solo una respuesta que llevó esta ETag puede coincidir con ella
+        respuesta = make_response('', 304) if sin_cambios else make_response(vista(*args, **kwargs))
+        if respuesta.status_code == 304 or (respuesta.status_code == 200 and not respuesta.is_streamed):
+            respuesta.set_etag(etag, weak=True)
+            if actualizado:
+                respuesta.last_modified = actualizado
+            # El navegador guarda la respuesta pero la revalida en cada uso
+            respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta
+    return envoltura
+
+# --- RESPUESTAS JSON EN STREAMING ---
+def json_ventas(ventas, resultado):
+    """Serializa {"ventas": [...], "siguiente": ...} fila por fila."""
+    yield '{"ventas": ['
+    separador = ''
+    for venta in ventas:
+        yield separador + app.json.dumps(venta)
+        separador = ', '
+    yield '], "siguiente": ' + app.json.dumps(resultado.get('siguiente'))
+    if resultado.get('error'):
+        # Los encabezados ya salieron con 200: el error viaja en el cuerpo
+        yield ', "success": false, "message": ' + app.json.dumps(resultado['error'])
+    yield '}'
+
+def _comprimir(partes, nivel=6):
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    for parte in partes:
+        datos = compresor.compress(parte.encode('utf-8'))
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+def respuesta_streaming(partes, mimetype='application/json', completa=False):
+    """Response que envía `partes` (generador de str) a medida que se producen,
+    comprimida con gzip si el cliente la acepta. Con `completa` el cuerpo se
+    arma entero antes de responder (y puede llevar ETag, ver condicional)."""
+    gzip = 'gzip' in request.accept_encodings
+    cuerpo = _comprimir(partes) if gzip else (parte.encode('utf-8') for parte in partes)
+    respuesta = Response(b''.join(cuerpo) if completa else cuerpo, mimetype=mimetype)
+    if gzip:
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.headers['Vary'] = 'Accept-Encoding'
+    return respuesta
+
 # Rutas de la aplicación Flask
 @app.route('/')
 def index():
@@ -714,23 +1171,193 @@ def index():
 
 
 @app.route('/reporte')
+@condicional
 def reporte():
-    """Ruta para la página del reporte de ventas."""
+    """Ruta para la página del reporte de ventas.
+    La página pide sus datos a /api/reporte/* según lo que se selecciona."""
     return render_template('categorias_marcas_productos.html')
 
+# Datos del reporte (estructura DATA), válidos mientras no cambie la versión de los datos
+cache_reporte = reporte_datos.CacheReporte()
+
+def obtener_datos_reporte():
+    """Retorna la estructura DATA del reporte desde la caché, o None si falla la base."""
+    conn = get_db_connection('reporte')
+    if not conn: return None
+    try:
+        _, data = cache_reporte.obtener(conn)
+        return data
+    except mysql.connector.Error as err:
+        log.error("Error al generar el reporte", error=str(err))
+        return None
+    finally:
+        conn.close()
+
+def _error_reporte():
+    return jsonify({"success": False, "message": "Error al obtener los datos del reporte."}), 503
+
+@app.route('/api/reporte/resumen', methods=['GET'])
+@condicional
+def api_reporte_resumen():
+    """API con el resumen del reporte: meses, monto por mes y top de productos."""
+    data = obtener_datos_reporte()
+    if data is None: return _error_reporte()
+    return jsonify({clave: valor for clave, valor in data.items() if clave != 'categorias'})
+
+@app.route('/api/reporte/categorias', methods=['GET'])
+@condicional
+def api_reporte_categorias():
+    """API con la lista de categorías del reporte."""
+    data = obtener_datos_reporte()
+    if data is None: return _error_reporte()
+    return jsonify(sorted(data['categorias']))
+
+@app.route('/api/reporte/categorias/<categoria>/marcas', methods=['GET'])
+@condicional
+def api_reporte_marcas(categoria):
+    """API con las marcas de una categoría."""
+    data = obtener_datos_reporte()
+    if data is None: return _error_reporte()
+    marcas = data['categorias'].get(categoria)
+    if marcas is None:
+        return jsonify({"success": False, "message": "Categoría no encontrada."}), 404
+    return jsonify(sorted(marcas))
+
+@app.route('/api/reporte/categorias/<categoria>/marcas/<marca>/productos', methods=['GET'])
+@condicional
+def api_reporte_productos(categoria, marca):
+    """API con los productos de una marca dentro de una categoría."""
+    data = obtener_datos_reporte()
+    if data is None: return _error_reporte()
+    productos = data['categorias'].get(categoria, {}).get(marca)
+    if productos is None:
+        return jsonify({"success": False, "message": "Marca no encontrada."}), 404
+    return jsonify(sorted(productos))
+
+@app.route('/api/reporte/series', methods=['GET'])
+@condicional
+def api_reporte_series():
+    """API con la serie mensual de un producto (?cat=&marca=&producto=)."""
+    data = obtener_datos_reporte()
+    if data is None: return _error_reporte()
+    serie = (data['categorias'].get(request.args.get('cat', ''), {})
+             .get(request.args.get('marca', ''), {})
+             .get(request.args.get('producto', '')))
+    if serie is None:
+        return jsonify({"success": False, "message": "Producto no encontrado."}), 404
+    return jsonify({"ordenMeses": data['ordenMeses'], "serie": serie})
+
+@app.route('/api/series', methods=['GET'])
+@condicional
+def api_series():
+    """API de series de tiempo sobre los resúmenes diarios.
+    ?desde=&hasta= (AAAA-MM-DD), granularidad=dia|semana|mes,
+    por=categoria,marca,producto,vendedor,medio_pago,
+    metricas=cantidad,importe_soles,tickets, limite= y filtros con el
+    nombre de cada dimensión (p. ej. ?categoria=Mouse&por=vendedor)."""
+    try:
+        parametros = series.leer_parametros(request.args)
+    except ValueError as err:
+        return jsonify({"success": False, "message": str(err)}), 400
+    conn = get_db_connection('series')
+    if not conn: return _error_reporte()
+    try:
+        if motor_analitico is not None:
+            motor_analitico.actualizar(conn)
+            return jsonify(motor_analitico.series(**parametros))
+        return jsonify(series.construir_series(conn, **parametros))
+    except ValueError as err:
+        return jsonify({"success": False, "message": str(err)}), 400
+    except mysql.connector.Error as err:
+        log.error("Error al obtener las series", error=str(err))
+        return _error_reporte()
+    finally:
+        conn.close()
+
 @app.route('/ventas', methods=['GET'])
+@condicional
 def get_ventas():
-    """API para obtener todas las ventas con filtro de búsqueda."""
+    """API para obtener una página de ventas con filtro de búsqueda.
+    Parámetros: q, limit (ventas por página, 0 = todas), cursor (token de la página anterior), orden y dir (asc/desc).
+    Una página (limit > 0) se lee entera antes de responder: si la base falla
+    se responde 503 y solo una página completa lleva ETag. Con limit=0 la
+    respuesta se envía en streaming a medida que se leen las filas, sin
+    ETag; un error a mitad de camino viaja en el cuerpo."""
     search_term = request.args.get('q')
-    ventas = obtener_ventas(search_term)
-    return jsonify(ventas)
+    limite = request.args.get('limit', LIMITE_POR_DEFECTO, type=int)
+    orden = request.args.get('orden', 'fecha')
+    if orden not in COLUMNAS_ORDEN:
+        return jsonify({"success": False, "message": f"Columna de orden no válida: {orden}"}), 400
+    descendente = request.args.get('dir', 'desc').lower() != 'asc'
+    resultado = {}
+    ventas = iterar_ventas(search_term, limite, request.args.get('cursor'), orden, descendente, resultado)
+    if not limite:
+        return respuesta_streaming(json_ventas(ventas, resultado))
+    ventas = list(ventas)
+    if resultado.get('error'):
+        return jsonify({"success": False, "message": resultado['error']}), 503
+    return respuesta_streaming(json_ventas(ventas, resultado), completa=True)
+
+@app.route('/ventas/<int:id_venta>', methods=['GET'])
+@condicional
+def get_venta(id_venta):
+    """API para obtener una sola venta (la usa el formulario de edición)."""
+    venta = obtener_venta(id_venta)
+    if venta is False:
+        return jsonify({"success": False, "message": "Error al obtener la venta."}), 503
+    if venta is None:
+        return jsonify({"success": False, "message": "Venta no encontrada."}), 404
+    return jsonify(venta)
 
 @app.route('/ventas-grafico', methods=['GET'])
+@condicional
 def get_ventas_grafico():
     """API para obtener los datos agregados para el gráfico."""
     ventas_agregadas = obtener_ventas_agregadas_por_vendedor()
+    if ventas_agregadas is None:
+        return jsonify({"success": False, "message": "Error al obtener los datos del gráfico."}), 503
     return jsonify(ventas_agregadas)
 
+@app.route('/export', methods=['GET'])
+def exportar_ventas():
+    """Descarga las ventas (una fila por línea) en ?format=csv|xlsx|parquet,
+    opcionalmente entre ?desde=&hasta= (AAAA-MM-DD). Se envía en streaming
+    desde un cursor sin buffer."""
+    formato = request.args.get('format', 'csv')
+    try:
+        exportar.verificar_formato(formato)
+        desde, hasta = exportar.leer_rango(request.args.get('desde'), request.args.get('hasta'))
+    except ValueError as err:
+        return jsonify({"success": False, "message": str(err)}), 400
+    except RuntimeError as err:
+        return jsonify({"success": False, "message": str(err)}), 501
+
+    def partes():
+        conn = get_db_connection('exportar')
+        if not conn:
+            log.error("Exportación sin conexión a la base de datos")
+            return
+        try:
+            yield from exportar.ESCRITORES[formato](exportar.iterar_lotes(conn, desde, hasta))
+        except mysql.connector.Error as err:
+            # Las cabeceras ya se enviaron: el archivo queda incompleto
+            log.error("Error al exportar ventas", formato=formato, error=str(err))
+        finally:
+            conn.close()
+
+    mimetype, extension = exportar.FORMATOS[formato]
+    nombre = "ventas"
+    if request.args.get('desde') or request.args.get('hasta'):
+        nombre += f"_{request.args.get('desde', 'inicio')}_{request.args.get('hasta', 'fin')}"
+    respuesta = Response(partes(), mimetype=mimetype)
+    respuesta.headers['Content-Disposition'] = f'attachment; filename="{nombre}.{extension}"'
+    return respuesta
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas del worker en el formato de texto de Prometheus."""
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/agregar-venta', methods=['POST'])
 def add_venta():
     """API para agregar una nueva venta."""
@@ -747,7 +1374,10 @@ def edit_venta():
     id_venta = data.get('id_venta')
     if not id_venta:
         return jsonify({"success": False, "message": "ID de venta no proporcionado."})
-    if editar_venta(id_venta, data):
+    resultado = editar_venta(id_venta, data)
+    if resultado is None:
+        return jsonify({"success": False, "message": "Venta no encontrada."}), 404
+    if resultado:
         return jsonify({"success": True, "message": "Venta editada con éxito."})
     else:
         return jsonify({"success": False, "message": "Error al editar la venta."})
@@ -759,11 +1389,85 @@ def delete_venta():
     id_venta = data.get('id_venta')
     if not id_venta:
         return jsonify({"success": False, "message": "ID de venta no proporcionado."})
-    if eliminar_venta(id_venta):
+    resultado = eliminar_venta(id_venta)
+    if resultado is None:
+        return jsonify({"success": False, "message": "Venta no encontrada."}), 404
+    if resultado:
         return jsonify({"success": True, "message": "Venta eliminada con éxito."})
     else:
         return jsonify({"success": False, "message": "Error al eliminar la venta."})
 
+# Carpeta donde se guardan los archivos subidos mientras se importan
+DIRECTORIO_IMPORTACIONES = os.environ.get('IMPORTAR_DIR', tempfile.gettempdir())
+
+@app.route('/importar', methods=['POST'])
+def importar():
+    """API para importar un export Lista_Ventas_Detalle.csv.
+    Acepta el CSV como cuerpo de la petición (text/csv) o como campo `archivo`
+    de un formulario multipart; ?modo=streaming (por defecto) o incremental.
+    El archivo se copia a disco por partes y se carga en segundo plano;
+    la respuesta trae el id para consultar /importar/<id>."""
+    modo = request.args.get('modo', 'streaming')
+    if modo not in importaciones.MODOS:
+        return jsonify({"success": False, "message": f"Modo no válido: {modo}"}), 400
+    if request.mimetype == 'multipart/form-data':
+        subido = request.files.get('archivo')
+        if subido is None:
+            return jsonify({"success": False, "message": "Falta el campo 'archivo'."}), 400
+        origen, nombre = subido.stream, subido.filename or 'subida.csv'
+    else:
+        origen, nombre = request.stream, request.args.get('nombre', 'subida.csv')
+
+    descriptor, ruta = tempfile.mkstemp(prefix='importacion-', suffix='.csv', dir=DIRECTORIO_IMPORTACIONES)
+    os.close(descriptor)
+    try:
+        tam = importaciones.guardar_subida(origen, ruta)
+    except OSError as err:
+        os.remove(ruta)
+        log.error("No se pudo guardar el archivo subido", error=str(err))
+        return jsonify({"success": False, "message": "No se pudo guardar el archivo."}), 500
+    # La validación usa el módulo de migración, que carga pandas
+    from migrar_datos import validar_encabezado
+    if not tam or not validar_encabezado(ruta):
+        os.remove(ruta)
+        return jsonify({"success": False, "message": "El archivo no tiene el formato de Lista_Ventas_Detalle.csv."}), 400
+
+    conn = get_db_connection('registrar_importacion')
+    if not conn:
+        os.remove(ruta)
+        return jsonify({"success": False, "message": "Error de conexión a la base de datos."}), 503
+    try:
+        id_importacion = importaciones.crear_importacion(conn, nombre, modo)
+    except mysql.connector.Error as err:
+        os.remove(ruta)
+        log.error("Error al registrar la importación", error=str(err))
+        return jsonify({"success": False, "message": "Error al registrar la importación."}), 503
+    finally:
+        conn.close()
+
+    importaciones.iniciar_importacion(id_importacion, ruta, modo)
+    log.info("Importación en cola", id_importacion=id_importacion, bytes=tam, modo=modo)
+    return jsonify({"success": True, "id_importacion": id_importacion,
+                    "estado": f"/importar/{id_importacion}"}), 202
+
+@app.route('/importar/<int:id_importacion>', methods=['GET'])
+def estado_importacion(id_importacion):
+    """API con el avance de una importación: estado, registros leídos,
+    filas insertadas, filas por segundo y mensaje de error si lo hubo."""
+    conn = get_db_connection('estado_importacion')
+    if not conn:
+        return jsonify({"success": False, "message": "Error de conexión a la base de datos."}), 503
+    try:
+        fila = importaciones.leer_importacion(conn, id_importacion)
+    except mysql.connector.Error as err:
+        log.error("Error al leer la importación", id_importacion=id_importacion, error=str(err))
+        return jsonify({"success": False, "message": "Error al leer la importación."}), 503
+    finally:
+        conn.close()
+    if fila is None:
+        return jsonify({"success": False, "message": "Importación no encontrada."}), 404
+    return jsonify(fila)
+
 # Iniciar la aplicación
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmark del motor de clasificación.
+
+Compara limpiar_nombre / clasificar_categoria / detectar_marca de
+migrar_datos.py (fila a fila) con clasificacion.clasificar_serie sobre los
+artículos del CSV, verifica que den exactamente el mismo resultado y reporta
+el costo por fila de cada uno, y por separado el de cada función de la
+referencia.
+Con --escala K se repite la serie K veces para simular exports más grandes,
+donde los artículos se repiten más y pesa la memorización; con --lineas N
+se usa un export sintético de bench.generar, donde además crecen los
+artículos distintos. --json guarda los resultados para comparar commits.
+Uso (desde la raíz del repo): python -m bench.clasificacion [archivo.csv] [--repeticiones N] [--escala K]
+    [--lineas N] [--json resultados.json]
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+import clasificacion
+import migrar_datos
+
+from bench import generar, resultados
+
+
+def referencia(articulos):
+    resultado = []
+    for a in articulos:
+        limpio = migrar_datos.limpiar_nombre(a)
+        categoria = migrar_datos.clasificar_categoria(limpio)
+        resultado.append((limpio, categoria, migrar_datos.detectar_marca(categoria, limpio)))
+    return resultado
+
+
+def motor(articulos):
+    clasificacion.clasificar.cache_clear()
+    df = clasificacion.clasificar_serie(articulos)
+    # Mismas tuplas que la referencia; itertuples costaba más que la clasificación
+    return list(zip(*(df[columna].tolist() for columna in df)))
+
+
+def medir(funcion, articulos, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(articulos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def por_funcion(esperado, articulos, repeticiones):
+    """Costo por fila de cada paso de la referencia, con la entrada que recibe en la migración."""
+    limpios = [limpio for limpio, _, _ in esperado]
+    pares = [(categoria, limpio) for limpio, categoria, _ in esperado]
+    pasos = {
+        "limpiar_nombre": (lambda xs: [migrar_datos.limpiar_nombre(a) for a in xs], articulos),
+        "clasificar_categoria": (lambda xs: [migrar_datos.clasificar_categoria(t) for t in xs], limpios),
+        "detectar_marca": (lambda xs: [migrar_datos.detectar_marca(c, t) for c, t in xs], pares),
+    }
+    n = len(articulos)
+    return {f"{nombre}_us_fila": round(medir(funcion, entrada, repeticiones)[0] * 1e6 / n, 3)
+            for nombre, (funcion, entrada) in pasos.items()}
+
+
+def ejecutar(articulos, repeticiones=5):
+    """Mide referencia y motor sobre `articulos`. Retorna (resultados, diferencias)."""
+    n = len(articulos)
+    t_ref, esperado = medir(referencia, articulos, repeticiones)
+    t_motor, obtenido = medir(motor, articulos, repeticiones)
+    diferencias = [(a, e, o) for a, e, o in zip(articulos, esperado, obtenido) if e != o]
+    medida = {
+        "filas": n,
+        "articulos_unicos": int(articulos.nunique()),
+        "referencia_us_fila": round(t_ref * 1e6 / n, 3),
+        "motor_us_fila": round(t_motor * 1e6 / n, 3),
+        "aceleracion": round(t_ref / t_motor, 2),
+        "por_funcion": por_funcion(esperado, articulos, repeticiones),
+        "diferencias": len(diferencias),
+    }
+    return medida, diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archivo', nargs='?', default=migrar_datos.ARCHIVO)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--escala', type=int, default=1)
+    parser.add_argument('--lineas', type=int, help="usa el export sintético de bench.generar con N líneas")
+    parser.add_argument('--json', help="guarda los resultados en este archivo")
+    args = parser.parse_args()
+
+    archivo = generar.generar(args.lineas) if args.lineas else args.archivo
+    articulos = migrar_datos.leer_csv(archivo)['articulos']
+    if args.escala > 1:
+        articulos = pd.concat([articulos] * args.escala, ignore_index=True)
+    medida, diferencias = ejecutar(articulos, args.repeticiones)
+
+    for a, e, o in diferencias[:20]:
+        print(f"DIFERENCIA: {a!r}: referencia={e} motor={o}")
+
+    print(f"Filas: {medida['filas']} ({medida['articulos_unicos']} artículos únicos)")
+    print(f"Referencia fila a fila: {medida['referencia_us_fila']:8.2f} µs/fila")
+    for nombre, costo in medida['por_funcion'].items():
+        print(f"  {nombre[:-len('_us_fila')]:<21} {costo:8.2f} µs/fila")
+    print(f"Motor vectorizado:      {medida['motor_us_fila']:8.2f} µs/fila  (x{medida['aceleracion']:.1f})")
+    if args.json:
+        resultados.guardar({"clasificacion": medida}, args.json,
+                           {"archivo": archivo, "escala": args.escala, "repeticiones": args.repeticiones})
+    if diferencias:
+        print(f"ERROR: {len(diferencias)} filas no coinciden con la referencia.")
+        sys.exit(1)
+    print("OK: el motor coincide con la referencia en todas las filas.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de las rutas de la app: latencia p50/p95/p99 bajo carga concurrente.
+
+Recorre todas las rutas con datos reales de la base (una categoría, una
+venta, un cursor de página, un rango para exportar...) y para cada una
+lanza `--peticiones` pedidos desde `--concurrencia` hilos. Las rutas de
+lectura con GET condicional se miden también revalidando con If-None-Match
+(la respuesta 304 que reciben los tableros abiertos). Al final mide las
+escrituras (agregar, editar y eliminar ventas marcadas ZB9-...) y una
+importación incremental de un export sintético pequeño.
+Por defecto usa el cliente de pruebas de Flask en este proceso, contra la
+base --base (la que deja bench.migracion); con --url mide un servidor ya
+levantado (p. ej. gunicorn con workers gevent) y la base que use ese servidor.
+Uso (desde la raíz del repo):
+    python -m bench.endpoints [--url http://127.0.0.1:8000] [--base reporte_bench]
+        [--peticiones 200] [--concurrencia 8] [--escrituras 50] [--json resultados.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import generar, resultados
+
+# `cuerpo` es None o una función del número de pedido que retorna (bytes, content-type)
+Peticion = namedtuple('Peticion', 'nombre metodo ruta cuerpo condicional')
+Respuesta = namedtuple('Respuesta', 'estado cabeceras datos')
+
+MARCA_BENCH = 'ZB9'
+
+
+class ClienteFlask:
+    """Pedidos a la app en este proceso; un cliente de pruebas por hilo."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def pedir(self, metodo, ruta, datos=None, tipo=None, cabeceras=None):
+        cliente = getattr(self._local, 'cliente', None)
+        if cliente is None:
+            cliente = self._local.cliente = self.app.test_client()
+        respuesta = cliente.open(ruta, method=metodo, data=datos, content_type=tipo, headers=cabeceras or {})
+        try:
+            return Respuesta(respuesta.status_code, dict(respuesta.headers), respuesta.get_data())
+        finally:
+            respuesta.close()
+
+
+class ClienteHTTP:
+    """Pedidos a un servidor levantado en `url`."""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def pedir(self, metodo, ruta, datos=None, tipo=None, cabeceras=None):
+        cabeceras = dict(cabeceras or {})
+        if tipo:
+            cabeceras['Content-Type'] = tipo
+        pedido = urllib.request.Request(self.url + ruta, data=datos, headers=cabeceras, method=metodo)
+        try:
+            with urllib.request.urlopen(pedido, timeout=120) as respuesta:
+                return Respuesta(respuesta.status, dict(respuesta.headers), respuesta.read())
+        except urllib.error.HTTPError as err:
+            return Respuesta(err.code, dict(err.headers), err.read())
+
+
+def _json(respuesta):
+    try:
+        return json.loads(respuesta.datos)
+    except ValueError:
+        return None
+
+
+def _q(ruta, **parametros):
+    return f"{ruta}?{urllib.parse.urlencode(parametros)}" if parametros else ruta
+
+
+def descubrir(cliente):
+    """Arma las peticiones de lectura con valores que existen en la base."""
+    lecturas = [
+        ('/', False), ('/reporte', True), ('/api/reporte/resumen', True), ('/api/reporte/categorias', True),
+        ('/ventas-grafico', True), ('/metrics', False),
+        (_q('/api/series', granularidad='mes'), True),
+        (_q('/api/series', granularidad='semana', por='vendedor', metricas='importe_soles,tickets'), True),
+        (_q('/api/series', granularidad='mes', por='categoria,marca', metricas='cantidad,importe_soles'), True),
+        (_q('/ventas', limit=100), True),
+        (_q('/ventas', limit=100, orden='importe_soles', dir='asc'), True),
+        (_q('/ventas', limit=100, orden='cliente'), True),
+    ]
+    categorias = _json(cliente.pedir('GET', '/api/reporte/categorias')) or []
+    if categorias:
+        cat = categorias[0]
+        lecturas.append((f"/api/reporte/categorias/{urllib.parse.quote(cat, safe='')}/marcas", True))
+        marcas = _json(cliente.pedir('GET', lecturas[-1][0])) or []
+        if marcas:
+            marca = marcas[0]
+            lecturas.append((f"/api/reporte/categorias/{urllib.parse.quote(cat, safe='')}/marcas/"
+                             f"{urllib.parse.quote(marca, safe='')}/productos", True))
+            productos = _json(cliente.pedir('GET', lecturas[-1][0])) or []
+            if productos:
+                lecturas.append((_q('/api/reporte/series', cat=cat, marca=marca, producto=productos[0]), True))
+        lecturas.append((_q('/api/series', granularidad='dia', categoria=cat, por='vendedor'), True))
+
+    pagina = _json(cliente.pedir('GET', _q('/ventas', limit=100))) or {}
+    ventas = pagina.get('ventas') or []
+    if pagina.get('siguiente'):
+        lecturas.append((_q('/ventas', limit=100, cursor=pagina['siguiente']), True))
+    if ventas:
+        venta = ventas[0]
+        lecturas.append((f"/ventas/{venta['id_venta']}", True))
+        if venta.get('doc_cliente'):
+            lecturas.append((_q('/ventas', q=venta['doc_cliente'], limit=100), True))
+        palabra = max((venta.get('articulos') or '').split(), key=len, default='')
+        if palabra:
+            lecturas.append((_q('/ventas', q=palabra, limit=100), True))
+        # Un mes de ventas para las exportaciones
+        hasta = venta['fecha']
+        desde = hasta[:8] + '01'
+        for formato in ('csv', 'xlsx', 'parquet'):
+            lecturas.append((_q('/export', format=formato, desde=desde, hasta=hasta), True))
+    return [Peticion(f"GET {ruta}", 'GET', ruta, None, condicional) for ruta, condicional in lecturas], ventas
+
+
+def medir(cliente, peticion, total, concurrencia, cabeceras=None, calentamiento=2):
+    """Lanza `total` pedidos desde `concurrencia` hilos y resume las latencias."""
+    def uno(i):
+        datos, tipo = peticion.cuerpo(i) if peticion.cuerpo else (None, None)
+        inicio = time.perf_counter()
+        respuesta = cliente.pedir(peticion.metodo, peticion.ruta, datos, tipo, cabeceras)
+        return time.perf_counter() - inicio, respuesta.estado
+
+    for i in range(calentamiento):
+        uno(-1 - i)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as ejecutor:
+        medidas = list(ejecutor.map(uno, range(total)))
+    segundos = time.perf_counter() - inicio
+    latencias = [latencia for latencia, _ in medidas]
+    estados = Counter(str(estado) for _, estado in medidas)
+    return dict(resultados.percentiles(latencias), peticiones=total, concurrencia=concurrencia,
+                peticiones_por_segundo=round(total / max(segundos, 1e-9), 1), estados=dict(estados))
+
+
+def _venta_sintetica(plantilla, marca, i, **cambios):
+    venta = {clave: plantilla.get(clave) for clave in
+             ('fecha', 'documento', 'medio_pago', 'doc_cliente', 'cliente', 'telefono', 'vendedor')}
+    venta.update(nro_doc=f"{MARCA_BENCH}-{marca}-{i:06d}",
+                 items=[{"articulos": plantilla['articulos'], "cantidad": 1,
+                         "importe_soles": float(plantilla.get('importe_soles') or 10)}])
+    venta.update(cambios)
+    return json.dumps(venta).encode('utf-8'), 'application/json'
+
+
+def medir_escrituras(cliente, plantilla, total, concurrencia):
+    """Agrega `total` ventas marcadas, las edita y las elimina."""
+    marca = f"{random.randrange(10**5):05d}"
+    salida = {}
+    salida['POST /agregar-venta'] = medir(cliente, Peticion(
+        'agregar', 'POST', '/agregar-venta', lambda i: _venta_sintetica(plantilla, marca, i), False),
+        total, concurrencia, calentamiento=0)
+    pagina = _json(cliente.pedir('GET', _q('/ventas', q=f"{MARCA_BENCH}-{marca}-", limit=0))) or {}
+    ids = sorted({venta['id_venta'] for venta in pagina.get('ventas') or []})
+    if not ids:
+        print("ERROR: No se encontraron las ventas agregadas; se omiten editar y eliminar.")
+        return salida
+
+    def editar(i):
+        return _venta_sintetica(plantilla, marca, i, id_venta=ids[i % len(ids)], medio_pago='EFECTIVO')
+
+    def eliminar(i):
+        return json.dumps({"id_venta": ids[i]}).encode('utf-8'), 'application/json'
+
+    salida['POST /editar-venta'] = medir(cliente, Peticion('editar', 'POST', '/editar-venta', editar, False),
+                                         len(ids), concurrencia, calentamiento=0)
+    salida['POST /eliminar-venta'] = medir(cliente, Peticion('eliminar', 'POST', '/eliminar-venta', eliminar, False),
+                                           len(ids), concurrencia, calentamiento=0)
+    return salida
+
+
+def medir_importacion(cliente, lineas=1000, espera=600):
+    """Sube un export sintético pequeño (modo incremental) y mide la respuesta
+    202 y el tiempo hasta que la importación termina."""
+    ruta = os.path.join(tempfile.gettempdir(), f"bench_importar_{lineas}.csv")
+    generar.Generador(generar.Modelo(), semilla=random.randrange(10**6)).escribir(ruta, lineas)
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    os.remove(ruta)
+    inicio = time.perf_counter()
+    respuesta = cliente.pedir('POST', _q('/importar', modo='incremental', nombre='bench.csv'), datos, 'text/csv')
+    aceptada = time.perf_counter() - inicio
+    cuerpo = _json(respuesta) or {}
+    medida = {"estado_http": respuesta.estado, "respuesta_ms": round(aceptada * 1000, 3), "lineas": lineas}
+    if respuesta.estado != 202:
+        return medida
+    consultas = []
+    estado = {}
+    while time.perf_counter() - inicio < espera:
+        antes = time.perf_counter()
+        estado = _json(cliente.pedir('GET', cuerpo['estado'])) or {}
+        consultas.append(time.perf_counter() - antes)
+        if estado.get('estado') in ('completado', 'error'):
+            break
+        time.sleep(0.2)
+    medida.update(estado=estado.get('estado'), total_segundos=round(time.perf_counter() - inicio, 3),
+                  consulta_estado=resultados.percentiles(consultas))
+    return medida
+
+
+def ejecutar(cliente, peticiones=200, concurrencia=8, escrituras=50, importar=True):
+    lecturas, ventas = descubrir(cliente)
+    salida = {}
+    for peticion in lecturas:
+        medida = medir(cliente, peticion, peticiones, concurrencia)
+        salida[peticion.nombre] = medida
+        print(f"INFO: {peticion.nombre[:70]:<70} p50 {medida['p50_ms']:>9.2f} ms  "
+              f"p99 {medida['p99_ms']:>9.2f} ms  {medida['peticiones_por_segundo']:>8.1f}/s")
+        if peticion.condicional:
+            etag = cliente.pedir('GET', peticion.ruta).cabeceras.get('ETag')
+            if etag:
+                salida[peticion.nombre + ' (304)'] = medir(cliente, peticion, peticiones, concurrencia,
+                                                           {'If-None-Match': etag})
+    if ventas and escrituras:
+        plantilla = _json(cliente.pedir('GET', f"/ventas/{ventas[0]['id_venta']}")) or ventas[0]
+        salida.update(medir_escrituras(cliente, plantilla, escrituras, concurrencia))
+    if importar:
+        salida['POST /importar'] = medir_importacion(cliente)
+    return salida
+
+
+def cliente_local(base):
+    """Cliente de pruebas de la app apuntando a la base `base`."""
+    import conexiones
+    conexiones.DB_CONFIG['database'] = base
+    import app
+    return ClienteFlask(app.app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="servidor a medir; sin --url se usa el cliente de pruebas de Flask")
+    parser.add_argument('--base', default='reporte_bench', help="base de datos (solo sin --url)")
+    parser.add_argument('--peticiones', type=int, default=200, help="pedidos por ruta")
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--escrituras', type=int, default=50, help="ventas a agregar, editar y eliminar (0 = ninguna)")
+    parser.add_argument('--sin-importar', action='store_true', help="no mide /importar")
+    parser.add_argument('--json', help="archivo de resultados (por defecto bench/resultados/endpoints-<commit>.json)")
+    args = parser.parse_args()
+
+    cliente = ClienteHTTP(args.url) if args.url else cliente_local(args.base)
+    if cliente.pedir('GET', '/ventas?limit=1').estado != 200:
+        print("ERROR: La app no responde /ventas; revise la base de datos o --url.")
+        sys.exit(1)
+    medidas = ejecutar(cliente, args.peticiones, args.concurrencia, args.escrituras, not args.sin_importar)
+    resultados.guardar({"endpoints": medidas}, args.json or resultados.ruta_por_defecto('endpoints'),
+                       {"url": args.url, "base": None if args.url else args.base,
+                        "peticiones": args.peticiones, "concurrencia": args.concurrencia,
+                        "escrituras": args.escrituras, "analitica_memoria": os.environ.get('ANALITICA_MEMORIA')})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Generador de ventas sintéticas con el formato de Lista_Ventas_Detalle.csv.
+
+Toma como modelo un export real: remuestrea sus documentos completos, así
+conserva la distribución de líneas por documento, de artículos (y qué
+artículos se venden juntos), de vendedores, medios de pago y tipos de
+documento, y de cantidades e importes. Sobre cada documento muestreado:
+- la fecha se reparte en el rango pedido, en orden descendente como el export;
+- el número de documento sigue la serie de su tipo (002-, B003-, ...);
+- el cliente es uno ya generado o, con la proporción de clientes nuevos
+  del modelo, uno nuevo con DNI o RUC sintético;
+- los artículos con número de serie (" /U67686C5H577298") reciben una
+  serie nueva, así los productos distintos crecen como en un export real.
+Con la misma semilla el archivo es idéntico byte a byte.
+Uso (desde la raíz del repo):
+    python -m bench.generar 100000 [--salida archivo.csv] [--semilla 42] [--desde 2020-01-01 --hasta 2025-07-31]
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import string
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+import migrar_datos
+
+DIRECTORIO = os.path.join('bench', 'datos')
+ESCALAS = (10_000, 100_000, 1_000_000, 10_000_000)
+
+# Número de serie al final del nombre del artículo (así lo agrupa canonicos.py)
+PATRON_SERIE = re.compile(r'(\s/\s*)([A-Z0-9]{6,})$')
+ALFABETO_SERIE = string.ascii_uppercase + string.digits
+
+# Posición de cada columna del export en un registro sin '#'
+INDICE = {columna: i for i, columna in enumerate(migrar_datos.COLUMNAS_CSV)}
+
+
+class Modelo:
+    """Distribuciones de un export real."""
+
+    def __init__(self, archivo=migrar_datos.ARCHIVO):
+        with open(archivo, newline='', encoding='utf-8') as f:
+            lector = csv.reader(f)
+            self.cabecera = next(lector)
+            self.titulos = next(lector)
+            registros = [fila[1:] for fila in lector if len(fila) == len(migrar_datos.COLUMNAS_CSV) + 1]
+
+        documentos = {}
+        for fila in registros:
+            if not all(fila[INDICE[c]] for c in migrar_datos.COLUMNAS_REQUERIDAS) or not _fecha(fila[INDICE['fecha']]):
+                continue
+            clave = (fila[INDICE['documento']], fila[INDICE['nro_doc']])
+            documentos.setdefault(clave, []).append(fila)
+        self.documentos = list(documentos.values())
+
+        # Serie más usada por tipo de documento (002-000937 -> '002')
+        series = defaultdict(Counter)
+        for (documento, nro_doc) in documentos:
+            series[documento][nro_doc.split('-')[0]] += 1
+        self.series = {documento: contador.most_common(1)[0][0] for documento, contador in series.items()}
+
+        clientes = {}
+        for filas in self.documentos:
+            fila = filas[0]
+            clientes.setdefault(fila[INDICE['doc_cliente']], (fila[INDICE['cliente']], fila[INDICE['telefono']]))
+        self.clientes = list(clientes.items())
+        self.proporcion_clientes_nuevos = len(clientes) / max(len(self.documentos), 1)
+        largos = Counter(len(doc) for doc in clientes if doc.isdigit())
+        self.proporcion_ruc = largos[11] / max(sum(largos.values()), 1)
+
+        fechas = [_fecha(filas[0][INDICE['fecha']]) for filas in self.documentos]
+        self.desde, self.hasta = min(fechas), max(fechas)
+        self.lineas = sum(len(filas) for filas in self.documentos)
+
+
+def _fecha(texto):
+    try:
+        dia, mes, anio = texto.split('/')
+        return date(int(anio), int(mes), int(dia))
+    except ValueError:
+        return None
+
+
+class Generador:
+    """Produce los registros (sin '#') de `lineas` líneas de venta."""
+
+    def __init__(self, modelo, semilla=42, desde=None, hasta=None, proporcion_clientes_nuevos=None):
+        self.modelo = modelo
+        self.azar = random.Random(semilla)
+        self.desde = desde or modelo.desde
+        self.hasta = hasta or modelo.hasta
+        self.proporcion_clientes_nuevos = (modelo.proporcion_clientes_nuevos
+                                           if proporcion_clientes_nuevos is None else proporcion_clientes_nuevos)
+        self.numeros = Counter()
+        self.clientes = list(modelo.clientes)
+        self._dni = 40_000_000
+        self._ruc = 20_600_000_000
+
+    def _cliente(self):
+        if self.azar.random() >= self.proporcion_clientes_nuevos:
+            return self.azar.choice(self.clientes)
+        _, (nombre, telefono) = self.azar.choice(self.modelo.clientes)
+        if self.azar.random() < self.modelo.proporcion_ruc:
+            self._ruc += 1
+            doc = str(self._ruc)
+        else:
+            self._dni += 1
+            doc = str(self._dni)
+        cliente = (doc, (nombre, telefono))
+        self.clientes.append(cliente)
+        return cliente
+
+    def _articulo(self, nombre):
+        coincidencia = PATRON_SERIE.search(nombre)
+        if not coincidencia:
+            return nombre
+        serie = ''.join(self.azar.choice(ALFABETO_SERIE) for _ in coincidencia.group(2))
+        return nombre[:coincidencia.start(2)] + serie
+
+    def registros(self, lineas):
+        # Documentos promedio del modelo para repartir las fechas en el rango
+        por_documento = self.modelo.lineas / len(self.modelo.documentos)
+        total_documentos = max(1, round(lineas / por_documento))
+        dias = (self.hasta - self.desde).days
+        emitidas = 0
+        i = 0
+        while emitidas < lineas:
+            plantilla = self.azar.choice(self.modelo.documentos)
+            fecha = self.hasta - timedelta(days=min(dias, int(dias * i / total_documentos)))
+            i += 1
+            documento = plantilla[0][INDICE['documento']]
+            serie = self.modelo.series.get(documento, '001')
+            self.numeros[serie] += 1
+            nro_doc = f"{serie}-{self.numeros[serie]:06d}"
+            doc_cliente, (cliente, telefono) = self._cliente()
+            for fila in plantilla[:lineas - emitidas]:
+                nueva = list(fila)
+                nueva[INDICE['fecha']] = fecha.strftime(migrar_datos.FORMATO_FECHA)
+                nueva[INDICE['nro_doc']] = nro_doc
+                nueva[INDICE['doc_cliente']] = doc_cliente
+                nueva[INDICE['cliente']] = cliente
+                nueva[INDICE['telefono']] = telefono
+                nueva[INDICE['articulos']] = self._articulo(fila[INDICE['articulos']])
+                emitidas += 1
+                yield nueva
+
+    def escribir(self, ruta, lineas):
+        """Escribe el CSV completo (encabezado del export incluido)."""
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        cabecera = list(self.modelo.cabecera)
+        cabecera[0] = re.sub(r'\d{2}/\d{2}/\d{4} - \d{2}/\d{2}/\d{4}',
+                             f"{self.desde:%d/%m/%Y} - {self.hasta:%d/%m/%Y}", cabecera[0])
+        with open(ruta, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f, quoting=csv.QUOTE_ALL)
+            escritor.writerow(cabecera)
+            escritor.writerow(self.modelo.titulos)
+            escritor.writerows([n] + fila for n, fila in enumerate(self.registros(lineas), 1))
+        return ruta
+
+
+def ruta_por_defecto(lineas, semilla=42):
+    return os.path.join(DIRECTORIO, f"ventas_{lineas}_s{semilla}.csv")
+
+
+def generar(lineas, semilla=42, modelo=None):
+    """Genera bench/datos/ventas_<lineas>_s<semilla>.csv si no existe y retorna
+    su ruta; con la misma semilla el contenido es el mismo."""
+    ruta = ruta_por_defecto(lineas, semilla)
+    if os.path.exists(ruta):
+        return ruta
+    inicio = time.perf_counter()
+    # Se escribe aparte y se renombra: un archivo a medias no se reutiliza
+    Generador(modelo or Modelo(), semilla).escribir(ruta + '.tmp', lineas)
+    os.replace(ruta + '.tmp', ruta)
+    segundos = time.perf_counter() - inicio
+    print(f"INFO: {lineas} líneas generadas en {ruta} ({segundos:.1f} s).")
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('lineas', type=int, help=f"líneas de venta a generar (p. ej. {', '.join(map(str, ESCALAS))})")
+    parser.add_argument('--salida', help="archivo CSV (por defecto bench/datos/ventas_<lineas>_s<semilla>.csv)")
+    parser.add_argument('--modelo', default=migrar_datos.ARCHIVO, help="export real del que se toman las distribuciones")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--desde', type=date.fromisoformat, help="primera fecha (por defecto la del modelo)")
+    parser.add_argument('--hasta', type=date.fromisoformat, help="última fecha (por defecto la del modelo)")
+    parser.add_argument('--clientes-nuevos', type=float,
+                        help="proporción de documentos con un cliente nuevo (por defecto la del modelo)")
+    args = parser.parse_args()
+
+    modelo = Modelo(args.modelo)
+    ruta = args.salida or ruta_por_defecto(args.lineas, args.semilla)
+    inicio = time.perf_counter()
+    Generador(modelo, args.semilla, args.desde, args.hasta, args.clientes_nuevos).escribir(ruta, args.lineas)
+    segundos = time.perf_counter() - inicio
+    print(f"ÉXITO: {args.lineas} líneas escritas en {ruta} en {segundos:.1f} s "
+          f"({args.lineas / max(segundos, 1e-9):,.0f} líneas/s; modelo de {modelo.lineas} líneas, "
+          f"{len(modelo.documentos)} documentos).")
+
+
+if __name__ == '__main__':
+    main()
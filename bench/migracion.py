@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de la migración del CSV a MySQL/MariaDB (migrar_datos.py).
+
+Por cada archivo y modo (bulk, streaming, incremental) recrea una base de
+prueba vacía con el esquema actual (esquema.py), carga el archivo y mide
+filas por segundo de la carga y el tiempo de `finalizar_migracion` (índice
+de búsqueda, resúmenes y productos canónicos), que el modo incremental
+hace sobre la marcha.
+La base se BORRA en cada corrida: su nombre debe contener "bench". El
+servidor y el usuario salen de DATABASE_URL (o de la configuración local
+de conexiones.py).
+Uso (desde la raíz del repo):
+    python -m bench.migracion [archivo.csv ...] [--lineas 10000 100000] [--modos bulk streaming]
+        [--base reporte_bench] [--workers 1] [--json resultados.json]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import mysql.connector
+
+import esquema
+import migrar_datos
+from conexiones import DB_CONFIG
+
+from bench import generar, resultados
+
+MODOS = ('bulk', 'streaming', 'incremental')
+BASE = 'reporte_bench'
+
+
+def verificar_base(base):
+    if 'bench' not in base:
+        raise ValueError(f"La base '{base}' se borra en cada corrida; use un nombre que contenga 'bench'.")
+
+
+def recrear_base(base):
+    """Borra y crea la base de prueba y le aplica el esquema. Retorna la conexión."""
+    verificar_base(base)
+    config = {clave: valor for clave, valor in DB_CONFIG.items() if clave != 'database'}
+    servidor = mysql.connector.connect(**config)
+    try:
+        cursor = servidor.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{base}`")
+        cursor.execute(f"CREATE DATABASE `{base}` CHARACTER SET utf8mb4")
+        cursor.close()
+    finally:
+        servidor.close()
+    conn = mysql.connector.connect(**dict(config, database=base))
+    with contextlib.redirect_stdout(io.StringIO()):
+        esquema.migrar(conn)
+    return conn
+
+
+def medir_carga(archivo, modo, base=BASE, lote=1000, filas_por_bloque=20000, workers=1):
+    """Carga `archivo` en una base vacía con `modo` y retorna las medidas."""
+    conn = recrear_base(base)
+    medida = {}
+    try:
+        # Los mensajes por bloque de migrar_datos no cuentan en la medida
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            if modo == 'bulk':
+                df_ventas = migrar_datos.leer_csv(archivo)
+                medida['lectura_segundos'] = round(time.perf_counter() - inicio, 3)
+                migrar_datos.migrar_bulk(conn, df_ventas, lote)
+                conn.commit()
+                filas = len(df_ventas)
+            elif modo == 'streaming':
+                filas = migrar_datos.migrar_streaming(conn, archivo, filas_por_bloque, lote,
+                                                      reiniciar=True, workers=workers)
+            else:
+                filas, _ = migrar_datos.migrar_incremental(conn, archivo, lote=lote)
+            carga = time.perf_counter() - inicio
+            if modo != 'incremental':
+                inicio = time.perf_counter()
+                migrar_datos.finalizar_migracion(conn)
+                medida['finalizar_segundos'] = round(time.perf_counter() - inicio, 3)
+        medida.update({
+            "filas": filas,
+            "carga_segundos": round(carga, 3),
+            "filas_por_segundo": round(filas / max(carga, 1e-9), 1),
+            "total_segundos": round(carga + medida.get('finalizar_segundos', 0), 3),
+        })
+        return medida
+    finally:
+        conn.close()
+
+
+def ejecutar(archivos, modos=MODOS, base=BASE, repeticiones=1, **opciones):
+    """{archivo: {modo: medida}}; con varias repeticiones se queda la más rápida."""
+    salida = {}
+    for archivo in archivos:
+        nombre = os.path.splitext(os.path.basename(archivo))[0]
+        for modo in modos:
+            corridas = [medir_carga(archivo, modo, base, **opciones) for _ in range(repeticiones)]
+            mejor = min(corridas, key=lambda m: m['total_segundos'])
+            salida.setdefault(nombre, {})[modo] = mejor
+            print(f"INFO: {nombre} {modo:<11} {mejor['filas']:>9} filas  "
+                  f"{mejor['filas_por_segundo']:>10,.0f} filas/s  total {mejor['total_segundos']:.2f} s")
+    return salida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archivos', nargs='*', help="exports a cargar (por defecto los generados con --lineas)")
+    parser.add_argument('--lineas', type=int, nargs='+', default=[10_000],
+                        help="escalas a generar con bench.generar si no se indican archivos")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--base', default=BASE, help="base de prueba (se borra y se crea en cada corrida)")
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--bloque', type=int, default=20000, help="registros por bloque en modo streaming")
+    parser.add_argument('--workers', type=int, default=1, help="procesos de clasificación en modo streaming")
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--json', help="archivo de resultados (por defecto bench/resultados/migracion-<commit>.json)")
+    args = parser.parse_args()
+
+    try:
+        verificar_base(args.base)
+    except ValueError as err:
+        print(f"ERROR: {err}")
+        sys.exit(2)
+    archivos = args.archivos or [generar.generar(n, args.semilla) for n in args.lineas]
+    try:
+        medidas = ejecutar(archivos, args.modos, args.base, args.repeticiones, lote=args.lote,
+                           filas_por_bloque=args.bloque, workers=args.workers)
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    resultados.guardar({"migracion": medidas}, args.json or resultados.ruta_por_defecto('migracion'),
+                       {"modos": args.modos, "lote": args.lote, "bloque": args.bloque, "workers": args.workers,
+                        "base": args.base, "archivos": archivos})
+
+
+if __name__ == '__main__':
+    main()
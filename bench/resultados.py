@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Resultados de los benchmarks en JSON y comparación entre commits.
+
+Cada archivo lleva `metadatos` (commit, fecha, máquina, versiones) y
+`resultados`, un diccionario anidado de métricas numéricas. `comparar`
+aplana los dos archivos y marca como regresión los cambios mayores que el
+umbral: los tiempos (`*_segundos`, `*_ms`, `*_us_fila`) deben bajar y las
+tasas (`*_por_segundo`) deben subir.
+Uso (desde la raíz del repo):
+    python -m bench.resultados base.json nuevo.json [--umbral 10]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+DIRECTORIO = os.path.join('bench', 'resultados')
+
+SUFIJOS_MENOR_ES_MEJOR = ('_segundos', '_ms', '_us_fila')
+SUFIJOS_MAYOR_ES_MEJOR = ('_por_segundo', 'aceleracion')
+
+
+def _git(*args):
+    try:
+        return subprocess.run(('git',) + args, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos(parametros=None):
+    """Contexto de la corrida, para no comparar resultados de máquinas distintas."""
+    versiones = {}
+    for modulo in ('pandas', 'numpy', 'pyarrow', 'flask', 'mysql.connector'):
+        try:
+            versiones[modulo] = __import__(modulo, fromlist=['__version__']).__version__
+        except ImportError:
+            versiones[modulo] = None
+    return {
+        "commit": _git('rev-parse', 'HEAD'),
+        "cambios_sin_commit": bool(_git('status', '--porcelain', '--untracked-files=no')),
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "versiones": versiones,
+        "parametros": parametros or {},
+    }
+
+
+def percentiles(muestras):
+    """p50/p95/p99, media y máximo en milisegundos de una lista de segundos
+    (percentil por rango más cercano)."""
+    if not muestras:
+        return {}
+    ordenadas = sorted(muestras)
+    n = len(ordenadas)
+
+    def p(q):
+        return ordenadas[max(0, math.ceil(q * n) - 1)] * 1000
+
+    return {"p50_ms": round(p(0.50), 3), "p95_ms": round(p(0.95), 3), "p99_ms": round(p(0.99), 3),
+            "media_ms": round(sum(ordenadas) / n * 1000, 3), "max_ms": round(ordenadas[-1] * 1000, 3)}
+
+
+def ruta_por_defecto(nombre):
+    """bench/resultados/<nombre>-<commit corto>.json"""
+    commit = (_git('rev-parse', '--short', 'HEAD') or 'sin-git')
+    return os.path.join(DIRECTORIO, f"{nombre}-{commit}.json")
+
+
+def guardar(resultados, ruta, parametros=None):
+    """Escribe {metadatos, resultados} en `ruta` y la retorna."""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({"metadatos": metadatos(parametros), "resultados": resultados}, f,
+                  ensure_ascii=False, indent=2)
+    print(f"INFO: Resultados guardados en {ruta}.")
+    return ruta
+
+
+def aplanar(datos, prefijo=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}; solo los valores numéricos."""
+    plano = {}
+    if isinstance(datos, dict):
+        for clave, valor in datos.items():
+            plano.update(aplanar(valor, f"{prefijo}.{clave}" if prefijo else str(clave)))
+    elif isinstance(datos, list):
+        for i, valor in enumerate(datos):
+            plano.update(aplanar(valor, f"{prefijo}[{i}]"))
+    elif isinstance(datos, (int, float)) and not isinstance(datos, bool):
+        plano[prefijo] = datos
+    return plano
+
+
+def sentido(metrica):
+    """-1 si menor es mejor, 1 si mayor es mejor, 0 si no se compara."""
+    hoja = metrica.rsplit('.', 1)[-1]
+    if hoja.endswith(SUFIJOS_MENOR_ES_MEJOR):
+        return -1
+    if hoja.endswith(SUFIJOS_MAYOR_ES_MEJOR):
+        return 1
+    return 0
+
+
+def comparar(base, nuevo, umbral=10.0):
+    """Lista de (métrica, base, nuevo, cambio %, es_regresion) de las métricas comparables."""
+    plano_base = aplanar(base.get('resultados', base))
+    plano_nuevo = aplanar(nuevo.get('resultados', nuevo))
+    filas = []
+    for metrica in sorted(set(plano_base) & set(plano_nuevo)):
+        direccion = sentido(metrica)
+        antes, despues = plano_base[metrica], plano_nuevo[metrica]
+        if not direccion or not antes:
+            continue
+        cambio = (despues - antes) / abs(antes) * 100
+        filas.append((metrica, antes, despues, cambio, -direccion * cambio > umbral))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dos archivos de resultados de bench/.")
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=10.0, help="porcentaje de empeoramiento tolerado")
+    parser.add_argument('--todas', action='store_true', help="muestra también las métricas sin regresión")
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+    commits = [d.get('metadatos', {}).get('commit') or '?' for d in (base, nuevo)]
+    print(f"Base {commits[0][:10]} -> nuevo {commits[1][:10]} (umbral {args.umbral:g} %)")
+    filas = comparar(base, nuevo, args.umbral)
+    regresiones = 0
+    for metrica, antes, despues, cambio, es_regresion in filas:
+        regresiones += es_regresion
+        if es_regresion or args.todas:
+            marca = 'REGRESIÓN' if es_regresion else ''
+            print(f"{metrica:<70} {antes:>14.3f} {despues:>14.3f} {cambio:>+8.1f} % {marca}")
+    if regresiones:
+        print(f"ERROR: {regresiones} de {len(filas)} métricas empeoraron más de {args.umbral:g} %.")
+        sys.exit(1)
+    print(f"OK: ninguna de las {len(filas)} métricas empeoró más de {args.umbral:g} %.")
+
+
+if __name__ == '__main__':
+    main()
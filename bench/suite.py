@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Suite completa de benchmarks en un solo JSON.
+
+1. Genera (o reutiliza) los exports sintéticos de cada escala (bench.generar).
+2. Costo por fila de la clasificación en cada escala (bench.clasificacion).
+3. Carga de cada escala en los modos de migración (bench.migracion).
+4. Latencias de todas las rutas sobre la mayor escala (bench.endpoints).
+Los pasos 3 y 4 necesitan un servidor MySQL/MariaDB (DATABASE_URL o el
+local); con --sin-base, o si no hay servidor, se omiten.
+Uso (desde la raíz del repo):
+    python -m bench.suite [--lineas 10000 100000 1000000] [--base reporte_bench] [--json resultados.json]
+Para comparar dos commits: python -m bench.resultados base.json nuevo.json
+"""
+import argparse
+
+import mysql.connector
+
+import migrar_datos
+
+from bench import clasificacion, endpoints, generar, migracion, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lineas', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=3, help="repeticiones de la clasificación")
+    parser.add_argument('--modos', nargs='+', choices=migracion.MODOS, default=list(migracion.MODOS))
+    parser.add_argument('--base', default=migracion.BASE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--escrituras', type=int, default=50)
+    parser.add_argument('--sin-base', action='store_true', help="solo generación y clasificación")
+    parser.add_argument('--json', help="archivo de resultados (por defecto bench/resultados/suite-<commit>.json)")
+    args = parser.parse_args()
+
+    # De menor a mayor: la última carga deja en la base la escala mayor para las rutas
+    escalas = sorted(set(args.lineas))
+    archivos = [generar.generar(n, args.semilla) for n in escalas]
+    salida = {"clasificacion": {}}
+    for n, archivo in zip(escalas, archivos):
+        articulos = migrar_datos.leer_csv(archivo)['articulos']
+        medida, diferencias = clasificacion.ejecutar(articulos, args.repeticiones)
+        salida["clasificacion"][str(n)] = medida
+        print(f"INFO: clasificación {n}: referencia {medida['referencia_us_fila']:.2f} µs/fila, "
+              f"motor {medida['motor_us_fila']:.2f} µs/fila")
+        if diferencias:
+            print(f"ERROR: {len(diferencias)} filas de {n} no coinciden con la referencia.")
+
+    if not args.sin_base:
+        try:
+            salida["migracion"] = migracion.ejecutar(archivos, args.modos, args.base, workers=args.workers)
+            cliente = endpoints.cliente_local(args.base)
+            salida["endpoints"] = endpoints.ejecutar(cliente, args.peticiones, args.concurrencia, args.escrituras)
+        except mysql.connector.Error as err:
+            print(f"ERROR: Sin base de datos, se omiten la migración y las rutas: {err}")
+
+    resultados.guardar(salida, args.json or resultados.ruta_por_defecto('suite'), {
+        "lineas": escalas, "semilla": args.semilla, "modos": args.modos, "base": args.base,
+        "workers": args.workers, "peticiones": args.peticiones, "concurrencia": args.concurrencia,
+        "escrituras": args.escrituras})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Índice de búsqueda de ventas.
+
+Mantiene la tabla `busqueda_ventas` (una fila por venta) con el texto de
+cliente, artículos, documento y vendedor ya normalizado (minúsculas y sin
+tildes) bajo un índice FULLTEXT, más `doc_cliente` y `nro_doc` indexados
+para las búsquedas exactas o por prefijo de documentos.
+Uso: python busqueda.py crear | reconstruir
+"""
+import re
+import sys
+import unicodedata
+
+import mysql.connector
+
+
+DDL_BUSQUEDA = """
+CREATE TABLE IF NOT EXISTS busqueda_ventas (
+  id_venta INTEGER NOT NULL PRIMARY KEY,
+  doc_cliente VARCHAR(50),
+  nro_doc VARCHAR(50),
+  texto TEXT NOT NULL,
+  KEY idx_busqueda_doc_cliente (doc_cliente),
+  KEY idx_busqueda_nro_doc (nro_doc),
+  FULLTEXT KEY ft_busqueda_texto (texto)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# innodb_ft_min_token_size: las palabras más cortas no entran al índice FULLTEXT
+LONGITUD_MINIMA_TOKEN = 3
+
+# Números de documento: RUC/DNI (solo dígitos) o series como 002-000937 / E001-176
+PATRON_DOCUMENTO = re.compile(r'^[a-z]{0,2}\d[\d-]*$')
+
+# Relevancia base de las coincidencias por documento, por encima de los
+# puntajes de MATCH ... AGAINST
+RELEVANCIA_DOCUMENTO = 1000
+
+CONSULTA_TEXTO_VENTA = """
+SELECT
+    v.id_venta, v.documento, v.nro_doc, v.vendedor,
+    c.doc_cliente, c.cliente,
+    GROUP_CONCAT(p.nombre_original SEPARATOR ' ') AS articulos
+FROM ventas v
+JOIN clientes c ON v.id_cliente = c.id_cliente
+LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+LEFT JOIN productos p ON dv.id_producto = p.id_producto
+"""
+
+
+def normalizar(texto):
+    """Pasa a minúsculas, quita tildes y deja solo letras, dígitos y espacios."""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+    texto = re.sub(r'[^a-z0-9]+', ' ', texto)
+    return texto.strip()
+
+
+def _fila_indice(fila):
+    """Construye la tupla (id_venta, doc_cliente, nro_doc, texto) de una venta."""
+    partes = [fila['cliente'], fila['doc_cliente'], fila['articulos'],
+              fila['documento'], fila['nro_doc'], fila['vendedor']]
+    texto = ' '.join(normalizar(p) for p in partes if p)
+    return (fila['id_venta'], fila['doc_cliente'], fila['nro_doc'], texto)
+
+
+def indexar_venta(conn, id_venta):
+    """Actualiza la entrada de una venta. Debe llamarse con la conexión de la
+    misma transacción que la modificó, para que índice y datos no diverjan."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(CONSULTA_TEXTO_VENTA + " WHERE v.id_venta = %s GROUP BY v.id_venta", (id_venta,))
+        fila = cursor.fetchone()
+        if fila is None:
+            cursor.execute("DELETE FROM busqueda_ventas WHERE id_venta = %s", (id_venta,))
+            return
+        cursor.execute(
+            "REPLACE INTO busqueda_ventas (id_venta, doc_cliente, nro_doc, texto) VALUES (%s, %s, %s, %s)",
+            _fila_indice(fila)
+        )
+    finally:
+        cursor.close()
+
+
+def indexar_ventas(conn, ids):
+    """Como indexar_venta, para varias ventas recién insertadas a la vez: una
+    sola lectura y un solo REPLACE por lotes."""
+    if not ids:
+        return
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            CONSULTA_TEXTO_VENTA + f" WHERE v.id_venta IN ({', '.join(['%s'] * len(ids))}) GROUP BY v.id_venta",
+            tuple(ids)
+        )
+        filas = [_fila_indice(f) for f in cursor.fetchall()]
+        if filas:
+            cursor.executemany(
+                "REPLACE INTO busqueda_ventas (id_venta, doc_cliente, nro_doc, texto) VALUES (%s, %s, %s, %s)",
+                filas
+            )
+    finally:
+        cursor.close()
+
+
+def desindexar_venta(conn, id_venta):
+    """Elimina la entrada de una venta borrada."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM busqueda_ventas WHERE id_venta = %s", (id_venta,))
+    finally:
+        cursor.close()
+
+
+def _consulta_texto(normalizado):
+    """Rama de texto libre: (sql, params, con_fulltext) con las columnas
+    (id_venta, relevancia)."""
+    tokens = normalizado.split()
+    largos = [t for t in tokens if len(t) >= LONGITUD_MINIMA_TOKEN]
+    if largos:
+        # Modo booleano: todas las palabras son obligatorias y se comparan por prefijo
+        expresion = ' '.join(f"+{t}*" for t in largos)
+        sql = """
+        SELECT id_venta, MATCH(texto) AGAINST (%s IN BOOLEAN MODE) AS relevancia
+        FROM busqueda_ventas
+        WHERE MATCH(texto) AGAINST (%s IN BOOLEAN MODE)
+        """
+        params = [expresion, expresion]
+        for corto in tokens:
+            if len(corto) < LONGITUD_MINIMA_TOKEN:
+                sql += " AND texto LIKE %s"
+                params.append(f"%{corto}%")
+        return sql, params, True
+
+    # Solo palabras demasiado cortas para el FULLTEXT: se recorre la tabla de
+    # búsqueda (una fila por venta), no el join de cuatro tablas.
+    sql = "SELECT id_venta, 1 AS relevancia FROM busqueda_ventas WHERE texto LIKE %s"
+    return sql, [f"%{normalizado}%"], False
+
+
+def subconsulta_busqueda(termino):
+    """Traduce un término de búsqueda a una tabla derivada (id_venta, relevancia)
+    que resuelve el índice, sin recorrer el join completo.
+    Retorna (sql, params), o None si el término queda vacío."""
+    normalizado = normalizar(termino)
+    if not normalizado:
+        return None
+
+    texto, params_texto, con_fulltext = _consulta_texto(normalizado)
+    compacto = termino.strip().lower()
+    if not PATRON_DOCUMENTO.match(compacto):
+        return texto, params_texto
+
+    # Parece un documento, pero también puede ser un modelo ("t544", "l3250"):
+    # igualdad exacta y prefijo sobre doc_cliente / nro_doc, cada rama con su
+    # propio índice, más la rama FULLTEXT para los artículos. Los documentos
+    # van primero: su relevancia supera a cualquier puntaje del FULLTEXT.
+    ramas = """
+            SELECT id_venta, %s AS relevancia FROM busqueda_ventas WHERE doc_cliente = %s
+            UNION ALL
+            SELECT id_venta, %s AS relevancia FROM busqueda_ventas WHERE nro_doc = %s
+            UNION ALL
+            SELECT id_venta, %s AS relevancia FROM busqueda_ventas WHERE doc_cliente LIKE %s
+            UNION ALL
+            SELECT id_venta, %s AS relevancia FROM busqueda_ventas WHERE nro_doc LIKE %s
+    """
+    prefijo = f"{compacto}%"
+    params = [RELEVANCIA_DOCUMENTO + 4, compacto, RELEVANCIA_DOCUMENTO + 3, compacto,
+              RELEVANCIA_DOCUMENTO + 2, prefijo, RELEVANCIA_DOCUMENTO + 1, prefijo]
+    if con_fulltext:
+        # Sin FULLTEXT (término corto) la rama de texto recorrería la tabla:
+        # un documento de menos de tres caracteres solo se busca por documento
+        ramas += "UNION ALL\n" + texto
+        params += params_texto
+    sql = f"SELECT id_venta, MAX(relevancia) AS relevancia FROM ({ramas}) coincidencias GROUP BY id_venta"
+    return sql, params
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_BUSQUEDA)
+
+
+def reconstruir_indice(conn, lote=1000):
+    """Vuelve a generar el índice completo (tras una migración o para verificarlo).
+    Recorre las ventas por bloques de id_venta para no cargar todo en memoria."""
+    lectura = conn.cursor(dictionary=True)
+    escritura = conn.cursor()
+    try:
+        asegurar_tabla(escritura)
+        escritura.execute("DELETE FROM busqueda_ventas")
+        ultimo_id = 0
+        total = 0
+        while True:
+            lectura.execute(
+                CONSULTA_TEXTO_VENTA + " WHERE v.id_venta > %s GROUP BY v.id_venta ORDER BY v.id_venta LIMIT %s",
+                (ultimo_id, lote)
+            )
+            filas = lectura.fetchall()
+            if not filas:
+                break
+            escritura.executemany(
+                "INSERT INTO busqueda_ventas (id_venta, doc_cliente, nro_doc, texto) VALUES (%s, %s, %s, %s)",
+                [_fila_indice(f) for f in filas]
+            )
+            ultimo_id = filas[-1]['id_venta']
+            total += len(filas)
+        conn.commit()
+        print(f"INFO: Índice de búsqueda reconstruido con {total} ventas.")
+        return total
+    finally:
+        lectura.close()
+        escritura.close()
+
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'reconstruir'
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if accion == 'crear':
+            cursor = conn.cursor()
+            asegurar_tabla(cursor)
+            cursor.close()
+            print("INFO: Tabla busqueda_ventas creada.")
+        else:
+            reconstruir_indice(conn)
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Productos canónicos: agrupa las variantes de un mismo artículo.
+
+El export trae el número de serie al final del nombre ("... ECOTANK L3250.
+ /XAH35..."), así cada unidad vendida queda como un producto distinto. Aquí
+se quita ese sufijo y se agrupan los nombres casi iguales con rapidfuzz.
+Solo se comparan productos del mismo bloque (categoría, marca, primera
+palabra y números del nombre), así el costo no crece cuadráticamente con el
+catálogo y nunca se juntan modelos o capacidades distintas.
+El resultado va a `producto_canonico` (id_producto -> id_canonico); los ids
+de `productos` no cambian, y el reporte agrupa por el nombre canónico.
+Uso: python canonicos.py agrupar [umbral] | ver
+"""
+import re
+import sys
+
+import mysql.connector
+from rapidfuzz import fuzz, process
+
+import versiones
+from clasificacion import limpiar_nombre
+
+
+DDL_CANONICO = """
+CREATE TABLE IF NOT EXISTS producto_canonico (
+  id_producto INTEGER NOT NULL PRIMARY KEY,
+  id_canonico INTEGER NOT NULL,
+  nombre_canonico TEXT NOT NULL,
+  KEY idx_producto_canonico (id_canonico)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Sufijos " /XXXX" (uno o varios números de serie) al final del nombre.
+# Exige un espacio antes de la barra para no tocar "G/12M" o "5MS/100HZ".
+_SUFIJO_SERIE = re.compile(r"(?:\s+/\s*[\w'\-]+)+\s*$")
+_TIENE_DIGITO = re.compile(r'\d')
+
+UMBRAL_POR_DEFECTO = 90
+
+
+def nombre_base(nombre_original):
+    """Nombre sin los números de serie finales ni los puntos sobrantes."""
+    texto = _SUFIJO_SERIE.sub('', str(nombre_original or '')).strip()
+    return texto.rstrip('. ').strip() or str(nombre_original or '').strip()
+
+
+def clave_bloque(limpio, categoria, marca):
+    """Solo se comparan productos con la misma categoría, marca, primera
+    palabra y el mismo conjunto de tokens con dígitos (modelo, capacidad)."""
+    tokens = limpio.split()
+    numeros = tuple(sorted({t for t in tokens if _TIENE_DIGITO.search(t)}))
+    return categoria, marca, tokens[0] if tokens else '', numeros
+
+
+def compatibles(tokens_a, tokens_b):
+    """Las palabras de una o dos letras suelen ser el color o la variante
+    ("GI-11 M" / "GI-11 Y"): si difieren, no son el mismo producto."""
+    return all(len(t) > 2 for t in tokens_a ^ tokens_b)
+
+
+class _Grupos:
+    """Union-find sobre índices de una lista."""
+
+    def __init__(self, n):
+        self.padre = list(range(n))
+
+    def raiz(self, i):
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, a, b):
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            self.padre[max(ra, rb)] = min(ra, rb)
+
+
+def agrupar(productos, umbral=UMBRAL_POR_DEFECTO):
+    """`productos`: iterable de (id_producto, nombre_original, categoria, marca).
+    Retorna {id_producto: (id_canonico, nombre_canonico)}; el canónico de cada
+    grupo es el producto de menor id."""
+    bloques = {}
+    for id_producto, nombre, categoria, marca in sorted(productos, key=lambda p: p[0]):
+        base = nombre_base(nombre)
+        limpio = limpiar_nombre(base)
+        bloques.setdefault(clave_bloque(limpio, categoria, marca), []).append((id_producto, base, limpio))
+
+    canonicos = {}
+    for miembros in bloques.values():
+        grupos = _Grupos(len(miembros))
+        if len(miembros) > 1:
+            limpios = [m[2] for m in miembros]
+            tokens = [set(t.split()) for t in limpios]
+            puntajes = process.cdist(limpios, limpios, scorer=fuzz.token_sort_ratio, score_cutoff=umbral)
+            for i in range(len(miembros)):
+                for j in range(i + 1, len(miembros)):
+                    if puntajes[i][j] and compatibles(tokens[i], tokens[j]):
+                        grupos.unir(i, j)
+        for i, (id_producto, _, _) in enumerate(miembros):
+            id_canonico, base_canonica, _ = miembros[grupos.raiz(i)]
+            canonicos[id_producto] = (id_canonico, base_canonica)
+    return canonicos
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_CANONICO)
+
+
+def agrupar_productos(conn, umbral=UMBRAL_POR_DEFECTO, lote=1000):
+    """Recalcula `producto_canonico` para todo el catálogo e incrementa la
+    versión de datos (el reporte cambia). Retorna (productos, canónicos)."""
+    cursor = conn.cursor()
+    try:
+        asegurar_tabla(cursor)
+        versiones.asegurar_tabla(cursor)
+        cursor.execute("SELECT id_producto, nombre_original, categoria, marca FROM productos")
+        canonicos = agrupar(cursor.fetchall(), umbral)
+        filas = [(id_producto, id_canonico, nombre) for id_producto, (id_canonico, nombre) in canonicos.items()]
+        cursor.execute("DELETE FROM producto_canonico")
+        for inicio in range(0, len(filas), lote):
+            cursor.executemany(
+                "INSERT INTO producto_canonico (id_producto, id_canonico, nombre_canonico) VALUES (%s, %s, %s)",
+                filas[inicio:inicio + lote]
+            )
+        # Cambia el producto de ventas ya cargadas
+        versiones.incrementar_version(conn, edicion=True)
+        conn.commit()
+        total_canonicos = len({id_canonico for id_canonico, _ in canonicos.values()})
+        print(f"INFO: {len(filas)} productos agrupados en {total_canonicos} productos canónicos.")
+        return len(filas), total_canonicos
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'agrupar'
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if accion == 'ver':
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT id_canonico, MIN(nombre_canonico), COUNT(*) AS variantes
+                FROM producto_canonico GROUP BY id_canonico HAVING variantes > 1
+                ORDER BY variantes DESC LIMIT 50
+                """
+            )
+            for id_canonico, nombre, variantes in cursor.fetchall():
+                print(f"{id_canonico:>6} {variantes:>4} variantes  {nombre}")
+            cursor.close()
+        else:
+            umbral = int(sys.argv[2]) if len(sys.argv) > 2 else UMBRAL_POR_DEFECTO
+            agrupar_productos(conn, umbral)
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    finally:
+        conn.close()
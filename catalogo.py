@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""Resolución de clientes y productos por clave única.
+
+`clientes.doc_cliente` y `productos.nombre_hash` (SHA-1 de nombre_original,
+columna generada) tienen índice único, así dos workers que crean el mismo
+cliente o producto a la vez no generan duplicados: el INSERT ... ON
+DUPLICATE KEY UPDATE devuelve el id de la fila que ya existe.
+Cada worker guarda los ids resueltos en una caché LRU con vencimiento
+(CACHE_CLIENTES, CACHE_PRODUCTOS): los clientes frecuentes y los consumibles
+más vendidos se resuelven sin ir a la base. Los ids entran a la caché recién
+después del commit (Resueltos.publicar): hasta entonces un cliente o producto
+recién creado no existe para las demás conexiones, y tras un rollback no
+existe nunca.
+Uso: python catalogo.py crear | duplicados
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import mysql.connector
+
+from clasificacion import clasificar
+
+
+# (tabla, índice, sentencias para crearlo)
+CLAVES_UNICAS = [
+    ("clientes", "uq_clientes_doc_cliente", [
+        "ALTER TABLE clientes ADD UNIQUE KEY uq_clientes_doc_cliente (doc_cliente)",
+    ]),
+    ("productos", "uq_productos_nombre_hash", [
+        "ALTER TABLE productos ADD COLUMN nombre_hash CHAR(40) AS (SHA1(nombre_original)) STORED",
+        "ALTER TABLE productos ADD UNIQUE KEY uq_productos_nombre_hash (nombre_hash)",
+    ]),
+]
+
+# Filas que impiden crear los índices únicos
+CONSULTAS_DUPLICADOS = {
+    "clientes": """
+        SELECT doc_cliente, COUNT(*) AS filas FROM clientes
+        WHERE doc_cliente IS NOT NULL GROUP BY doc_cliente HAVING filas > 1
+    """,
+    "productos": """
+        SELECT LEFT(nombre_original, 80), COUNT(*) AS filas FROM productos
+        GROUP BY nombre_original HAVING filas > 1
+    """,
+}
+
+# Tamaño y vencimiento de las cachés de ids (se pueden ajustar por variables de entorno)
+CACHE_TAMANO = int(os.environ.get('CATALOGO_CACHE_TAMANO', 4096))
+CACHE_TTL_SEGUNDOS = float(os.environ.get('CATALOGO_CACHE_TTL', 600))
+
+
+class CacheIds:
+    """Caché LRU clave -> id con vencimiento por antigüedad. El lock cubre
+    los hilos del worker (peticiones e importaciones en segundo plano)."""
+
+    def __init__(self, tamano=CACHE_TAMANO, ttl=CACHE_TTL_SEGUNDOS):
+        self.tamano = tamano
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        """Retorna el id guardado o None (y cuenta el acierto o el fallo)."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and time.monotonic() - entrada[1] < self.ttl:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            if entrada is not None:
+                del self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic())
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano:
+                self._datos.popitem(last=False)
+
+    def olvidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {"entradas": len(self._datos), "aciertos": self.aciertos, "fallos": self.fallos,
+                    "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None}
+
+
+# doc_cliente -> id_cliente y nombre_original -> id_producto, una por worker
+CACHE_CLIENTES = CacheIds()
+CACHE_PRODUCTOS = CacheIds()
+
+
+class Resueltos:
+    """Ids resueltos en una transacción. Se pasan a las cachés con
+    `publicar()` una vez hecho el commit; si la transacción se revierte
+    simplemente se descartan."""
+
+    def __init__(self):
+        self.clientes = {}
+        self.productos = {}
+
+    def publicar(self):
+        for doc_cliente, id_cliente in self.clientes.items():
+            CACHE_CLIENTES.guardar(doc_cliente, id_cliente)
+        for nombre, id_producto in self.productos.items():
+            CACHE_PRODUCTOS.guardar(nombre, id_producto)
+
+
+def estadisticas_cache():
+    return {"clientes": CACHE_CLIENTES.estadisticas(), "productos": CACHE_PRODUCTOS.estadisticas()}
+
+
+def _existe_indice(cursor, tabla, indice):
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1
+        """,
+        (tabla, indice)
+    )
+    return cursor.fetchone() is not None
+
+
+def _existe_columna(cursor, tabla, columna):
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s LIMIT 1
+        """,
+        (tabla, columna)
+    )
+    return cursor.fetchone() is not None
+
+
+def asegurar_claves(cursor):
+    """Crea los índices únicos que falten. Falla con IntegrityError si la
+    tabla tiene duplicados (ver `python catalogo.py duplicados`)."""
+    for tabla, indice, sentencias in CLAVES_UNICAS:
+        if _existe_indice(cursor, tabla, indice):
+            continue
+        for sentencia in sentencias:
+            if "ADD COLUMN nombre_hash" in sentencia and _existe_columna(cursor, tabla, "nombre_hash"):
+                continue
+            cursor.execute(sentencia)
+
+
+def resolver_cliente(cursor, doc_cliente, cliente, telefono, resueltos):
+    """Retorna el id del cliente con ese documento, creándolo si no existe.
+    Primero busca en CACHE_CLIENTES; si no está, un solo INSERT:
+    LAST_INSERT_ID(id_cliente) hace que `lastrowid` traiga el id de la fila
+    existente cuando la clave ya estaba. Sin documento siempre se crea.
+    El id queda en `resueltos` hasta que la transacción se confirme."""
+    if doc_cliente:
+        id_cliente = resueltos.clientes.get(doc_cliente) or CACHE_CLIENTES.obtener(doc_cliente)
+        if id_cliente is not None:
+            return id_cliente
+    cursor.execute(
+        """
+        INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE id_cliente = LAST_INSERT_ID(id_cliente)
+        """,
+        (doc_cliente, cliente, telefono)
+    )
+    id_cliente = cursor.lastrowid
+    if doc_cliente:
+        resueltos.clientes[doc_cliente] = id_cliente
+    return id_cliente
+
+
+def resolver_productos(cursor, nombres, resueltos):
+    """Retorna {nombre_original: id_producto} para todos los nombres. Los que
+    no están en CACHE_PRODUCTOS se crean (ya clasificados) si faltan, con un
+    INSERT multi-fila, y sus ids se leen con un único SELECT; quedan en
+    `resueltos` hasta que la transacción se confirme."""
+    unicos = list(dict.fromkeys(n for n in nombres if n))
+    ids = {}
+    faltantes = []
+    for nombre in unicos:
+        id_producto = resueltos.productos.get(nombre) or CACHE_PRODUCTOS.obtener(nombre)
+        if id_producto is None:
+            faltantes.append(nombre)
+        else:
+            ids[nombre] = id_producto
+    if not faltantes:
+        return ids
+    cursor.executemany(
+        """
+        INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca) VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE id_producto = id_producto
+        """,
+        [(nombre,) + clasificar(nombre) for nombre in faltantes]
+    )
+    cursor.execute(
+        "SELECT nombre_original, id_producto FROM productos WHERE nombre_hash IN ("
+        + ", ".join(["SHA1(%s)"] * len(faltantes)) + ")",
+        faltantes
+    )
+    for nombre, id_producto in cursor.fetchall():
+        resueltos.productos[nombre] = id_producto
+        ids[nombre] = id_producto
+    return ids
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'crear'
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        if accion == 'duplicados':
+            for tabla, consulta in CONSULTAS_DUPLICADOS.items():
+                cursor.execute(consulta)
+                for clave, filas in cursor.fetchall():
+                    print(f"DUPLICADO en {tabla}: {clave} ({filas} filas)")
+        else:
+            asegurar_claves(cursor)
+            conn.commit()
+            print("INFO: Índices únicos de clientes y productos creados.")
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Motor de clasificación de productos (categoría y marca).
+
+Las tablas de palabras clave son la única fuente de verdad; las funciones
+fila a fila de migrar_datos.py las recorren con `in`, y este motor compila
+cada tabla en una sola regex con forma de trie (las palabras comparten sus
+prefijos, así en cada posición el motor de regex avanza carácter a carácter
+en lugar de probar cada palabra). Para respetar la prioridad de la cascada
+original se buscan las coincidencias en todas las posiciones de inicio y
+gana la de menor índice de prioridad.
+El resultado se memoriza por nombre, así cada artículo se clasifica una vez.
+"""
+import re
+from functools import lru_cache
+
+
+# (categoría, palabras clave) en orden de prioridad
+REGLAS_CATEGORIA = [
+    ("Mouse", ["mouse"]),
+    ("Laptop y accesorios", ["laptop","notebook","bateria","pantalla","cargador","memoria para laptop","servicio a laptop"]),
+    ("Impresoras y consumibles", ["tinta","cartucho","toner","impresora","cabezal","multifuncional"]),
+    ("Cables y conectores", ["hdmi","vga","display port","usb","cable","adaptador","otg","patch","plug","utp"]),
+    ("Almacenamiento", ["memoria","ssd","disco","enclosure","caddy","flash","pendrive"]),
+    ("Componentes y hardware PC", ["procesador","placa madre","case","gabinete","cooler","fuente","ram","motherboard"]),
+    ("Periféricos y accesorios", ["teclado","parlante","hub","mochila","funda","protector","kit de limpieza"]),
+    ("Cámaras y audio", ["camara","webcam","audifono","headset","microfono"]),
+    ("Software y licencias", ["licencia","office","windows","antivirus"]),
+    ("Servicios técnicos", ["reparacion","servicio","instalacion","mantenimiento"]),
+]
+CATEGORIA_POR_DEFECTO = "Otros"
+
+marca_keywords = {
+    "Laptop y accesorios": ["hp","lenovo","asus","acer","dell","samsung","msi","gigabyte","razer","toshiba","huawei"],
+    "Mouse": ["logitech","genius","hyperx","redragon","halion","teros","microsoft","razer","hp"],
+    "Impresoras y consumibles": ["epson","canon","hp","brother","kodak"],
+    "Cámaras y audio": ["logitech","philips","sony","jbl","xiaomi","anker"]
+}
+MARCAS_GENERALES = ["hp","lenovo","asus","acer","dell","logitech","canon","epson","brother","redragon","razer","samsung","msi"]
+MARCA_POR_DEFECTO = "OTROS"
+
+_NO_PERMITIDOS = re.compile(r'[^a-z0-9áéíóúüñ\s]')
+
+
+def limpiar_nombre(texto):
+    """Igual que la limpieza original: minúsculas, espacios simples y solo
+    letras (con tildes), dígitos y espacios. `split()`/`join` hace el strip y
+    colapsa los espacios sin pasar por una regex."""
+    texto = ' '.join(str(texto).lower().split())
+    return _NO_PERMITIDOS.sub(' ', texto).strip()
+
+
+class Coincidencias:
+    """Una lista de palabras clave compilada en una sola regex.
+    `mejor(texto)` retorna el índice más bajo (mayor prioridad) entre las
+    palabras que aparecen como subcadena, o None si no aparece ninguna."""
+
+    def __init__(self, palabras):
+        self.palabras = list(palabras)
+        trie = {}
+        for indice, palabra in enumerate(self.palabras):
+            nodo = trie
+            for ch in palabra:
+                nodo = nodo.setdefault(ch, {})
+            nodo.setdefault('', indice)
+        # Cada palabra termina en un grupo vacío `()`; `_indice_grupo[g]` es la
+        # prioridad del grupo g. En una misma posición la regex prefiere la
+        # palabra más larga, y las palabras que son prefijo suyo también
+        # coinciden ahí: por eso cada grupo guarda la mejor prioridad de su camino.
+        self._indice_grupo = [None]
+        self._patron = re.compile(self._armar(trie, None))
+        # Matchers de las palabras anteriores a cada índice, creados al usarse
+        self._anteriores = {}
+
+    def _armar(self, nodo, mejor_camino):
+        if '' in nodo:
+            mejor_camino = nodo[''] if mejor_camino is None else min(mejor_camino, nodo[''])
+        ramas = [re.escape(ch) + self._armar(nodo[ch], mejor_camino)
+                 for ch in sorted(k for k in nodo if k != '')]
+        if '' in nodo:
+            self._indice_grupo.append(mejor_camino)
+            ramas.append('()')
+        return ramas[0] if len(ramas) == 1 else '(?:' + '|'.join(ramas) + ')'
+
+    def _antes_de(self, indice):
+        anteriores = self._anteriores.get(indice)
+        if anteriores is None:
+            anteriores = self._anteriores[indice] = Coincidencias(self.palabras[:indice])
+        return anteriores
+
+    def mejor(self, texto):
+        m = self._patron.search(texto)
+        if m is None:
+            return None
+        mejor = self._indice_grupo[m.lastindex]
+        # Después de la primera coincidencia solo puede ganar una palabra de
+        # mayor prioridad que empiece más adelante: se sigue buscando con la
+        # regex de las palabras anteriores a la mejor, que es más chica
+        while mejor:
+            anteriores = self._antes_de(mejor)
+            m = anteriores._patron.search(texto, m.start() + 1)
+            if m is None:
+                return mejor
+            mejor = anteriores._indice_grupo[m.lastindex]
+        return mejor
+
+
+# Palabras de todas las reglas aplanadas; `_CATEGORIA_DE[i]` da la categoría de la palabra i
+_CATEGORIA_DE = [cat for cat, palabras in REGLAS_CATEGORIA for _ in palabras]
+_COINCIDENCIAS_CATEGORIA = Coincidencias(p for _, palabras in REGLAS_CATEGORIA for p in palabras)
+_COINCIDENCIAS_MARCA = {cat: Coincidencias(palabras) for cat, palabras in marca_keywords.items()}
+_COINCIDENCIAS_GENERALES = Coincidencias(MARCAS_GENERALES)
+
+
+def categoria_de(nombre_limpio):
+    indice = _COINCIDENCIAS_CATEGORIA.mejor(nombre_limpio)
+    return CATEGORIA_POR_DEFECTO if indice is None else _CATEGORIA_DE[indice]
+
+
+def marca_de(categoria, nombre_limpio):
+    t = nombre_limpio.lower()
+    coincidencias = _COINCIDENCIAS_MARCA.get(categoria)
+    if coincidencias is not None:
+        indice = coincidencias.mejor(t)
+        if indice is not None:
+            return coincidencias.palabras[indice].upper()
+    indice = _COINCIDENCIAS_GENERALES.mejor(t)
+    return MARCA_POR_DEFECTO if indice is None else MARCAS_GENERALES[indice].upper()
+
+
+@lru_cache(maxsize=65536)
+def clasificar(nombre_original):
+    """Retorna (nombre_limpio, categoria, marca) de un artículo; memorizado."""
+    nombre_limpio = limpiar_nombre(nombre_original)
+    categoria = categoria_de(nombre_limpio)
+    return nombre_limpio, categoria, marca_de(categoria, nombre_limpio)
+
+
+def clasificar_serie(articulos):
+    """Versión vectorizada para pandas: clasifica una vez cada valor único de
+    la serie y retorna un DataFrame (nombre_limpio, categoria, marca) alineado
+    con su índice."""
+    # pandas solo se carga en la migración: catalogo.py importa este módulo en la app
+    import numpy as np
+    import pandas as pd
+
+    # Un solo factorize: códigos por fila y valores únicos. Los nulos quedan con
+    # código -1, que al tomar de las tablas cae en la última fila (NaN)
+    codigos, unicos = pd.factorize(articulos)
+    tabla = np.array([clasificar(a) for a in unicos] + [(np.nan,) * 3], dtype=object)
+    return pd.DataFrame({nombre: tabla[codigos, i]
+                         for i, nombre in enumerate(('nombre_limpio', 'categoria', 'marca'))},
+                        index=articulos.index)
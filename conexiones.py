@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Configuración de la base de datos y pool de conexiones compartido por la app.
+
+Con workers gevent (gunicorn.conf.py) los sockets están parcheados y las
+conexiones se abren con la implementación en Python del driver (`use_pure`),
+así cada espera a MySQL cede el worker a otra petición; la extensión en C
+bloquearía el proceso entero.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import mysql.connector
+
+import metricas
+
+
+# --- CONFIGURACIÓN DE LA BASE DE DATOS ---
+# Analiza la URL de la base de datos de Render
+db_url = os.environ.get('DATABASE_URL')
+if db_url:
+    url = urlparse(db_url)
+    DB_CONFIG = {
+        'user': url.username,
+        'password': url.password,
+        'host': url.hostname,
+        'database': url.path[1:],
+        'port': url.port
+    }
+else:
+    # Configuración local de fallback (solo para desarrollo)
+    DB_CONFIG = {
+        'user': 'root',
+        'password': '',
+        'host': 'localhost',
+        'database': 'reporte'
+    }
+
+# Parámetros del pool (se pueden ajustar por variables de entorno)
+POOL_TAMANO = int(os.environ.get('DB_POOL_SIZE', 5))
+POOL_RECICLAR_SEGUNDOS = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+POOL_TIMEOUT_SEGUNDOS = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+
+def es_cooperativo():
+    """True si gevent parchó los sockets (worker gevent de gunicorn)."""
+    monkey = sys.modules.get('gevent.monkey')
+    return bool(monkey and monkey.is_module_patched('socket'))
+
+
+class ConexionPool:
+    """Envoltorio de una conexión prestada: `close()` la devuelve al pool
+    en lugar de cerrar el socket, así los helpers no cambian su código.
+    Si se prestó con el nombre de una consulta, sus cursores se miden
+    (metricas.CursorMedido)."""
+
+    def __init__(self, pool, conn, consulta=None):
+        self._pool = pool
+        self._conn = conn
+        self.consulta = consulta
+
+    def _conexion(self):
+        if self._conn is None:
+            raise mysql.connector.errors.OperationalError("La conexión ya fue devuelta al pool.")
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conexion().cursor(*args, **kwargs)
+        return metricas.CursorMedido(cursor, self.consulta) if self.consulta else cursor
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.devolver(self._conn)
+            self._conn = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion(), nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PoolConexiones:
+    """Pool de conexiones MySQL con verificación (ping) al prestar,
+    reciclado por antigüedad y reinicio automático tras un fork."""
+
+    def __init__(self, config, tamano=POOL_TAMANO, reciclar_segundos=POOL_RECICLAR_SEGUNDOS,
+                 timeout=POOL_TIMEOUT_SEGUNDOS):
+        self._config = dict(config)
+        self.tamano = tamano
+        self.reciclar_segundos = reciclar_segundos
+        self.timeout = timeout
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._creacion = {}
+
+    def _verificar_proceso(self):
+        # Tras un fork (gunicorn) los sockets heredados pertenecen al proceso
+        # padre: se descartan sin cerrarlos para no cortar sus sesiones.
+        if os.getpid() != self._pid:
+            self._reiniciar_estado()
+
+    def _crear(self):
+        config = dict(self._config, use_pure=True) if es_cooperativo() else self._config
+        conn = mysql.connector.connect(**config)
+        self._creacion[id(conn)] = time.monotonic()
+        return conn
+
+    def _descartar(self, conn):
+        self._creacion.pop(id(conn), None)
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+        with self._lock:
+            self._creadas -= 1
+
+    def _es_valida(self, conn):
+        creada = self._creacion.get(id(conn), 0)
+        if self.reciclar_segundos and time.monotonic() - creada > self.reciclar_segundos:
+            return False
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def obtener(self, consulta=None):
+        """Presta una conexión; crea una nueva si el pool aún no está lleno.
+        `consulta` nombra lo que se ejecutará con ella, para las métricas."""
+        self._verificar_proceso()
+        inicio = time.monotonic()
+        conn = self._obtener(inicio + self.timeout)
+        metricas.POOL_ESPERA.observar(time.monotonic() - inicio)
+        return ConexionPool(self, conn, consulta)
+
+    def _obtener(self, limite):
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    puede_crear = self._creadas < self.tamano
+                    if puede_crear:
+                        self._creadas += 1
+                if puede_crear:
+                    try:
+                        return self._crear()
+                    except mysql.connector.Error:
+                        with self._lock:
+                            self._creadas -= 1
+                        raise
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    metricas.POOL_AGOTADO.incrementar()
+                    raise mysql.connector.errors.PoolError("No hay conexiones disponibles en el pool.")
+                try:
+                    conn = self._libres.get(timeout=restante)
+                except queue.Empty:
+                    continue
+            if self._es_valida(conn):
+                return conn
+            self._descartar(conn)
+
+    def devolver(self, conn):
+        """Recibe una conexión de vuelta. Se hace rollback para no arrastrar
+        una transacción (y su snapshot de lectura) al siguiente préstamo."""
+        if os.getpid() != self._pid:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            self._descartar(conn)
+            return
+        self._libres.put(conn)
+
+    def estadisticas(self):
+        return {"tamano": self.tamano, "creadas": self._creadas, "libres": self._libres.qsize()}
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres del pool."""
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Retorna el pool del proceso actual, creándolo de forma perezosa."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(DB_CONFIG)
+    return _pool
+
+
+def reiniciar_pool():
+    """Descarta el pool heredado; se llama desde el hook `post_fork` de gunicorn."""
+    global _pool
+    _pool = None
@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+"""Esquema versionado de la base de ventas.
+
+MIGRACIONES es la lista ordenada de versiones del esquema; cada una tiene
+pasos que son SQL, un `Indice` o una función que recibe el cursor. La tabla
+`esquema_version` registra las versiones aplicadas y `migrar` aplica las que
+falten. Todos los pasos son idempotentes (CREATE TABLE IF NOT EXISTS, columnas,
+índices y claves foráneas que se buscan antes de crearlos), así una base
+creada con los volcados antiguos (reporte01.sql, reporte02.sql, sql) se pone
+al día desde la versión 1 sin perder datos.
+Las tablas de control de la carga (migracion_*) las crea migrar_datos.py.
+
+`verificar` corre EXPLAIN sobre las consultas de app.py y falla si alguna
+recorre una tabla completa (type = ALL) o un índice entero (type = index
+con más de FILAS_RECORRIDO_INDICE filas estimadas), o si una página del
+listado necesita ordenar aparte (Using filesort / Using temporary).
+Conviene correrlo con datos cargados: con tablas casi vacías MySQL prefiere
+leerlas enteras.
+Uso: python esquema.py migrar | estado | verificar | sql
+"""
+import re
+import sys
+from collections import namedtuple
+
+import mysql.connector
+
+import busqueda
+import canonicos
+import catalogo
+import importaciones
+import resumenes
+import versiones
+
+
+DDL_ESQUEMA_VERSION = """
+CREATE TABLE IF NOT EXISTS esquema_version (
+  version INTEGER NOT NULL PRIMARY KEY,
+  descripcion VARCHAR(255) NOT NULL,
+  aplicado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Tablas principales con las columnas que escriben app.py y migrar_datos.py.
+# En una base nueva las claves únicas de catalogo.py nacen con la tabla.
+DDL_CLIENTES = """
+CREATE TABLE IF NOT EXISTS clientes (
+  id_cliente INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  doc_cliente VARCHAR(50),
+  cliente VARCHAR(255) NOT NULL,
+  telefono VARCHAR(50),
+  UNIQUE KEY uq_clientes_doc_cliente (doc_cliente)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_PRODUCTOS = """
+CREATE TABLE IF NOT EXISTS productos (
+  id_producto INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  nombre_original VARCHAR(255) NOT NULL,
+  nombre_limpio VARCHAR(255) NOT NULL,
+  categoria VARCHAR(100),
+  marca VARCHAR(50),
+  dato_extra TEXT,
+  nombre_hash CHAR(40) AS (SHA1(nombre_original)) STORED,
+  UNIQUE KEY uq_productos_nombre_hash (nombre_hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_VENTAS = """
+CREATE TABLE IF NOT EXISTS ventas (
+  id_venta INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  fecha DATE NOT NULL,
+  documento VARCHAR(50),
+  nro_doc VARCHAR(50),
+  cont_cred VARCHAR(20),
+  medio_pago VARCHAR(100),
+  observacion TEXT,
+  moneda VARCHAR(10),
+  tc DECIMAL(5,2),
+  vendedor VARCHAR(100),
+  id_cliente INTEGER
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_DETALLE_VENTA = """
+CREATE TABLE IF NOT EXISTS detalle_venta (
+  id_detalle INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  id_venta INTEGER NOT NULL,
+  id_producto INTEGER NOT NULL,
+  cantidad INTEGER,
+  importe DECIMAL(10,2),
+  importe_soles DECIMAL(10,2)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+Indice = namedtuple('Indice', 'tabla nombre columnas')
+ClaveForanea = namedtuple('ClaveForanea', 'tabla nombre columna referencia')
+
+# Volcados antiguos: productos(producto, precio), ventas(id_cliente, fecha
+# TIMESTAMP, total), detalle_venta(..., precio_unitario). Columnas que se
+# renombran (tabla, antigua, nueva, definición) y columnas que faltan.
+COLUMNAS_RENOMBRADAS = [
+    ('productos', 'producto', 'nombre_original', 'VARCHAR(255) NOT NULL'),
+]
+COLUMNAS_NUEVAS = {
+    'productos': [
+        ('nombre_limpio', 'VARCHAR(255) NOT NULL'),
+        ('categoria', 'VARCHAR(100)'),
+        ('marca', 'VARCHAR(50)'),
+        ('dato_extra', 'TEXT'),
+    ],
+    'ventas': [
+        ('documento', 'VARCHAR(50)'),
+        ('nro_doc', 'VARCHAR(50)'),
+        ('cont_cred', 'VARCHAR(20)'),
+        ('medio_pago', 'VARCHAR(100)'),
+        ('observacion', 'TEXT'),
+        ('moneda', 'VARCHAR(10)'),
+        ('tc', 'DECIMAL(5,2)'),
+        ('vendedor', 'VARCHAR(100)'),
+    ],
+    'detalle_venta': [
+        ('importe', 'DECIMAL(10,2)'),
+        ('importe_soles', 'DECIMAL(10,2)'),
+    ],
+}
+# Columnas antiguas NOT NULL que app.py y migrar_datos.py no escriben (o
+# pueden dejar vacías) y columnas con otro tipo: pasan a la definición actual
+COLUMNAS_MODIFICADAS = [
+    ('productos', 'precio', 'DECIMAL(10,2)'),
+    ('ventas', 'total', 'DECIMAL(10,2)'),
+    ('ventas', 'fecha', 'DATE NOT NULL'),
+    ('detalle_venta', 'cantidad', 'INT'),
+    ('detalle_venta', 'importe', 'DECIMAL(10,2)'),
+    ('detalle_venta', 'importe_soles', 'DECIMAL(10,2)'),
+    ('detalle_venta', 'precio_unitario', 'DECIMAL(10,2)'),
+]
+
+
+def _columnas(cursor, tabla):
+    """{columna: (tipo, admite_nulos)} de una tabla existente."""
+    cursor.execute(
+        "SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (tabla,)
+    )
+    return {nombre: (tipo.lower(), nulos == 'YES') for nombre, tipo, nulos in cursor.fetchall()}
+
+
+def actualizar_tablas_antiguas(cursor):
+    """Lleva las tablas de un volcado antiguo a las columnas actuales."""
+    for tabla, antigua, nueva, definicion in COLUMNAS_RENOMBRADAS:
+        columnas = _columnas(cursor, tabla)
+        if antigua in columnas and nueva not in columnas:
+            cursor.execute(f"ALTER TABLE {tabla} CHANGE {antigua} {nueva} {definicion}")
+    for tabla, nuevas in COLUMNAS_NUEVAS.items():
+        columnas = _columnas(cursor, tabla)
+        faltantes = [nombre for nombre, _ in nuevas if nombre not in columnas]
+        if faltantes:
+            cursor.execute(f"ALTER TABLE {tabla} " + ", ".join(
+                f"ADD COLUMN {nombre} {definicion}" for nombre, definicion in nuevas if nombre in faltantes))
+        if tabla == 'productos' and 'nombre_limpio' in faltantes:
+            # Los productos antiguos no tienen nombre limpio: se parte del original
+            cursor.execute("UPDATE productos SET nombre_limpio = LOWER(TRIM(nombre_original))")
+    for tabla, columna, definicion in COLUMNAS_MODIFICADAS:
+        actual = _columnas(cursor, tabla).get(columna)
+        if actual is None:
+            continue
+        tipo, nulos = actual
+        # MariaDB informa el ancho de los enteros: int(11)
+        if re.sub(r'\(\d+\)$', '', tipo) != definicion.split()[0].lower() or nulos != ('NOT NULL' not in definicion):
+            cursor.execute(f"ALTER TABLE {tabla} MODIFY {columna} {definicion}")
+
+
+def _clave_foranea_existente(cursor, clave):
+    """Nombre de una clave foránea que ya une la columna con la tabla
+    referida (la de la migración o la de un volcado antiguo), o None."""
+    cursor.execute(
+        "SELECT CONSTRAINT_NAME FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s "
+        "AND REFERENCED_TABLE_NAME = %s",
+        (clave.tabla, clave.columna, clave.referencia)
+    )
+    fila = cursor.fetchone()
+    cursor.fetchall()
+    return fila[0] if fila else None
+
+
+def _alinear_tipo(cursor, clave):
+    """Los volcados antiguos usan SERIAL (BIGINT UNSIGNED) en las claves
+    primarias e INT en las columnas que las referencian; MySQL solo crea la
+    clave foránea si el tipo coincide, así que la columna toma el de la referida."""
+    tipo = _columnas(cursor, clave.referencia)[clave.columna][0]
+    actual, nulos = _columnas(cursor, clave.tabla)[clave.columna]
+    if actual != tipo:
+        cursor.execute(f"ALTER TABLE {clave.tabla} MODIFY {clave.columna} {tipo}{'' if nulos else ' NOT NULL'}")
+
+
+def _sql_clave_foranea(clave):
+    return (f"ALTER TABLE {clave.tabla} ADD CONSTRAINT {clave.nombre} "
+            f"FOREIGN KEY ({clave.columna}) REFERENCES {clave.referencia}({clave.columna})")
+
+
+def _verificar_huerfanas(cursor, clave):
+    """Falla con un mensaje claro si hay filas que impedirían crear la clave."""
+    cursor.execute(
+        f"SELECT COUNT(*) FROM {clave.tabla} t LEFT JOIN {clave.referencia} r ON r.{clave.columna} = t.{clave.columna} "
+        f"WHERE t.{clave.columna} IS NOT NULL AND r.{clave.columna} IS NULL"
+    )
+    huerfanas = cursor.fetchone()[0]
+    if huerfanas:
+        raise RuntimeError(f"{huerfanas} filas de {clave.tabla} apuntan a un {clave.columna} que no existe "
+                           f"en {clave.referencia}; corríjalas antes de crear {clave.nombre}.")
+
+# Índices de los órdenes del listado que ya no existen (versión 6)
+INDICES_RETIRADOS = [
+    ('detalle_venta', 'idx_detalle_importe'),
+    ('clientes', 'idx_clientes_cliente'),
+]
+
+
+def quitar_indices_de_orden(cursor):
+    """Borra los índices de INDICES_RETIRADOS que existan."""
+    for tabla, nombre in INDICES_RETIRADOS:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+            (tabla, nombre)
+        )
+        if cursor.fetchall():
+            cursor.execute(f"DROP INDEX {nombre} ON {tabla}")
+
+
+MIGRACIONES = [
+    (1, "Tablas principales: clientes, productos, ventas, detalle_venta", [
+        DDL_CLIENTES,
+        DDL_PRODUCTOS,
+        DDL_VENTAS,
+        DDL_DETALLE_VENTA,
+        actualizar_tablas_antiguas,
+    ]),
+    (2, "Índices del listado, el detalle y los joins de app.py", [
+        # Listado ordenado por fecha (keyset fecha, id_venta) y filtros por vendedor
+        Indice('ventas', 'idx_ventas_fecha', ('fecha', 'id_venta')),
+        Indice('ventas', 'idx_ventas_vendedor_fecha', ('vendedor', 'fecha')),
+        Indice('ventas', 'idx_ventas_cliente', ('id_cliente',)),
+        # Líneas de una venta en orden de id_detalle (join del listado, editar, eliminar)
+        Indice('detalle_venta', 'idx_detalle_venta', ('id_venta', 'id_detalle')),
+        Indice('detalle_venta', 'idx_detalle_producto', ('id_producto',)),
+    ]),
+    (3, "Claves únicas de clientes (doc_cliente) y productos (nombre_hash)", [
+        catalogo.asegurar_claves,
+    ]),
+    (4, "Tablas de búsqueda, resúmenes, versión, canónicos e importaciones", [
+        busqueda.DDL_BUSQUEDA,
+        resumenes.DDL_RESUMEN,
+        resumenes.DDL_RESUMEN_PRODUCTO,
+        versiones.DDL_VERSION,
+        "INSERT IGNORE INTO version_datos (id, version) VALUES (1, 0)",
+        canonicos.DDL_CANONICO,
+        importaciones.DDL_IMPORTACIONES,
+    ]),
+    (5, "Resúmenes diarios por vendedor, medio de pago y producto (/api/series)", [
+        resumenes.DDL_RESUMEN_DIARIO,
+        resumenes.DDL_RESUMEN_DIARIO_VENTAS,
+    ]),
+    (6, "Sin índices de los órdenes por importe y por cliente (el listado pagina sobre ventas)", [
+        quitar_indices_de_orden,
+    ]),
+    (7, "Claves foráneas de ventas y detalle_venta (las del volcado original)", [
+        ClaveForanea('ventas', 'fk_cliente', 'id_cliente', 'clientes'),
+        ClaveForanea('detalle_venta', 'fk_detalle_venta_venta', 'id_venta', 'ventas'),
+        ClaveForanea('detalle_venta', 'fk_detalle_venta_producto', 'id_producto', 'productos'),
+    ]),
+    (8, "Contador de ediciones en version_datos (el motor analítico recarga si cambia)", [
+        versiones.asegurar_ediciones,
+    ]),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+# Serializa `migrar` entre procesos (varios workers o una carga en curso)
+NOMBRE_BLOQUEO = 'esquema_ventas'
+SEGUNDOS_BLOQUEO = 60
+
+
+def _indice_equivalente(cursor, indice):
+    """Nombre de un índice existente que ya empieza por las columnas pedidas
+    (el de la migración u otro creado a mano), o None."""
+    cursor.execute(
+        """
+        SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) AS columnas
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        GROUP BY INDEX_NAME
+        """,
+        (indice.tabla,)
+    )
+    buscadas = ','.join(indice.columnas)
+    for nombre, columnas in cursor.fetchall():
+        if nombre == indice.nombre or (columnas + ',').startswith(buscadas + ','):
+            return nombre
+    return None
+
+
+def _sql_indice(indice):
+    return f"CREATE INDEX {indice.nombre} ON {indice.tabla} ({', '.join(indice.columnas)})"
+
+
+def _aplicar_paso(cursor, paso):
+    if isinstance(paso, Indice):
+        existente = _indice_equivalente(cursor, paso)
+        if existente:
+            print(f"INFO: {paso.tabla}.{paso.nombre} ya está cubierto por {existente}.")
+            return
+        cursor.execute(_sql_indice(paso))
+    elif isinstance(paso, ClaveForanea):
+        existente = _clave_foranea_existente(cursor, paso)
+        if existente:
+            print(f"INFO: {paso.tabla}.{paso.nombre} ya está cubierta por {existente}.")
+            return
+        _verificar_huerfanas(cursor, paso)
+        _alinear_tipo(cursor, paso)
+        cursor.execute(_sql_clave_foranea(paso))
+    elif callable(paso):
+        paso(cursor)
+    else:
+        cursor.execute(paso)
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_ESQUEMA_VERSION)
+
+
+def versiones_aplicadas(cursor):
+    cursor.execute("SELECT version FROM esquema_version")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def migrar(conn):
+    """Aplica las versiones que falten, en orden. Retorna las aplicadas.
+    Los DDL de MySQL hacen commit implícito: cada versión se registra al
+    terminar sus pasos, y si uno falla se reintenta entera la próxima vez."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (NOMBRE_BLOQUEO, SEGUNDOS_BLOQUEO))
+        if not cursor.fetchone()[0]:
+            raise RuntimeError("Otro proceso está migrando el esquema; intente de nuevo.")
+        try:
+            asegurar_tabla(cursor)
+            aplicadas = versiones_aplicadas(cursor)
+            nuevas = []
+            for version, descripcion, pasos in MIGRACIONES:
+                if version in aplicadas:
+                    continue
+                print(f"INFO: Aplicando versión {version} del esquema: {descripcion}...")
+                for paso in pasos:
+                    _aplicar_paso(cursor, paso)
+                cursor.execute("INSERT INTO esquema_version (version, descripcion) VALUES (%s, %s)",
+                               (version, descripcion))
+                conn.commit()
+                nuevas.append(version)
+            return nuevas
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (NOMBRE_BLOQUEO,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+# Un recorrido de índice acotado por LIMIT (una página del listado) estima
+# tantas filas como el LIMIT; por encima de esto se recorre el índice entero
+FILAS_RECORRIDO_INDICE = 1000
+
+Consulta = namedtuple('Consulta', 'nombre sql params permitidas paginada', defaults=(False,))
+
+
+def consultas_verificar():
+    """Consultas de app.py: (nombre, sql, params, alias que pueden recorrerse
+    completos, paginada). Las tablas derivadas (<derived2>, <union2,3>) son
+    resultados intermedios ya filtrados y siempre se permiten. En las
+    paginadas el índice debe entregar las filas ya ordenadas."""
+    # app.py trae Flask: solo se importa al verificar
+    import app
+    import exportar
+    import reporte
+    import series
+
+    token = app.codificar_cursor('2024-01-01', 1)
+    consultas = []
+    for orden in ('fecha', 'id_venta'):
+        consultas.append(Consulta(f"listado por {orden}", *app._consulta_ventas(None, 100, None, orden, True), (),
+                                  paginada=True))
+        consultas.append(Consulta(f"listado por {orden} (página siguiente)",
+                                  *app._consulta_ventas(None, 100, token, orden, True), (), paginada=True))
+    consultas += [
+        ("líneas de una página del listado", app.CONSULTA_LINEAS.format(marcadores='%s, %s'), (1, 2), ()),
+        ("búsqueda por documento", *app._consulta_ventas('20100047218', 100, None, 'fecha', True), ()),
+        ("búsqueda por texto", *app._consulta_ventas('tinta epson', 100, None, 'relevancia', True), ()),
+        ("venta por id", app.CONSULTA_VENTA, (1,), ()),
+        ("líneas de una venta", "SELECT id_detalle FROM detalle_venta WHERE id_venta = %s", (1,), ()),
+        ("borrar líneas de una venta", "DELETE FROM detalle_venta WHERE id_venta = %s", (1,), ()),
+        ("cliente por documento", "SELECT id_cliente FROM clientes WHERE doc_cliente = %s", ('20100047218',), ()),
+        ("productos por nombre",
+         "SELECT nombre_original, id_producto FROM productos WHERE nombre_hash IN (SHA1(%s), SHA1(%s))",
+         ('MOUSE LOGITECH M90', 'TINTA EPSON T544'), ()),
+        ("aporte de una venta al resumen", resumenes.CONSULTA_APORTE + " WHERE v.id_venta = %s GROUP BY v.id_venta",
+         (1,), ()),
+        ("aporte diario de una venta",
+         resumenes.CONSULTA_APORTE_DIARIO + " WHERE v.id_venta = %s" + resumenes.AGRUPAR_DIARIO, (1,), ()),
+        ("texto de una venta para la búsqueda",
+         busqueda.CONSULTA_TEXTO_VENTA + " WHERE v.id_venta = %s GROUP BY v.id_venta", (1,), ()),
+        ("series por vendedor", *series.consulta_series('2024-07-01', '2025-07-31', 'mes', ['vendedor'],
+                                                       ['importe_soles', 'tickets'], {}), ()),
+        ("series por categoría y semana", *series.consulta_series('2024-07-01', '2025-07-31', 'semana', ['categoria'],
+                                                                 ['cantidad'], {'vendedor': 'ANA'}), ()),
+        ("exportación por rango de fechas", exportar.CONSULTA_EXPORTAR, ('2024-07-01', '2024-07-31'), ()),
+        # Lecturas de tablas pre-agregadas: se leen enteras a propósito
+        ("gráfico por vendedor", resumenes.CONSULTA_TOTAL_POR_VENDEDOR, (), ('resumen_ventas_vendedor',)),
+        ("reporte por producto y mes", reporte.CONSULTA_PRODUCTOS_MES, (), ('r',)),
+    ]
+    return [Consulta(*consulta) for consulta in consultas]
+
+
+def _problema(consulta, fila):
+    """Motivo por el que una fila del EXPLAIN es un plan caro, o None."""
+    tabla = fila.get('table') or ''
+    if tabla.startswith('<') or tabla in consulta.permitidas:
+        return None
+    tipo = fila.get('type')
+    if tipo == 'ALL':
+        return "RECORRIDO COMPLETO"
+    if tipo == 'index' and (fila.get('rows') or 0) > FILAS_RECORRIDO_INDICE:
+        return "RECORRIDO DE ÍNDICE"
+    extra = fila.get('Extra') or ''
+    if consulta.paginada and ('Using filesort' in extra or 'Using temporary' in extra):
+        return "ORDEN SIN ÍNDICE"
+    return None
+
+
+def verificar(conn):
+    """Corre EXPLAIN sobre cada consulta y retorna la lista de
+    (consulta, tabla, motivo) con planes caros: recorridos completos de una
+    tabla o de un índice, y páginas del listado que ordenan aparte."""
+    cursor = conn.cursor(dictionary=True)
+    fallas = []
+    try:
+        for consulta in consultas_verificar():
+            cursor.execute("EXPLAIN " + consulta.sql, consulta.params)
+            for fila in cursor.fetchall():
+                tabla = fila.get('table') or ''
+                motivo = _problema(consulta, fila)
+                if motivo:
+                    fallas.append((consulta.nombre, tabla, motivo))
+                print(f"{motivo or 'OK':<20} {consulta.nombre:<46} {tabla:<22} type={fila.get('type')} "
+                      f"key={fila.get('key')} rows={fila.get('rows')} extra={fila.get('Extra') or ''}")
+        return fallas
+    finally:
+        cursor.close()
+
+
+def exportar_sql():
+    """Esquema completo como texto SQL (para crear una base desde cero)."""
+    partes = [f"-- Esquema de la base de ventas, versión {VERSION_ACTUAL}.",
+              "-- Generado con `python esquema.py sql`; no editar a mano.", ""]
+    for version, descripcion, pasos in MIGRACIONES:
+        partes.append(f"--\n-- Versión {version}: {descripcion}\n--")
+        for paso in pasos:
+            if isinstance(paso, Indice):
+                partes.append(_sql_indice(paso) + ";")
+            elif isinstance(paso, ClaveForanea):
+                partes.append(_sql_clave_foranea(paso) + ";")
+            elif callable(paso):
+                modulo = 'esquema' if paso.__module__ == '__main__' else paso.__module__
+                partes.append(f"-- {modulo}.{paso.__name__}: solo aplica a bases anteriores "
+                              f"(en una base nueva no hace nada)")
+            else:
+                partes.append(paso.strip() + ";")
+            partes.append("")
+    return "\n".join(partes)
+
+
+if __name__ == '__main__':
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'migrar'
+    if accion == 'sql':
+        print(exportar_sql())
+        sys.exit(0)
+
+    from conexiones import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if accion == 'estado':
+            cursor = conn.cursor()
+            asegurar_tabla(cursor)
+            aplicadas = versiones_aplicadas(cursor)
+            cursor.close()
+            for version, descripcion, _ in MIGRACIONES:
+                print(f"{'aplicada ' if version in aplicadas else 'pendiente'} {version:>3}  {descripcion}")
+        elif accion == 'verificar':
+            fallas = verificar(conn)
+            if fallas:
+                print(f"ERROR: {len(fallas)} planes caros: "
+                      + ", ".join(f"{nombre} ({tabla}: {motivo.lower()})" for nombre, tabla, motivo in fallas))
+                sys.exit(1)
+            print("ÉXITO: Ninguna consulta recorre una tabla o un índice completo ni ordena aparte una página.")
+        else:
+            nuevas = migrar(conn)
+            if nuevas:
+                print(f"ÉXITO: Esquema actualizado a la versión {VERSION_ACTUAL} (aplicadas: {nuevas}).")
+            else:
+                print(f"INFO: El esquema ya estaba en la versión {VERSION_ACTUAL}.")
+    except (mysql.connector.Error, RuntimeError) as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    finally:
+        conn.close()
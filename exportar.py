@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""Exportación de las ventas (vista desnormalizada: una fila por línea).
+
+Las filas se leen con un cursor sin buffer en lotes de FILAS_POR_LOTE y se
+escriben a medida que llegan, así la memoria no depende del rango pedido:
+- csv: texto UTF-8 (con BOM para que Excel reconozca las tildes).
+- xlsx: hojas con cadenas en línea escritas directamente en el zip (sin
+  dependencias); cada hoja lleva como máximo FILAS_POR_HOJA filas.
+- parquet: un grupo de filas por lote, comprimido con zstd (requiere pyarrow).
+GET /export usa los generadores de este módulo; la línea de comandos escribe
+snapshots Parquet particionados por mes (mes=AAAA-MM/ventas.parquet).
+Uso: python exportar.py parquet <directorio> [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+     python exportar.py csv|xlsx <archivo> [--desde ...] [--hasta ...]
+"""
+import argparse
+import csv
+import io
+import os
+import re
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+import mysql.connector
+
+
+# (columna, tipo) en el orden de la exportación
+COLUMNAS = [
+    ('id_venta', 'entero'),
+    ('fecha', 'fecha'),
+    ('documento', 'texto'),
+    ('nro_doc', 'texto'),
+    ('cont_cred', 'texto'),
+    ('medio_pago', 'texto'),
+    ('moneda', 'texto'),
+    ('tc', 'numero'),
+    ('vendedor', 'texto'),
+    ('doc_cliente', 'texto'),
+    ('cliente', 'texto'),
+    ('telefono', 'texto'),
+    ('id_detalle', 'entero'),
+    ('articulos', 'texto'),
+    ('producto', 'texto'),
+    ('categoria', 'texto'),
+    ('marca', 'texto'),
+    ('cantidad', 'numero'),
+    ('importe', 'numero'),
+    ('importe_soles', 'numero'),
+]
+
+CONSULTA_EXPORTAR = """
+SELECT
+    v.id_venta, v.fecha, v.documento, v.nro_doc, v.cont_cred, v.medio_pago, v.moneda, v.tc, v.vendedor,
+    c.doc_cliente, c.cliente, c.telefono,
+    dv.id_detalle,
+    p.nombre_original AS articulos,
+    COALESCE(pc.nombre_canonico, p.nombre_original) AS producto,
+    p.categoria, p.marca,
+    dv.cantidad, dv.importe, dv.importe_soles
+FROM ventas v
+JOIN clientes c ON v.id_cliente = c.id_cliente
+JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+JOIN productos p ON dv.id_producto = p.id_producto
+LEFT JOIN producto_canonico pc ON pc.id_producto = dv.id_producto
+WHERE v.fecha BETWEEN %s AND %s
+ORDER BY v.fecha, v.id_venta, dv.id_detalle
+"""
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+FILAS_POR_LOTE = 5000
+FILAS_POR_HOJA = 1000000
+FECHA_MINIMA = date(1900, 1, 1)
+FECHA_MAXIMA = date(9999, 12, 31)
+
+
+def leer_rango(desde, hasta):
+    """Convierte desde/hasta (AAAA-MM-DD, opcionales) en fechas. Lanza ValueError."""
+    try:
+        desde = date.fromisoformat(desde) if desde else FECHA_MINIMA
+        hasta = date.fromisoformat(hasta) if hasta else FECHA_MAXIMA
+    except ValueError:
+        raise ValueError("desde y hasta deben tener el formato AAAA-MM-DD.")
+    if desde > hasta:
+        raise ValueError("desde no puede ser posterior a hasta.")
+    return desde, hasta
+
+
+def verificar_formato(formato):
+    """Lanza ValueError si el formato no existe y RuntimeError si falta su dependencia."""
+    if formato not in FORMATOS:
+        raise ValueError(f"format debe ser uno de: {', '.join(FORMATOS)}.")
+    if formato == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("La exportación Parquet requiere el paquete pyarrow (pip install pyarrow)")
+
+
+def iterar_lotes(conn, desde, hasta, filas_por_lote=FILAS_POR_LOTE):
+    """Genera listas de filas (tuplas en el orden de COLUMNAS) con un cursor sin buffer."""
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(CONSULTA_EXPORTAR, (desde, hasta))
+        while True:
+            filas = cursor.fetchmany(filas_por_lote)
+            if not filas:
+                break
+            yield filas
+    finally:
+        # Con un cursor sin buffer hay que descartar lo no leído antes de cerrarlo
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+
+
+class _Sumidero(io.RawIOBase):
+    """Destino de escritura sin seek: acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+# --- CSV ---
+
+def _valor_csv(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return '' if valor is None else valor
+
+
+def escribir_csv(lotes):
+    """Genera el CSV en bytes, un fragmento por lote."""
+    texto = io.StringIO()
+    escritor = csv.writer(texto)
+    escritor.writerow([nombre for nombre, _ in COLUMNAS])
+    yield '\ufeff'.encode('utf-8') + texto.getvalue().encode('utf-8')
+    for filas in lotes:
+        texto.seek(0)
+        texto.truncate()
+        escritor.writerows([[_valor_csv(v) for v in fila] for fila in filas])
+        yield texto.getvalue().encode('utf-8')
+
+
+# --- XLSX ---
+
+_XLSX_TIPOS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+{hojas}</Types>"""
+
+_XLSX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_XLSX_LIBRO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>{hojas}</sheets>
+</workbook>"""
+
+_XLSX_LIBRO_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{hojas}<Relationship Id="rIdEstilos" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# Estilo 1 = formato de fecha incorporado (numFmtId 14)
+_XLSX_ESTILOS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="1"><fill><patternFill patternType="none"/></fill></fills>
+<borders count="1"><border/></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+_XLSX_INICIO_HOJA = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                     '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_XLSX_FIN_HOJA = '</sheetData></worksheet>'
+
+_EPOCA_EXCEL = date(1899, 12, 30)
+# Caracteres de control que XML no admite
+_NO_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _celda_xlsx(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, date):
+        return f'<c s="1"><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c><v>{valor}</v></c>'
+    texto = escape(_NO_XML.sub('', str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila_xlsx(valores):
+    return '<row>' + ''.join(_celda_xlsx(v) for v in valores) + '</row>'
+
+
+def escribir_xlsx(lotes, filas_por_hoja=FILAS_POR_HOJA):
+    """Genera el libro XLSX en bytes a medida que se escriben las filas.
+    El zip se escribe sin seek (descriptores de datos), y el libro y sus
+    relaciones van al final, cuando ya se sabe cuántas hojas hubo."""
+    sumidero = _Sumidero()
+    encabezado = _fila_xlsx([nombre for nombre, _ in COLUMNAS])
+    with zipfile.ZipFile(sumidero, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        hojas = 0
+        hoja = None
+        filas_hoja = 0
+        try:
+            for filas in lotes:
+                partes = []
+                for fila in filas:
+                    if hoja is None or filas_hoja == filas_por_hoja:
+                        if hoja is not None:
+                            hoja.write(''.join(partes).encode('utf-8') + _XLSX_FIN_HOJA.encode('utf-8'))
+                            hoja.close()
+                            partes = []
+                        hojas += 1
+                        hoja = libro.open(f'xl/worksheets/sheet{hojas}.xml', 'w')
+                        hoja.write((_XLSX_INICIO_HOJA + encabezado).encode('utf-8'))
+                        filas_hoja = 0
+                    partes.append(_fila_xlsx(fila))
+                    filas_hoja += 1
+                if partes:
+                    hoja.write(''.join(partes).encode('utf-8'))
+                yield sumidero.vaciar()
+            if hoja is None:
+                hojas = 1
+                hoja = libro.open('xl/worksheets/sheet1.xml', 'w')
+                hoja.write((_XLSX_INICIO_HOJA + encabezado).encode('utf-8'))
+            hoja.write(_XLSX_FIN_HOJA.encode('utf-8'))
+        finally:
+            if hoja is not None:
+                hoja.close()
+
+        numeros = range(1, hojas + 1)
+        libro.writestr('[Content_Types].xml', _XLSX_TIPOS.format(hojas=''.join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\n'
+            for n in numeros)))
+        libro.writestr('_rels/.rels', _XLSX_RELS)
+        libro.writestr('xl/styles.xml', _XLSX_ESTILOS)
+        libro.writestr('xl/workbook.xml', _XLSX_LIBRO.format(hojas=''.join(
+            f'<sheet name="Ventas{"" if n == 1 else f" {n}"}" sheetId="{n}" r:id="rId{n}"/>' for n in numeros)))
+        libro.writestr('xl/_rels/workbook.xml.rels', _XLSX_LIBRO_RELS.format(hojas=''.join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>\n' for n in numeros)))
+    yield sumidero.vaciar()
+
+
+# --- Parquet ---
+
+def esquema_arrow():
+    import pyarrow as pa
+
+    tipos = {'entero': pa.int32(), 'fecha': pa.date32(), 'texto': pa.string(), 'numero': pa.float64()}
+    return pa.schema([(nombre, tipos[tipo]) for nombre, tipo in COLUMNAS])
+
+
+def lote_arrow(filas, esquema):
+    """Convierte una lista de filas en un RecordBatch (los DECIMAL pasan a float)."""
+    import pyarrow as pa
+
+    columnas = list(zip(*filas)) if filas else [()] * len(COLUMNAS)
+    arreglos = []
+    for (nombre, tipo), valores in zip(COLUMNAS, columnas):
+        if tipo == 'numero':
+            valores = [None if v is None else float(v) for v in valores]
+        arreglos.append(pa.array(valores, type=esquema.field(nombre).type))
+    return pa.RecordBatch.from_arrays(arreglos, schema=esquema)
+
+
+def escribir_parquet(lotes):
+    """Genera el archivo Parquet en bytes: un grupo de filas por lote."""
+    import pyarrow.parquet as pq
+
+    esquema = esquema_arrow()
+    sumidero = _Sumidero()
+    escritor = pq.ParquetWriter(sumidero, esquema, compression='zstd')
+    try:
+        for filas in lotes:
+            escritor.write_batch(lote_arrow(filas, esquema))
+            yield sumidero.vaciar()
+    finally:
+        escritor.close()
+    yield sumidero.vaciar()
+
+
+ESCRITORES = {'csv': escribir_csv, 'xlsx': escribir_xlsx, 'parquet': escribir_parquet}
+
+
+def exportar_particionado(conn, directorio, desde, hasta, filas_por_lote=FILAS_POR_LOTE):
+    """Escribe un Parquet por mes en `directorio/mes=AAAA-MM/ventas.parquet`.
+    Las filas llegan ordenadas por fecha, así solo hay un archivo abierto a la vez.
+    Retorna {mes: filas}."""
+    import pyarrow.parquet as pq
+
+    esquema = esquema_arrow()
+    escritor = None
+    mes_actual = None
+    resumen = {}
+    try:
+        for filas in iterar_lotes(conn, desde, hasta, filas_por_lote):
+            # Corta el lote en tramos de un mismo mes
+            inicio = 0
+            for i in range(1, len(filas) + 1):
+                if i < len(filas) and filas[i][1].month == filas[inicio][1].month \
+                        and filas[i][1].year == filas[inicio][1].year:
+                    continue
+                tramo = filas[inicio:i]
+                inicio = i
+                mes = tramo[0][1].strftime('%Y-%m')
+                if mes != mes_actual:
+                    if escritor is not None:
+                        escritor.close()
+                    carpeta = os.path.join(directorio, f"mes={mes}")
+                    os.makedirs(carpeta, exist_ok=True)
+                    escritor = pq.ParquetWriter(os.path.join(carpeta, 'ventas.parquet.tmp'), esquema,
+                                                compression='zstd')
+                    mes_actual = mes
+                    resumen[mes] = 0
+                escritor.write_batch(lote_arrow(tramo, esquema))
+                resumen[mes] += len(tramo)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    # Los archivos se renombran al final: un snapshot cortado no reemplaza al anterior
+    for mes in resumen:
+        destino = os.path.join(directorio, f"mes={mes}", 'ventas.parquet')
+        os.replace(destino + '.tmp', destino)
+    return resumen
+
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Exporta las ventas a Parquet (por mes), CSV o XLSX.")
+    parser.add_argument('formato', choices=list(FORMATOS))
+    parser.add_argument('destino', help="directorio (parquet) o archivo (csv, xlsx)")
+    parser.add_argument('--desde', help="fecha inicial AAAA-MM-DD")
+    parser.add_argument('--hasta', help="fecha final AAAA-MM-DD")
+    args = parser.parse_args()
+    desde, hasta = leer_rango(args.desde, args.hasta)
+    verificar_formato(args.formato)
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if args.formato == 'parquet':
+            resumen = exportar_particionado(conn, args.destino, desde, hasta)
+            for mes, filas in resumen.items():
+                print(f"INFO: mes={mes}: {filas} filas.")
+            print(f"ÉXITO: {sum(resumen.values())} filas exportadas en {len(resumen)} particiones.")
+        else:
+            with open(args.destino, 'wb') as f:
+                for parte in ESCRITORES[args.formato](iterar_lotes(conn, desde, hasta)):
+                    f.write(parte)
+            print(f"ÉXITO: Ventas exportadas a {args.destino}.")
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        raise SystemExit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo).
+#
+# Modos de servicio (GUNICORN_WORKER_CLASS):
+# - sync (por defecto): cada worker atiende una petición a la vez; la
+#   concurrencia es WEB_CONCURRENCY. DB_POOL_SIZE=2 alcanza (la petición más
+#   la carga del motor analítico o el estado de una importación).
+# - gevent: cada worker atiende hasta GUNICORN_WORKER_CONNECTIONS peticiones
+#   como greenlets. Las esperas a MySQL ceden el worker (conexiones.py abre
+#   las conexiones con el driver en Python) y las peticiones que esperan la
+#   base se turnan las DB_POOL_SIZE conexiones del worker, hasta
+#   DB_POOL_TIMEOUT segundos. Requiere `pip install gevent`.
+#
+# Dimensionamiento:
+# - WEB_CONCURRENCY: 1 o 2 por núcleo con gevent (el trabajo de CPU sigue
+#   siendo de un solo núcleo por proceso); 2 por núcleo + 1 con sync.
+# - Conexiones a MySQL: WEB_CONCURRENCY x DB_POOL_SIZE + 1 por importación
+#   en curso; debe quedar por debajo de max_connections del servidor.
+# - La mayoría de las lecturas del tablero responden 304 tras una búsqueda por
+#   clave primaria (versiones.py), así pocas conexiones sirven a muchos
+#   usuarios. Con ANALITICA_MEMORIA=1 las series y el gráfico ni siquiera
+#   esperan a la base.
+# Ejemplo para una máquina de 1 vCPU y 1 GB con cientos de usuarios mirando
+# el tablero: GUNICORN_WORKER_CLASS=gevent WEB_CONCURRENCY=2
+# GUNICORN_WORKER_CONNECTIONS=500 DB_POOL_SIZE=10 (20 conexiones a MySQL).
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+
+def post_fork(server, worker):
+    """Cada worker arranca con su propio pool; no se comparten sockets con el master."""
+    from conexiones import reiniciar_pool
+    reiniciar_pool()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Importaciones del export de ventas desde la web (POST /importar).
+
+El archivo subido se guarda en disco por partes y una tarea en segundo plano
+lo carga con el mismo camino que migrar_datos.py (lectura por bloques,
+clasificación e INSERT por lotes). El avance queda en la tabla
+`importaciones`, así cualquier worker de gunicorn puede responder el estado.
+"""
+import os
+import threading
+import time
+
+import mysql.connector
+
+import registro
+from conexiones import DB_CONFIG, es_cooperativo
+
+
+DDL_IMPORTACIONES = """
+CREATE TABLE IF NOT EXISTS importaciones (
+  id_importacion INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  archivo VARCHAR(255) NOT NULL,
+  modo VARCHAR(20) NOT NULL,
+  estado VARCHAR(20) NOT NULL DEFAULT 'en_cola',
+  registros_leidos INTEGER NOT NULL DEFAULT 0,
+  filas_insertadas INTEGER NOT NULL DEFAULT 0,
+  filas_por_segundo DECIMAL(12,1) NOT NULL DEFAULT 0,
+  mensaje TEXT NULL,
+  creado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  terminado TIMESTAMP NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+MODOS = ('streaming', 'incremental')
+TAM_PARTE = 1 << 20
+
+log = registro.obtener('importaciones')
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_IMPORTACIONES)
+
+
+def guardar_subida(origen, destino):
+    """Copia un stream (cuerpo de la petición o archivo subido) a disco en
+    partes de TAM_PARTE bytes. Retorna los bytes escritos."""
+    total = 0
+    with open(destino, 'wb') as f:
+        while True:
+            parte = origen.read(TAM_PARTE)
+            if not parte:
+                return total
+            f.write(parte)
+            total += len(parte)
+
+
+def crear_importacion(conn, archivo, modo):
+    """Registra una importación en cola y retorna su id."""
+    cursor = conn.cursor()
+    try:
+        asegurar_tabla(cursor)
+        cursor.execute("INSERT INTO importaciones (archivo, modo) VALUES (%s, %s)", (archivo[:255], modo))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+
+
+def leer_importacion(conn, id_importacion):
+    """Retorna el estado de una importación como diccionario, o None."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT id_importacion, archivo, modo, estado, registros_leidos, filas_insertadas,
+                   filas_por_segundo, mensaje, creado, terminado
+            FROM importaciones WHERE id_importacion = %s
+            """,
+            (id_importacion,)
+        )
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _actualizar(conn, id_importacion, terminar=False, **campos):
+    cursor = conn.cursor()
+    try:
+        asignaciones = ", ".join([f"{campo} = %s" for campo in campos]
+                                 + (["terminado = CURRENT_TIMESTAMP"] if terminar else []))
+        cursor.execute(f"UPDATE importaciones SET {asignaciones} WHERE id_importacion = %s",
+                       list(campos.values()) + [id_importacion])
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def ejecutar_importacion(id_importacion, ruta, modo='streaming'):
+    """Carga el archivo y registra el avance. Borra el archivo al terminar."""
+    # pandas y el resto de la migración solo se cargan cuando hay una importación
+    import canonicos
+    import migrar_datos
+
+    estado = conn = None
+    inicio = time.perf_counter()
+    try:
+        estado = mysql.connector.connect(**DB_CONFIG)
+        _actualizar(estado, id_importacion, estado='procesando')
+        conn = mysql.connector.connect(**DB_CONFIG)
+
+        def progreso(leidas, insertadas, segundos):
+            _actualizar(estado, id_importacion, registros_leidos=leidas, filas_insertadas=insertadas,
+                        filas_por_segundo=round(insertadas / max(segundos, 1e-9), 1))
+
+        if modo == 'incremental':
+            nuevas, cambiadas = migrar_datos.migrar_incremental(conn, ruta)
+            if nuevas or cambiadas:
+                canonicos.agrupar_productos(conn)
+            insertadas = nuevas
+            mensaje = f"{nuevas} líneas nuevas, {cambiadas} cambiadas."
+        else:
+            # Sin LOCK TABLES ni reconstrucción: la app sigue atendiendo durante la carga
+            insertadas = migrar_datos.migrar_streaming(conn, ruta, progreso=progreso, en_linea=True)
+            if insertadas:
+                canonicos.agrupar_productos(conn)
+            mensaje = f"{insertadas} filas insertadas." if insertadas else "El archivo ya había sido importado."
+
+        segundos = time.perf_counter() - inicio
+        _actualizar(estado, id_importacion, estado='completado', filas_insertadas=insertadas,
+                    filas_por_segundo=round(insertadas / max(segundos, 1e-9), 1), mensaje=mensaje, terminar=True)
+        log.info("Importación completada", id_importacion=id_importacion, modo=modo, detalle=mensaje,
+                 segundos=round(segundos, 1))
+    except Exception as err:
+        log.error("Importación fallida", exc_info=True, id_importacion=id_importacion, error=str(err))
+        try:
+            if estado is not None:
+                _actualizar(estado, id_importacion, estado='error', mensaje=str(err)[:1000], terminar=True)
+        except mysql.connector.Error as err_estado:
+            log.error("No se pudo registrar el error de la importación", id_importacion=id_importacion,
+                      error=str(err_estado))
+    finally:
+        for c in (conn, estado):
+            if c is not None:
+                c.close()
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def iniciar_importacion(id_importacion, ruta, modo='streaming'):
+    """Lanza la importación en un hilo para no ocupar el worker que la recibió.
+    Con gevent un `threading.Thread` es un greenlet y la carga (pandas) no
+    cedería nunca el worker: se usa un hilo real del threadpool de gevent."""
+    if es_cooperativo():
+        from gevent import get_hub
+        return get_hub().threadpool.spawn(ejecutar_importacion, id_importacion, ruta, modo)
+    hilo = threading.Thread(target=ejecutar_importacion, args=(id_importacion, ruta, modo),
+                            name=f"importacion-{id_importacion}", daemon=True)
+    hilo.start()
+    return hilo
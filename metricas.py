@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Métricas de la app en el formato de texto de Prometheus (GET /metrics).
+
+- Latencia y código de estado por ruta (middleware de app.py).
+- Latencia, filas devueltas y errores por consulta con nombre: las
+  conexiones que se piden con nombre (`get_db_connection('obtener_ventas')`)
+  entregan cursores `CursorMedido`, y todo lo que se ejecuta con ellos,
+  también desde los helpers de otros módulos, cuenta para ese nombre.
+- Espera por una conexión del pool (conexiones.py).
+- Medidores que se leen al exponer: estado del pool, cachés de ids y motor
+  analítico.
+
+Las métricas viven en memoria de cada worker de gunicorn; Prometheus lee
+las del worker que atiende cada scrape (con gevent conviene WEB_CONCURRENCY
+bajo o sumar por instancia).
+"""
+import bisect
+import threading
+import time
+
+
+# Límites de las cubetas en segundos (peticiones y consultas)
+CUBETAS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=''):
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Familia:
+    """Métrica con nombre, ayuda y etiquetas; un valor por combinación de etiquetas.
+    Cada tipo define `muestras()`: las líneas de la métrica sin HELP/TYPE."""
+    tipo = 'untyped'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        return tuple(etiquetas.get(n, '') for n in self.etiquetas)
+
+    def exponer(self):
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}'] + self.muestras()
+
+
+class Contador(Familia):
+    tipo = 'counter'
+
+    def incrementar(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def muestras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}' for clave, v in valores]
+
+
+class Histograma(Familia):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(cubetas)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        i = bisect.bisect_left(self.cubetas, valor)
+        with self._lock:
+            actual = self._valores.get(clave)
+            if actual is None:
+                # [cuentas por cubeta (+Inf al final), suma, total]
+                actual = self._valores[clave] = [[0] * (len(self.cubetas) + 1), 0.0, 0]
+            actual[0][i] += 1
+            actual[1] += valor
+            actual[2] += 1
+
+    def muestras(self):
+        with self._lock:
+            valores = sorted((clave, [list(c), s, t]) for clave, (c, s, t) in self._valores.items())
+        lineas = []
+        for clave, (cuentas, suma, total) in valores:
+            acumulado = 0
+            for limite, cuenta in zip(self.cubetas + (float('inf'),), cuentas):
+                acumulado += cuenta
+                le = f'le="{_numero(limite)}"'
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {total}')
+        return lineas
+
+
+class Medidor(Familia):
+    """Valor que se calcula al exponer. `funcion` retorna un número o una
+    lista de (dict de etiquetas, valor). Con tipo='counter' expone un
+    contador que lleva otro objeto (p. ej. los aciertos de una caché)."""
+
+    def __init__(self, nombre, ayuda, funcion, etiquetas=(), tipo='gauge'):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+        self.tipo = tipo
+
+    def muestras(self):
+        resultado = self.funcion()
+        if not isinstance(resultado, list):
+            resultado = [({}, resultado)]
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, self._clave(etq))} {_numero(v)}'
+                for etq, v in resultado if v is not None]
+
+
+_registradas = []
+_registradas_lock = threading.Lock()
+
+
+def registrar(familia):
+    """Agrega una métrica a la exposición (una vez por nombre) y la retorna."""
+    with _registradas_lock:
+        for existente in _registradas:
+            if existente.nombre == familia.nombre:
+                return existente
+        _registradas.append(familia)
+    return familia
+
+
+def exponer():
+    """Texto para GET /metrics (formato de exposición 0.0.4)."""
+    lineas = []
+    for familia in list(_registradas):
+        lineas += familia.exponer()
+    return '\n'.join(lineas) + '\n'
+
+
+# --- Métricas de la app ---
+PETICIONES = registrar(Contador(
+    'reporte_http_peticiones_total', 'Peticiones atendidas por ruta, método y código de estado.',
+    ('ruta', 'metodo', 'estado')))
+PETICIONES_DURACION = registrar(Histograma(
+    'reporte_http_duracion_segundos', 'Duración de las peticiones hasta enviar el último byte.',
+    ('ruta', 'metodo')))
+CONSULTAS_DURACION = registrar(Histograma(
+    'reporte_consulta_duracion_segundos', 'Duración de cada sentencia (execute) por consulta con nombre.',
+    ('consulta',)))
+CONSULTAS_FILAS = registrar(Contador(
+    'reporte_consulta_filas_total', 'Filas leídas de los cursores por consulta con nombre.', ('consulta',)))
+CONSULTAS_ERRORES = registrar(Contador(
+    'reporte_consulta_errores_total', 'Sentencias que fallaron por consulta con nombre.', ('consulta',)))
+POOL_ESPERA = registrar(Histograma(
+    'reporte_pool_espera_segundos', 'Espera hasta obtener una conexión del pool (incluye crearla).'))
+POOL_AGOTADO = registrar(Contador(
+    'reporte_pool_agotado_total', 'Pedidos de conexión que vencieron sin conexión libre.'))
+
+
+class CursorMedido:
+    """Cursor que registra la duración de cada execute y las filas leídas
+    bajo el nombre de la consulta. El resto de atributos pasa al cursor real."""
+
+    def __init__(self, cursor, consulta):
+        self._cursor = cursor
+        self._consulta = consulta
+
+    def _medir(self, metodo, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args, **kwargs)
+        except Exception:
+            CONSULTAS_ERRORES.incrementar(consulta=self._consulta)
+            raise
+        finally:
+            CONSULTAS_DURACION.observar(time.perf_counter() - inicio, consulta=self._consulta)
+
+    def execute(self, *args, **kwargs):
+        return self._medir(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._medir(self._cursor.executemany, *args, **kwargs)
+
+    def _contar(self, filas):
+        if filas:
+            CONSULTAS_FILAS.incrementar(len(filas), consulta=self._consulta)
+        return filas
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            CONSULTAS_FILAS.incrementar(consulta=self._consulta)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        return self._contar(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._contar(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
@@ -1,17 +1,27 @@
 import pandas as pd
 import mysql.connector
 import re
-from rapidfuzz import fuzz
 import os
-import numpy as np
+import csv
+import hashlib
+import io
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import busqueda
+import canonicos
+import catalogo
+import esquema
+import resumenes
+from busqueda import reconstruir_indice
+from resumenes import reconstruir_resumen
+import versiones
+from clasificacion import REGLAS_CATEGORIA, marca_keywords, MARCAS_GENERALES, clasificar, clasificar_serie
 
 # ---------- CONFIGURACIÓN DE BASE DE DATOS ----------
-DB_CONFIG = {
-    'user': 'root',
-    'password': '',
-    'host': 'localhost',
-    'database': 'reporte'
-}
+# La misma que usan la app y /importar (DATABASE_URL o valores locales)
+from conexiones import DB_CONFIG
 
 ARCHIVO = 'Lista_Ventas_Detalle.csv'
 
@@ -21,6 +31,8 @@ def nan_to_none(value):
     return None if pd.isna(value) else value
 
 # ---------- FUNCIONES DE LIMPIEZA Y CLASIFICACIÓN (DE TU CÓDIGO ORIGINAL) ----------
+# Versión fila a fila, se conserva como referencia del motor de clasificacion.py
+# (que la migración usa) y comparte con él las tablas de palabras clave.
 def limpiar_nombre(texto):
     texto = str(texto).strip().lower()
     texto = re.sub(r'\s+', ' ', texto)
@@ -28,114 +40,901 @@ def limpiar_nombre(texto):
     return texto.strip()
 
 def clasificar_categoria(t):
-    if "mouse" in t: return "Mouse"
-    if any(k in t for k in ["laptop","notebook","bateria","pantalla","cargador","memoria para laptop","servicio a laptop"]):
-        return "Laptop y accesorios"
-    if any(k in t for k in ["tinta","cartucho","toner","impresora","cabezal","multifuncional"]):
-        return "Impresoras y consumibles"
-    if any(k in t for k in ["hdmi","vga","display port","usb","cable","adaptador","otg","patch","plug","utp"]):
-        return "Cables y conectores"
-    if any(k in t for k in ["memoria","ssd","disco","enclosure","caddy","flash","pendrive"]):
-        return "Almacenamiento"
-    if any(k in t for k in ["procesador","placa madre","case","gabinete","cooler","fuente","ram","motherboard"]):
-        return "Componentes y hardware PC"
-    if any(k in t for k in ["teclado","parlante","hub","mochila","funda","protector","kit de limpieza"]):
-        return "Periféricos y accesorios"
-    if any(k in t for k in ["camara","webcam","audifono","headset","microfono"]):
-        return "Cámaras y audio"
-    if any(k in t for k in ["licencia","office","windows","antivirus"]):
-        return "Software y licencias"
-    if any(k in t for k in ["reparacion","servicio","instalacion","mantenimiento"]):
-        return "Servicios técnicos"
+    for categoria, palabras in REGLAS_CATEGORIA:
+        if any(k in t for k in palabras):
+            return categoria
     return "Otros"
 
-marca_keywords = {
-    "Laptop y accesorios": ["hp","lenovo","asus","acer","dell","samsung","msi","gigabyte","razer","toshiba","huawei"],
-    "Mouse": ["logitech","genius","hyperx","redragon","halion","teros","microsoft","razer","hp"],
-    "Impresoras y consumibles": ["epson","canon","hp","brother","kodak"],
-    "Cámaras y audio": ["logitech","philips","sony","jbl","xiaomi","anker"]
-}
 def detectar_marca(cat, nombre):
     t = nombre.lower()
     if cat in marca_keywords:
         for kw in marca_keywords[cat]:
             if kw in t: return kw.upper()
-    for g in ["hp","lenovo","asus","acer","dell","logitech","canon","epson","brother","redragon","razer","samsung","msi"]:
+    for g in MARCAS_GENERALES:
         if g in t: return g.upper()
     return "OTROS"
 
+# ---------- LECTURA DEL CSV ----------
+COLUMNAS_CSV = [ 'fecha', 'documento', 'nro_doc', 'cont_cred', 'medio_pago',
+                 'doc_cliente', 'cliente', 'telefono', 'observacion', 'moneda',
+                 'articulos', 'dato_extra', 'cantidad', 'importe', 'tc',
+                 'importe_soles', 'vendedor' ]
+
+# Esquema explícito del export: sin inferencia de tipos por bloque (los
+# documentos conservan sus ceros a la izquierda) y categóricas para las
+# columnas de pocos valores distintos. La primera columna ('#') se descarta.
+# Las numéricas se leen como texto y se convierten en preparar_bloque: una
+# celda mal formada (p. ej. 'N/D') descarta su fila en vez de abortar la lectura.
+FILAS_ENCABEZADO = 2
+FORMATO_FECHA = '%d/%m/%Y'
+COLUMNAS_NUMERICAS = ['cantidad', 'importe', 'tc', 'importe_soles']
+COLUMNAS_CATEGORICAS = ['documento', 'medio_pago', 'moneda', 'vendedor']
+DTYPES_CSV = {
+    col: ('category' if col in COLUMNAS_CATEGORICAS else 'str')
+    for col in COLUMNAS_CSV
+}
+COLUMNAS_REQUERIDAS = ['fecha', 'articulos', 'importe_soles', 'cliente']
+
+def _verificar_archivo(archivo):
+    if not os.path.exists(archivo):
+        raise FileNotFoundError(f"No encontré el archivo '{archivo}'")
+
+def preparar_bloque(df_ventas):
+    """Convierte la fecha con el formato fijo y las columnas numéricas, y
+    descarta las filas sin los datos mínimos (también las de importe no numérico)."""
+    df_ventas['fecha'] = pd.to_datetime(df_ventas['fecha'], format=FORMATO_FECHA, errors='coerce')
+    for col in COLUMNAS_NUMERICAS:
+        df_ventas[col] = pd.to_numeric(df_ventas[col], errors='coerce')
+    return df_ventas.dropna(subset=COLUMNAS_REQUERIDAS)
+
+def leer_csv(archivo=ARCHIVO):
+    """Lee el export de ventas completo y descarta las filas sin los datos mínimos."""
+    _verificar_archivo(archivo)
+    df_ventas = pd.read_csv(archivo, skiprows=FILAS_ENCABEZADO, names=['#'] + COLUMNAS_CSV,
+                            usecols=COLUMNAS_CSV, dtype=DTYPES_CSV)
+    return preparar_bloque(df_ventas)
+
+def validar_encabezado(archivo):
+    """True si el archivo tiene el formato del export: el segundo registro es
+    la fila de títulos (#, FECHA, ...) con todas las columnas."""
+    try:
+        with open(archivo, newline='', encoding='utf-8') as f:
+            lector = csv.reader(f)
+            next(lector, None)
+            titulos = next(lector, None)
+    except (OSError, UnicodeDecodeError, csv.Error):
+        return False
+    return bool(titulos) and len(titulos) == len(COLUMNAS_CSV) + 1 and titulos[:2] == ['#', 'FECHA']
+
+def _lineas_encabezado(archivo):
+    """Líneas físicas que ocupan los registros de encabezado (el primero trae
+    saltos de línea entre comillas); pyarrow cuenta líneas, no registros."""
+    with open(archivo, newline='', encoding='utf-8') as f:
+        lector = csv.reader(f)
+        for _ in range(FILAS_ENCABEZADO):
+            next(lector, None)
+        return lector.line_num
+
+def _pyarrow_csv():
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        raise RuntimeError("El motor 'pyarrow' requiere el paquete pyarrow (pip install pyarrow)")
+    convertir = pa_csv.ConvertOptions(
+        include_columns=COLUMNAS_CSV, strings_can_be_null=True,
+        column_types={col: pa.string() for col in COLUMNAS_CSV}
+    )
+    return pa_csv, convertir
+
+def _bloques_pyarrow(archivo, filas_por_bloque):
+    pa_csv, convertir = _pyarrow_csv()
+    lector = pa_csv.open_csv(
+        archivo,
+        read_options=pa_csv.ReadOptions(skip_rows=_lineas_encabezado(archivo),
+                                        column_names=['#'] + COLUMNAS_CSV),
+        convert_options=convertir
+    )
+    # Los lotes de pyarrow se miden en bytes: se reagrupan en bloques de `filas_por_bloque` filas
+    pendientes, filas = [], 0
+    for lote in lector:
+        pendientes.append(lote.to_pandas())
+        filas += lote.num_rows
+        while filas >= filas_por_bloque:
+            junto = pd.concat(pendientes, ignore_index=True)
+            yield junto.iloc[:filas_por_bloque].astype(DTYPES_CSV)
+            pendientes, filas = [junto.iloc[filas_por_bloque:]], filas - filas_por_bloque
+    if filas:
+        yield pd.concat(pendientes, ignore_index=True).astype(DTYPES_CSV)
+
+def leer_csv_por_bloques(archivo=ARCHIVO, filas_por_bloque=20000, motor='c'):
+    """Itera el export en bloques de `filas_por_bloque` registros crudos (antes
+    de descartar filas incompletas), con memoria acotada al tamaño del bloque."""
+    _verificar_archivo(archivo)
+    if motor == 'pyarrow':
+        yield from _bloques_pyarrow(archivo, filas_por_bloque)
+        return
+    yield from pd.read_csv(archivo, skiprows=FILAS_ENCABEZADO, names=['#'] + COLUMNAS_CSV,
+                           usecols=COLUMNAS_CSV, dtype=DTYPES_CSV, chunksize=filas_por_bloque)
+
+def rangos_csv(archivo, filas_por_bloque=20000, saltar=0):
+    """Itera (registros leídos al final del bloque, inicio, fin) con los
+    desplazamientos en bytes de bloques de `filas_por_bloque` registros,
+    después del encabezado y de los `saltar` primeros registros. Solo cuenta
+    comillas por línea (un registro termina en un salto de línea fuera de
+    comillas; las líneas vacías no cuentan, como en read_csv), así el
+    proceso que reparte los bloques no convierte ningún campo."""
+    _verificar_archivo(archivo)
+    with open(archivo, 'rb') as f:
+        registros, inicio, posicion, comillas = -FILAS_ENCABEZADO, None, 0, 0
+        entregados = saltar
+        for linea in f:
+            posicion += len(linea)
+            comillas += linea.count(b'"')
+            if comillas % 2:
+                continue
+            vacia = comillas == 0 and not linea.strip()
+            comillas = 0
+            if vacia:
+                continue
+            registros += 1
+            if registros == saltar:
+                inicio = posicion
+            elif registros > saltar and (registros - saltar) % filas_por_bloque == 0:
+                yield registros, inicio, posicion
+                inicio, entregados = posicion, registros
+        if registros > entregados:
+            yield registros, inicio, posicion
+
+def leer_rango(archivo, inicio, fin, motor='c'):
+    """Lee los registros crudos entre los bytes `inicio` y `fin` (ver rangos_csv)."""
+    with open(archivo, 'rb') as f:
+        f.seek(inicio)
+        datos = io.BytesIO(f.read(fin - inicio))
+    if motor == 'pyarrow':
+        pa_csv, convertir = _pyarrow_csv()
+        tabla = pa_csv.read_csv(datos, read_options=pa_csv.ReadOptions(column_names=['#'] + COLUMNAS_CSV),
+                                convert_options=convertir)
+        return tabla.to_pandas().astype(DTYPES_CSV)
+    return pd.read_csv(datos, header=None, names=['#'] + COLUMNAS_CSV, usecols=COLUMNAS_CSV, dtype=DTYPES_CSV)
+
 # ---------- LÓGICA DE MIGRACIÓN ----------
-def migrar_datos():
+def migrar_filas(conn, df_ventas):
+    """Modo original: hasta cuatro INSERT por línea del CSV."""
+    cursor = conn.cursor()
+
+    # Diccionarios para evitar duplicados y guardar IDs; parten de lo que ya
+    # está en la base porque doc_cliente y nombre_original tienen índice único
+    clientes_db, productos_db = _mapas_existentes(cursor)
+
+    # Iterar sobre las filas del DataFrame para insertar en la DB
+    for index, row in df_ventas.iterrows():
+        # Procesar el cliente
+        doc_cliente = nan_to_none(row['doc_cliente'])
+        if doc_cliente not in clientes_db:
+            cursor.execute(
+                "INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)",
+                (doc_cliente, nan_to_none(row['cliente']), nan_to_none(row['telefono']))
+            )
+            clientes_db[doc_cliente] = cursor.lastrowid
+        id_cliente = clientes_db[doc_cliente]
+
+        # Procesar el producto (clasificación memorizada por artículo)
+        articulo = nan_to_none(row['articulos'])
+        if articulo not in productos_db:
+            articulo_limpio, categoria, marca = clasificar(articulo)
+            cursor.execute(
+                "INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca, dato_extra) VALUES (%s, %s, %s, %s, %s)",
+                (articulo, articulo_limpio, categoria, marca, nan_to_none(row['dato_extra']))
+            )
+            productos_db[articulo] = cursor.lastrowid
+        id_producto = productos_db[articulo]
+
+        # Insertar en la tabla de ventas
+        cursor.execute(
+            "INSERT INTO ventas (fecha, documento, nro_doc, cont_cred, medio_pago, observacion, moneda, tc, vendedor, id_cliente) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            (nan_to_none(row['fecha']), nan_to_none(row['documento']), nan_to_none(row['nro_doc']), nan_to_none(row['cont_cred']), nan_to_none(row['medio_pago']), nan_to_none(row['observacion']), nan_to_none(row['moneda']), nan_to_none(row['tc']), nan_to_none(row['vendedor']), id_cliente)
+        )
+        id_venta = cursor.lastrowid
+
+        # Insertar en la tabla de detalle_venta
+        cursor.execute(
+            "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe, importe_soles) VALUES (%s, %s, %s, %s, %s)",
+            (id_venta, id_producto, nan_to_none(row['cantidad']), nan_to_none(row['importe']), nan_to_none(row['importe_soles']))
+        )
+    cursor.close()
+
+def _a_filas(df, columnas):
+    """Convierte columnas de un DataFrame en tuplas de tipos nativos con None en lugar de NaN."""
+    parcial = df[columnas].astype(object)
+    return list(parcial.where(parcial.notna(), None).itertuples(index=False, name=None))
+
+def _insertar_por_lotes(cursor, sql, filas, lote):
+    """executemany por bloques; el conector los envía como un INSERT multi-fila.
+    Retorna el primer id generado de cada bloque."""
+    primeros_ids = []
+    for inicio in range(0, len(filas), lote):
+        cursor.executemany(sql, filas[inicio:inicio + lote])
+        primeros_ids.append(cursor.lastrowid)
+    return primeros_ids
+
+def _ids_nuevos(cursor, tabla, columna_id, columna_clave, id_previo):
+    """Mapea clave -> id de las filas insertadas después de `id_previo` (un solo SELECT)."""
+    cursor.execute(f"SELECT {columna_id}, {columna_clave} FROM {tabla} WHERE {columna_id} > %s", (id_previo,))
+    return {clave: id_fila for id_fila, clave in cursor.fetchall()}
+
+def _max_id(cursor, tabla, columna_id):
+    cursor.execute(f"SELECT COALESCE(MAX({columna_id}), 0) FROM {tabla}")
+    return cursor.fetchone()[0]
+
+def _resolver_dimensiones(cursor, df, clientes_db, productos_db, lote):
+    """Agrega id_cliente e id_producto a `df` (clasificado), insertando solo los
+    clientes y productos que aún no están en los mapas. `clientes_db`
+    (doc_cliente -> id) y `productos_db` (nombre_original -> id, la clave
+    única de catalogo.py, como en la app) se actualizan en el lugar. Debe
+    llamarse con las tablas bloqueadas (ver migrar_bulk)."""
+    doc_clave = df['doc_cliente'].astype(object).where(df['doc_cliente'].notna(), None)
+
+    # Clientes: uno por doc_cliente (los documentos vacíos comparten un único cliente)
+    clientes = df[[d not in clientes_db for d in doc_clave]].drop_duplicates('doc_cliente')
+    if len(clientes):
+        id_previo = _max_id(cursor, 'clientes', 'id_cliente')
+        _insertar_por_lotes(
+            cursor, "INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)",
+            _a_filas(clientes, ['doc_cliente', 'cliente', 'telefono']), lote
+        )
+        clientes_db.update(_ids_nuevos(cursor, 'clientes', 'id_cliente', 'doc_cliente', id_previo))
+
+    # Productos: uno por nombre original
+    productos = df[~df['articulos'].isin(productos_db)].drop_duplicates('articulos')
+    if len(productos):
+        id_previo = _max_id(cursor, 'productos', 'id_producto')
+        _insertar_por_lotes(
+            cursor, "INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca, dato_extra) VALUES (%s, %s, %s, %s, %s)",
+            _a_filas(productos, ['articulos', 'nombre_limpio', 'categoria', 'marca', 'dato_extra']), lote
+        )
+        productos_db.update(_ids_nuevos(cursor, 'productos', 'id_producto', 'nombre_original', id_previo))
+
+    df['id_cliente'] = [clientes_db[d] for d in doc_clave]
+    df['id_producto'] = [productos_db[a] for a in df['articulos']]
+
+def _leer_ids(cursor, consulta, marcador, claves, lote):
+    """clave -> id de las `claves` con `consulta` (que termina en IN ({marcadores})),
+    en partes de `lote` claves."""
+    ids = {}
+    for inicio in range(0, len(claves), lote):
+        parte = claves[inicio:inicio + lote]
+        cursor.execute(consulta.format(marcadores=", ".join([marcador] * len(parte))), parte)
+        ids.update(cursor.fetchall())
+    return ids
+
+def _resolver_en_linea(cursor, df, clientes_db, productos_db, lote):
+    """Como _resolver_dimensiones, pero sin bloquear tablas: inserta con
+    INSERT ... ON DUPLICATE KEY UPDATE sobre las claves únicas de catalogo.py
+    y lee los ids con un SELECT por clave, así la app y otras cargas pueden
+    escribir a la vez. Igual que catalogo.resolver_productos, los productos
+    se resuelven por nombre_original (nombre_hash) y `productos_db` va de
+    nombre_original a id."""
+    doc_clave = df['doc_cliente'].astype(object).where(df['doc_cliente'].notna(), None)
+
+    # Clientes con documento: uno por doc_cliente
+    docs = [d for d in dict.fromkeys(doc_clave) if d is not None and d not in clientes_db]
+    if docs:
+        clientes = df[df['doc_cliente'].isin(docs)].drop_duplicates('doc_cliente')
+        _insertar_por_lotes(
+            cursor,
+            "INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE id_cliente = id_cliente",
+            _a_filas(clientes, ['doc_cliente', 'cliente', 'telefono']), lote
+        )
+        clientes_db.update(_leer_ids(
+            cursor, "SELECT doc_cliente, id_cliente FROM clientes WHERE doc_cliente IN ({marcadores})",
+            "%s", docs, lote
+        ))
+    # Los documentos vacíos comparten el primer cliente sin documento, como en la carga por lotes
+    if None not in clientes_db and doc_clave.isna().any():
+        cursor.execute("SELECT MIN(id_cliente) FROM clientes WHERE doc_cliente IS NULL")
+        id_cliente = cursor.fetchone()[0]
+        if id_cliente is None:
+            cliente = df[doc_clave.isna()].iloc[[0]]
+            cursor.execute("INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)",
+                           _a_filas(cliente, ['doc_cliente', 'cliente', 'telefono'])[0])
+            id_cliente = cursor.lastrowid
+        clientes_db[None] = id_cliente
+
+    # Productos: uno por nombre original, ya clasificados
+    productos = df[~df['articulos'].isin(productos_db)].drop_duplicates('articulos')
+    if len(productos):
+        _insertar_por_lotes(
+            cursor,
+            "INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca, dato_extra) "
+            "VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE id_producto = id_producto",
+            _a_filas(productos, ['articulos', 'nombre_limpio', 'categoria', 'marca', 'dato_extra']), lote
+        )
+        productos_db.update(_leer_ids(
+            cursor, "SELECT nombre_original, id_producto FROM productos WHERE nombre_hash IN ({marcadores})",
+            "SHA1(%s)", productos['articulos'].tolist(), lote
+        ))
+
+    df['id_cliente'] = [clientes_db[d] for d in doc_clave]
+    df['id_producto'] = [productos_db[a] for a in df['articulos']]
+
+def _cargar_bloque(cursor, df_ventas, clientes_db, productos_db, lote, paso, en_linea=False):
+    """Inserta un bloque ya limpio y retorna los id_venta generados, uno por
+    fila. Los mapas de clientes y productos se mantienen entre bloques (ver
+    _resolver_dimensiones), así los bloques siguientes solo insertan los nuevos.
+    Si el bloque ya trae nombre_limpio/categoria/marca no se vuelve a clasificar.
+    Con `en_linea` las dimensiones se resuelven sin bloquear tablas
+    (_resolver_en_linea); con `paso` None las ventas se insertan de a una
+    porque el servidor no garantiza ids consecutivos (ver _paso_en_linea)."""
+    df = df_ventas.copy()
+    if 'nombre_limpio' not in df:
+        df[['nombre_limpio', 'categoria', 'marca']] = clasificar_serie(df['articulos'])
+    if en_linea:
+        _resolver_en_linea(cursor, df, clientes_db, productos_db, lote)
+    else:
+        _resolver_dimensiones(cursor, df, clientes_db, productos_db, lote)
+
+    # Ventas: una por línea del CSV, igual que el modo por filas
+    sql_venta = "INSERT INTO ventas (fecha, documento, nro_doc, cont_cred, medio_pago, observacion, moneda, tc, vendedor, id_cliente) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    filas_ventas = _a_filas(df, ['fecha', 'documento', 'nro_doc', 'cont_cred', 'medio_pago',
+                                 'observacion', 'moneda', 'tc', 'vendedor', 'id_cliente'])
+    ids_venta = []
+    if paso is None:
+        for fila in filas_ventas:
+            cursor.execute(sql_venta, fila)
+            ids_venta.append(cursor.lastrowid)
+    else:
+        primeros_ids = _insertar_por_lotes(cursor, sql_venta, filas_ventas, lote)
+        for n, primero in enumerate(primeros_ids):
+            tam = min(lote, len(filas_ventas) - n * lote)
+            ids_venta.extend(primero + i * paso for i in range(tam))
+
+    # Detalle: una línea por venta
+    df['id_venta'] = ids_venta
+    _insertar_por_lotes(
+        cursor, "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe, importe_soles) VALUES (%s, %s, %s, %s, %s)",
+        _a_filas(df, ['id_venta', 'id_producto', 'cantidad', 'importe', 'importe_soles']), lote
+    )
+    return ids_venta
+
+TABLAS_CARGA = "clientes WRITE, productos WRITE, ventas WRITE, detalle_venta WRITE"
+
+def _paso_autoincremento(cursor):
+    cursor.execute("SELECT @@auto_increment_increment")
+    return cursor.fetchone()[0]
+
+def _paso_en_linea(cursor):
+    """Paso entre los ids de un INSERT multi-fila sin LOCK TABLES: con
+    innodb_autoinc_lock_mode 0 o 1 un INSERT simple recibe ids consecutivos;
+    con 2 (el valor por defecto de MySQL 8) puede intercalarse con otros y
+    se retorna None."""
+    cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+    if int(cursor.fetchone()[0]) > 1:
+        return None
+    return _paso_autoincremento(cursor)
+
+def _aplicar_bloque(conn, ids_venta, lote):
+    """Suma al resumen e indexa las ventas recién insertadas de un bloque, en
+    la misma transacción que las insertó."""
+    for inicio in range(0, len(ids_venta), lote):
+        parte = ids_venta[inicio:inicio + lote]
+        resumenes.sumar_ventas(conn, parte)
+        busqueda.indexar_ventas(conn, parte)
+
+def migrar_bulk(conn, df_ventas, lote=1000):
+    """Modo por lotes: deduplica clientes y productos en pandas, los inserta
+    con INSERT multi-fila y recupera sus ids con un SELECT por tabla; luego
+    inserta ventas y detalle en bloques de `lote` filas.
+    Las tablas se bloquean durante la carga para que los ids de cada bloque
+    sean consecutivos y puedan derivarse de `lastrowid`."""
+    cursor = conn.cursor()
+    paso = _paso_autoincremento(cursor)
+    cursor.execute("LOCK TABLES " + TABLAS_CARGA)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        print("✅ Conexión a la base de datos para migración exitosa.")
+        _cargar_bloque(cursor, df_ventas, *_mapas_existentes(cursor), lote, paso)
+        # UNLOCK TABLES confirma la transacción de forma implícita: se hace
+        # commit (o rollback si algo falló) antes de liberar los bloqueos
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("UNLOCK TABLES")
+        cursor.close()
 
-        # Cargar el archivo CSV
-        if not os.path.exists(ARCHIVO):
-            raise FileNotFoundError(f"No encontré el archivo '{ARCHIVO}'")
+# ---------- CARGA POR BLOQUES CON CHECKPOINT ----------
+# Un checkpoint por archivo (identificado por el hash de su contenido): cuántos
+# registros crudos del CSV ya quedaron confirmados. Se actualiza en la misma
+# transacción que cada bloque, así tras una caída se retoma sin duplicar ni perder filas.
+DDL_CHECKPOINT = """
+CREATE TABLE IF NOT EXISTS migracion_checkpoint (
+  firma CHAR(64) NOT NULL PRIMARY KEY,
+  archivo VARCHAR(255) NOT NULL,
+  filas_leidas BIGINT NOT NULL DEFAULT 0,
+  completado TINYINT(1) NOT NULL DEFAULT 0,
+  actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
 
-        cols = [ 'fecha', 'documento', 'nro_doc', 'cont_cred', 'medio_pago',
-                 'doc_cliente', 'cliente', 'telefono', 'observacion', 'moneda',
-                 'articulos', 'dato_extra', 'cantidad', 'importe', 'tc',
-                 'importe_soles', 'vendedor' ]
-        df_ventas = pd.read_csv(ARCHIVO, skiprows=2, names=cols)
-
-        # Pre-procesamiento de datos (similar a tu script)
-        df_ventas['fecha'] = pd.to_datetime(df_ventas['fecha'], dayfirst=True, errors='coerce')
-        df_ventas['cantidad'] = pd.to_numeric(df_ventas['cantidad'], errors='coerce')
-        df_ventas['importe_soles'] = pd.to_numeric(df_ventas['importe_soles'], errors='coerce')
-        
-        # EL CAMBIO CRUCIAL: Añadir 'cliente' a la lista de columnas requeridas
-        df_ventas = df_ventas.dropna(subset=['fecha', 'articulos', 'importe_soles', 'cliente'])
-        
-        # Diccionarios para evitar duplicados y guardar IDs
-        clientes_db = {}
-        productos_db = {}
-        
-        # Iterar sobre las filas del DataFrame para insertar en la DB
-        print("Iniciando la migración de datos...")
-        for index, row in df_ventas.iterrows():
-            # Procesar el cliente
-            doc_cliente = nan_to_none(row['doc_cliente'])
-            if doc_cliente not in clientes_db:
+def hash_archivo(archivo, tam_bloque=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(archivo, 'rb') as f:
+        for parte in iter(lambda: f.read(tam_bloque), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+def leer_checkpoint(cursor, firma):
+    """Retorna (filas_leidas, completado) del archivo; (0, False) si es nuevo."""
+    cursor.execute("SELECT filas_leidas, completado FROM migracion_checkpoint WHERE firma = %s", (firma,))
+    fila = cursor.fetchone()
+    return (fila[0], bool(fila[1])) if fila else (0, False)
+
+def _guardar_checkpoint(cursor, firma, archivo, filas_leidas, completado=False):
+    cursor.execute(
+        """
+        INSERT INTO migracion_checkpoint (firma, archivo, filas_leidas, completado)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE archivo = VALUES(archivo), filas_leidas = VALUES(filas_leidas),
+            completado = VALUES(completado)
+        """,
+        (firma, os.path.basename(archivo)[:255], filas_leidas, int(completado))
+    )
+
+def _mapas_existentes(cursor):
+    """Mapas doc_cliente -> id y nombre_original -> id de lo que ya está en la base."""
+    cursor.execute("SELECT doc_cliente, id_cliente FROM clientes")
+    clientes_db = dict(cursor.fetchall())
+    cursor.execute("SELECT nombre_original, id_producto FROM productos")
+    productos_db = dict(cursor.fetchall())
+    return clientes_db, productos_db
+
+def preparar_y_clasificar(bloque):
+    """Etapa de CPU de un bloque crudo: limpieza y clasificación."""
+    inicio = time.perf_counter()
+    df = preparar_bloque(bloque)
+    df[['nombre_limpio', 'categoria', 'marca']] = clasificar_serie(df['articulos'])
+    return df, time.perf_counter() - inicio
+
+def preparar_rango(archivo, inicio, fin, motor='c'):
+    """Lectura, limpieza y clasificación de un rango de bytes del archivo. Es
+    una función de módulo para ejecutarse en los procesos del pipeline: cada
+    proceso lee su rango y solo el DataFrame preparado vuelve al escritor."""
+    comienzo = time.perf_counter()
+    df, _ = preparar_y_clasificar(leer_rango(archivo, inicio, fin, motor))
+    return df, time.perf_counter() - comienzo
+
+def _bloques_pendientes(archivo, filas_por_bloque, motor, hechas):
+    """Itera (registros leídos al final del bloque, bloque crudo), saltando los
+    `hechas` primeros registros ya confirmados."""
+    leidas = 0
+    for bloque in leer_csv_por_bloques(archivo, filas_por_bloque, motor):
+        inicio_bloque, leidas = leidas, leidas + len(bloque)
+        if leidas <= hechas:
+            continue
+        if inicio_bloque < hechas:
+            bloque = bloque.iloc[hechas - inicio_bloque:]
+        yield leidas, bloque
+
+def _preparar_en_serie(pendientes, estadisticas):
+    for leidas, bloque in pendientes:
+        df, segundos = preparar_y_clasificar(bloque)
+        estadisticas['clasificacion'] += segundos
+        yield leidas, df
+
+def _preparar_en_paralelo(archivo, rangos, workers, motor, estadisticas):
+    """Lee y clasifica los rangos de bytes en `workers` procesos y entrega
+    los bloques en el orden del archivo. Como mucho hay `2 * workers`
+    bloques en vuelo: con la ventana llena no se reparten más rangos hasta
+    que el escritor consuma el bloque más antiguo (contrapresión), así la
+    memoria no crece si la base es más lenta que la clasificación."""
+    ventana = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vuelo = deque()
+        for leidas, inicio, fin in rangos:
+            en_vuelo.append((leidas, pool.submit(preparar_rango, archivo, inicio, fin, motor)))
+            if len(en_vuelo) >= ventana:
+                yield _resultado_en_orden(en_vuelo.popleft(), estadisticas, 'ventana_llena')
+        while en_vuelo:
+            yield _resultado_en_orden(en_vuelo.popleft(), estadisticas)
+
+def _resultado_en_orden(pendiente, estadisticas, espera=None):
+    """Espera el bloque más antiguo; con `espera` también suma a esa
+    estadística el tiempo que el escritor quedó bloqueado."""
+    leidas, futuro = pendiente
+    inicio = time.perf_counter()
+    df, segundos = futuro.result()
+    bloqueado = time.perf_counter() - inicio
+    estadisticas['espera_trabajadores'] += bloqueado
+    if espera:
+        estadisticas[espera] += bloqueado
+    estadisticas['clasificacion'] += segundos
+    return leidas, df
+
+def _reportar_pipeline(estadisticas, insertadas, workers, segundos):
+    print(f"INFO: Pipeline con {workers} proceso(s): {insertadas} filas en {segundos:.2f} s "
+          f"({insertadas / max(segundos, 1e-9):,.0f} filas/s).")
+    print(f"INFO:   clasificación {estadisticas['clasificacion']:.2f} s de CPU "
+          f"({insertadas / max(estadisticas['clasificacion'], 1e-9):,.0f} filas/s por proceso), "
+          f"escritura {estadisticas['escritura']:.2f} s.")
+    if workers > 1:
+        # Si el escritor casi no espera con la ventana llena, el cuello de botella es la base
+        print(f"INFO:   el escritor esperó {estadisticas['espera_trabajadores']:.2f} s a los procesos, "
+              f"{estadisticas['ventana_llena']:.2f} s de ellos con la ventana llena.")
+
+def migrar_streaming(conn, archivo=ARCHIVO, filas_por_bloque=20000, lote=1000, motor='c',
+                     reiniciar=False, workers=1, progreso=None, en_linea=False):
+    """Modo por bloques: lee el CSV en bloques de `filas_por_bloque` registros
+    y confirma cada uno junto con el checkpoint. Si el archivo ya se había
+    empezado a migrar, salta los registros confirmados; `reiniciar` ignora el
+    checkpoint. Con `workers` > 1 la lectura, limpieza y clasificación corren en un
+    pool de procesos y esta conexión es el único escritor: conserva los mapas
+    de ids e inserta los bloques en el orden del archivo.
+    Sin `en_linea` cada bloque bloquea las tablas y al terminar hay que llamar
+    a finalizar_migracion. Con `en_linea` (importaciones con la app en marcha)
+    no se bloquea ninguna tabla: clientes y productos se resuelven por clave
+    única, cada bloque suma su aporte a los resúmenes y se indexa en su misma
+    transacción, y al final solo se incrementa la versión de datos.
+    `progreso(leidas, insertadas, segundos)` se llama tras confirmar cada bloque.
+    Retorna el número de filas válidas insertadas."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(DDL_CHECKPOINT)
+        if en_linea:
+            resumenes.asegurar_tabla(cursor)
+            busqueda.asegurar_tabla(cursor)
+            versiones.asegurar_tabla(cursor)
+            catalogo.asegurar_claves(cursor)
+        firma = hash_archivo(archivo)
+        hechas, completado = (0, False) if reiniciar else leer_checkpoint(cursor, firma)
+        if completado:
+            print(f"INFO: '{archivo}' ya fue migrado por completo (checkpoint {firma[:12]}); usa --reiniciar para volver a cargarlo.")
+            return 0
+        if hechas:
+            print(f"INFO: Retomando '{archivo}' desde el registro {hechas}.")
+        if en_linea:
+            # Los mapas solo guardan lo que resolvió esta carga
+            clientes_db, productos_db = {}, {}
+            paso = _paso_en_linea(cursor)
+        else:
+            # Los clientes y productos ya existentes (de bloques confirmados o de
+            # otras cargas) se reutilizan: doc_cliente y nombre_original son únicos
+            clientes_db, productos_db = _mapas_existentes(cursor)
+            paso = _paso_autoincremento(cursor)
+
+        estadisticas = {'clasificacion': 0.0, 'escritura': 0.0, 'espera_trabajadores': 0.0, 'ventana_llena': 0.0}
+        if workers > 1:
+            # Los procesos leen su propio rango: aquí solo se ubican los límites de los bloques
+            rangos = rangos_csv(archivo, filas_por_bloque, hechas)
+            preparados = _preparar_en_paralelo(archivo, rangos, workers, motor, estadisticas)
+        else:
+            preparados = _preparar_en_serie(_bloques_pendientes(archivo, filas_por_bloque, motor, hechas),
+                                            estadisticas)
+
+        inicio = time.perf_counter()
+        leidas, insertadas = hechas, 0
+        for leidas, df in preparados:
+            inicio_escritura = time.perf_counter()
+            if not en_linea:
+                cursor.execute("LOCK TABLES " + TABLAS_CARGA + ", migracion_checkpoint WRITE")
+            try:
+                if len(df):
+                    ids_venta = _cargar_bloque(cursor, df, clientes_db, productos_db, lote, paso, en_linea)
+                    if en_linea:
+                        _aplicar_bloque(conn, ids_venta, lote)
+                _guardar_checkpoint(cursor, firma, archivo, leidas)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                if not en_linea:
+                    cursor.execute("UNLOCK TABLES")
+            estadisticas['escritura'] += time.perf_counter() - inicio_escritura
+            insertadas += len(df)
+            print(f"INFO: Bloque confirmado: {leidas} registros leídos, {insertadas} filas insertadas.")
+            if progreso:
+                progreso(leidas, insertadas, time.perf_counter() - inicio)
+
+        _guardar_checkpoint(cursor, firma, archivo, leidas, completado=True)
+        if en_linea and insertadas:
+            # Solo ventas nuevas: la app y el motor analítico las suman sin recargar
+            versiones.incrementar_version(conn)
+        conn.commit()
+        _reportar_pipeline(estadisticas, insertadas, workers, time.perf_counter() - inicio)
+        return insertadas
+    finally:
+        cursor.close()
+
+# ---------- CARGA INCREMENTAL ----------
+# Cada línea del CSV se identifica por su clave natural (documento, nro_doc,
+# artículo y número de aparición de ese artículo en el documento) y guarda un
+# hash de su contenido. `migracion_archivos` es el manifiesto de exports ya
+# cargados; su fecha máxima es la marca de agua: solo se comparan las líneas
+# desde `margen_dias` antes de esa fecha, así el costo en la base crece con
+# los datos nuevos y no con el histórico.
+DDL_LINEAS = """
+CREATE TABLE IF NOT EXISTS migracion_lineas (
+  clave CHAR(40) NOT NULL PRIMARY KEY,
+  hash_contenido CHAR(40) NOT NULL,
+  id_venta INTEGER NOT NULL,
+  fecha DATE NOT NULL,
+  aplicado TINYINT(1) NOT NULL DEFAULT 0,
+  KEY idx_migracion_lineas_venta (id_venta),
+  KEY idx_migracion_lineas_aplicado (aplicado)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_ARCHIVOS = """
+CREATE TABLE IF NOT EXISTS migracion_archivos (
+  firma CHAR(64) NOT NULL PRIMARY KEY,
+  archivo VARCHAR(255) NOT NULL,
+  filas INTEGER NOT NULL,
+  nuevas INTEGER NOT NULL,
+  cambiadas INTEGER NOT NULL,
+  fecha_max DATE NULL,
+  cargado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+SEPARADOR = '\x1f'
+
+def _hash_filas(partes):
+    """SHA-1 de cada fila a partir de columnas de texto ya alineadas."""
+    unidas = partes[0]
+    for parte in partes[1:]:
+        unidas = unidas + SEPARADOR + parte
+    return [hashlib.sha1(t.encode('utf-8')).hexdigest() for t in unidas]
+
+def claves_lineas(df):
+    """Clave natural y hash de contenido de cada línea (en el orden del archivo)."""
+    texto = {col: df[col].astype(object).where(df[col].notna(), '').astype(str) for col in COLUMNAS_CSV}
+    ocurrencia = df.groupby(['documento', 'nro_doc', 'articulos'], observed=True, dropna=False).cumcount()
+    claves = _hash_filas([texto['documento'], texto['nro_doc'], texto['articulos'], ocurrencia.astype(str)])
+    texto['fecha'] = df['fecha'].dt.strftime(FORMATO_FECHA)
+    return claves, _hash_filas([texto[col] for col in COLUMNAS_CSV])
+
+def _lineas_existentes(cursor, claves, lote):
+    """clave -> (hash_contenido, id_venta) de las claves que ya están en la base."""
+    existentes = {}
+    for inicio in range(0, len(claves), lote):
+        parte = claves[inicio:inicio + lote]
+        cursor.execute(
+            "SELECT clave, hash_contenido, id_venta FROM migracion_lineas WHERE clave IN ("
+            + ", ".join(["%s"] * len(parte)) + ")", parte
+        )
+        existentes.update((clave, (h, id_venta)) for clave, h, id_venta in cursor.fetchall())
+    return existentes
+
+def _aplicar_pendientes(conn, cursor, lote):
+    """Suma al resumen e indexa las ventas nuevas aún no aplicadas (incluidas
+    las de una corrida anterior que se cortó entre las dos fases), con un
+    INSERT ... SELECT por resumen cada `lote` ventas (ver _aplicar_bloque)."""
+    cursor.execute("SELECT DISTINCT id_venta FROM migracion_lineas WHERE aplicado = 0 ORDER BY id_venta")
+    ids = [fila[0] for fila in cursor.fetchall()]
+    _aplicar_bloque(conn, ids, lote)
+    if ids:
+        cursor.execute("UPDATE migracion_lineas SET aplicado = 1 WHERE aplicado = 0")
+    return len(ids)
+
+# Líneas de las ventas ya cargadas con las columnas del export, en el orden de carga
+CONSULTA_LINEAS_CARGADAS = """
+SELECT
+    v.id_venta, v.fecha, v.documento, v.nro_doc, v.cont_cred, v.medio_pago,
+    c.doc_cliente, c.cliente, c.telefono, v.observacion, v.moneda,
+    p.nombre_original AS articulos, p.dato_extra, dv.cantidad, dv.importe, v.tc,
+    dv.importe_soles, v.vendedor
+FROM ventas v
+JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+LEFT JOIN clientes c ON v.id_cliente = c.id_cliente
+JOIN productos p ON dv.id_producto = p.id_producto
+ORDER BY v.id_venta, dv.id_detalle
+"""
+
+def sembrar_lineas(conn, cursor, lote=1000):
+    """Registra en migracion_lineas las ventas de una base cargada con otro
+    modo (bulk, streaming o la app), ya aplicadas al resumen y al índice, así
+    el modo incremental puede seguir sobre ella. La clave se arma con los
+    datos de la base; las líneas cuyo contenido no coincida exactamente con
+    el del export (teléfono u otro dato del cliente) se actualizan como
+    cambiadas en la primera carga. Retorna las líneas registradas."""
+    cursor.execute(CONSULTA_LINEAS_CARGADAS)
+    df = pd.DataFrame(cursor.fetchall(), columns=['id_venta'] + COLUMNAS_CSV)
+    if not len(df):
+        return 0
+    # Mismos tipos que leer_csv, para que el hash de contenido se forme igual
+    df[COLUMNAS_NUMERICAS] = df[COLUMNAS_NUMERICAS].astype('float64')
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    claves, hashes = claves_lineas(df)
+    filas = [(clave, h, int(id_venta), fecha.date())
+             for clave, h, id_venta, fecha in zip(claves, hashes, df['id_venta'], df['fecha'])]
+    for inicio in range(0, len(filas), lote):
+        cursor.executemany(
+            "INSERT IGNORE INTO migracion_lineas (clave, hash_contenido, id_venta, fecha, aplicado) VALUES (%s, %s, %s, %s, 1)",
+            filas[inicio:inicio + lote]
+        )
+    conn.commit()
+    return len(filas)
+
+def migrar_incremental(conn, archivo=ARCHIVO, margen_dias=31, lote=1000, completo=False):
+    """Carga solo las líneas nuevas o cambiadas del export.
+
+    Si la base ya tiene ventas cargadas con otro modo, primero registra sus
+    líneas (sembrar_lineas).
+    Fase 1 (sin bloquear tablas, como migrar_streaming en línea): inserta
+    clientes/productos nuevos y las ventas nuevas, registrándolas en
+    migracion_lineas como pendientes.
+    Fase 2 (una transacción): aplica las pendientes al resumen y al índice de
+    búsqueda, actualiza las líneas cambiadas restando y sumando su aporte,
+    registra el archivo en el manifiesto e incrementa la versión de datos.
+    `completo` compara todas las líneas sin usar la marca de agua.
+    Retorna (nuevas, cambiadas)."""
+    cursor = conn.cursor()
+    try:
+        for ddl in (DDL_LINEAS, DDL_ARCHIVOS):
+            cursor.execute(ddl)
+        resumenes.asegurar_tabla(cursor)
+        busqueda.asegurar_tabla(cursor)
+        canonicos.asegurar_tabla(cursor)
+        versiones.asegurar_tabla(cursor)
+        catalogo.asegurar_claves(cursor)
+        conn.commit()
+
+        firma = hash_archivo(archivo)
+        cursor.execute("SELECT cargado FROM migracion_archivos WHERE firma = %s", (firma,))
+        fila = cursor.fetchone()
+        if fila:
+            print(f"INFO: '{archivo}' ya fue cargado el {fila[0]} (firma {firma[:12]}); no hay cambios.")
+            return 0, 0
+
+        cursor.execute("SELECT COUNT(*) FROM migracion_lineas")
+        sin_lineas = cursor.fetchone()[0] == 0
+        if sin_lineas and _max_id(cursor, 'ventas', 'id_venta'):
+            sembradas = sembrar_lineas(conn, cursor, lote)
+            print(f"INFO: La base tenía ventas cargadas sin el modo incremental: {sembradas} líneas registradas.")
+
+        df = leer_csv(archivo)
+        df['clave'], df['hash_contenido'] = claves_lineas(df)
+        cursor.execute("SELECT MAX(fecha_max) FROM migracion_archivos")
+        marca_agua = cursor.fetchone()[0]
+        if marca_agua is not None and not completo:
+            corte = pd.Timestamp(marca_agua) - pd.Timedelta(days=margen_dias)
+            df = df[df['fecha'] >= corte]
+            print(f"INFO: Marca de agua {marca_agua}: se comparan {len(df)} líneas desde {corte.date()}.")
+
+        existentes = _lineas_existentes(cursor, df['clave'].tolist(), lote)
+        registrada = df['clave'].map(lambda c: c in existentes)
+        nuevas = df[~registrada].copy()
+        cambiadas = df[registrada & (df['clave'].map(lambda c: existentes.get(c, (None,))[0]) != df['hash_contenido'])].copy()
+        cambiadas['id_venta'] = [existentes[c][1] for c in cambiadas['clave']]
+        print(f"INFO: {len(nuevas)} líneas nuevas y {len(cambiadas)} cambiadas.")
+
+        # Fase 1: clientes y productos por clave única, sin bloquear tablas
+        if len(nuevas) or len(cambiadas):
+            clientes_db, productos_db = {}, {}
+            paso = _paso_en_linea(cursor)
+            try:
+                if len(cambiadas):
+                    cambiadas[['nombre_limpio', 'categoria', 'marca']] = clasificar_serie(cambiadas['articulos'])
+                    _resolver_en_linea(cursor, cambiadas, clientes_db, productos_db, lote)
+                if len(nuevas):
+                    ids_venta = _cargar_bloque(cursor, nuevas, clientes_db, productos_db, lote, paso, en_linea=True)
+                    filas = [(clave, h, id_venta, fecha.date())
+                             for clave, h, id_venta, fecha in zip(nuevas['clave'], nuevas['hash_contenido'],
+                                                                  ids_venta, nuevas['fecha'])]
+                    for inicio in range(0, len(filas), lote):
+                        cursor.executemany(
+                            "INSERT INTO migracion_lineas (clave, hash_contenido, id_venta, fecha, aplicado) VALUES (%s, %s, %s, %s, 0)",
+                            filas[inicio:inicio + lote]
+                        )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        # Fase 2: resumen, índice, líneas cambiadas y manifiesto en una sola transacción
+        try:
+            _aplicar_pendientes(conn, cursor, lote)
+            for fila in cambiadas.astype(object).where(cambiadas.notna(), None).itertuples(index=False):
+                resumenes.restar_venta(conn, fila.id_venta)
                 cursor.execute(
-                    "INSERT INTO clientes (doc_cliente, cliente, telefono) VALUES (%s, %s, %s)",
-                    (doc_cliente, nan_to_none(row['cliente']), nan_to_none(row['telefono']))
+                    "UPDATE ventas SET fecha = %s, cont_cred = %s, medio_pago = %s, observacion = %s, moneda = %s, tc = %s, vendedor = %s, id_cliente = %s WHERE id_venta = %s",
+                    (fila.fecha, fila.cont_cred, fila.medio_pago, fila.observacion, fila.moneda, fila.tc,
+                     fila.vendedor, fila.id_cliente, fila.id_venta)
                 )
-                clientes_db[doc_cliente] = cursor.lastrowid
-            id_cliente = clientes_db[doc_cliente]
-
-            # Procesar el producto
-            articulo_limpio = limpiar_nombre(nan_to_none(row['articulos']))
-            if articulo_limpio not in productos_db:
-                categoria = clasificar_categoria(articulo_limpio)
-                marca = detectar_marca(categoria, articulo_limpio)
                 cursor.execute(
-                    "INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca, dato_extra) VALUES (%s, %s, %s, %s, %s)",
-                    (nan_to_none(row['articulos']), articulo_limpio, categoria, marca, nan_to_none(row['dato_extra']))
+                    "UPDATE detalle_venta SET id_producto = %s, cantidad = %s, importe = %s, importe_soles = %s WHERE id_venta = %s",
+                    (fila.id_producto, fila.cantidad, fila.importe, fila.importe_soles, fila.id_venta)
                 )
-                productos_db[articulo_limpio] = cursor.lastrowid
-            id_producto = productos_db[articulo_limpio]
-
-            # Insertar en la tabla de ventas
-            cursor.execute(
-                "INSERT INTO ventas (fecha, documento, nro_doc, cont_cred, medio_pago, observacion, moneda, tc, vendedor, id_cliente) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
-                (nan_to_none(row['fecha']), nan_to_none(row['documento']), nan_to_none(row['nro_doc']), nan_to_none(row['cont_cred']), nan_to_none(row['medio_pago']), nan_to_none(row['observacion']), nan_to_none(row['moneda']), nan_to_none(row['tc']), nan_to_none(row['vendedor']), id_cliente)
-            )
-            id_venta = cursor.lastrowid
-            
-            # Insertar en la tabla de detalle_venta
+                resumenes.sumar_venta(conn, fila.id_venta)
+                busqueda.indexar_venta(conn, fila.id_venta)
+                cursor.execute(
+                    """
+                    INSERT INTO migracion_lineas (clave, hash_contenido, id_venta, fecha, aplicado)
+                    VALUES (%s, %s, %s, %s, 1)
+                    ON DUPLICATE KEY UPDATE hash_contenido = VALUES(hash_contenido), fecha = VALUES(fecha)
+                    """,
+                    (fila.clave, fila.hash_contenido, fila.id_venta, fila.fecha.date())
+                )
+            fecha_max = df['fecha'].max()
             cursor.execute(
-                "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe, importe_soles) VALUES (%s, %s, %s, %s, %s)",
-                (id_venta, id_producto, nan_to_none(row['cantidad']), nan_to_none(row['importe']), nan_to_none(row['importe_soles']))
+                "INSERT INTO migracion_archivos (firma, archivo, filas, nuevas, cambiadas, fecha_max) VALUES (%s, %s, %s, %s, %s, %s)",
+                (firma, os.path.basename(archivo)[:255], len(df), len(nuevas), len(cambiadas),
+                 None if pd.isna(fecha_max) else fecha_max.date())
             )
+            if len(nuevas) or len(cambiadas):
+                versiones.incrementar_version(conn, edicion=bool(len(cambiadas)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return len(nuevas), len(cambiadas)
+    finally:
+        cursor.close()
+
+def finalizar_migracion(conn):
+    """Pasos posteriores a una carga completa o por bloques."""
+    cursor = conn.cursor()
+    try:
+        # Índices únicos con los que la app resuelve clientes y productos
+        catalogo.asegurar_claves(cursor)
+
+        # Regenera el índice de búsqueda y el resumen por vendedor con las ventas migradas
+        reconstruir_indice(conn)
+        reconstruir_resumen(conn)
+        # Agrupa las variantes por número de serie en productos canónicos
+        canonicos.agrupar_productos(conn)
+
+        # Invalida las cachés de lectura (reporte, gráfico) de la app
+        versiones.asegurar_tabla(cursor)
+        versiones.incrementar_version(conn)
+        conn.commit()
+    finally:
+        cursor.close()
 
+def migrar_datos(archivo=ARCHIVO, modo='bulk', lote=1000, filas_por_bloque=20000, motor='c', reiniciar=False,
+                 workers=1, margen_dias=31, completo=False):
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        print("✅ Conexión a la base de datos para migración exitosa.")
+
+        # Crea las tablas e índices que falten antes de cargar
+        esquema.migrar(conn)
+
+        print(f"Iniciando la migración de datos (modo {modo})...")
+        inicio = time.perf_counter()
+        if modo == 'incremental':
+            # Mantiene resumen, índice y versión por venta: no hace falta reconstruirlos
+            nuevas, cambiadas = migrar_incremental(conn, archivo, margen_dias, lote, completo)
+            if nuevas or cambiadas:
+                canonicos.agrupar_productos(conn)
+            segundos = time.perf_counter() - inicio
+            print(f"✅ Migración incremental completada en {segundos:.2f} s: "
+                  f"{nuevas} líneas nuevas, {cambiadas} cambiadas.")
+            return
+        if modo == 'streaming':
+            procesadas = migrar_streaming(conn, archivo, filas_por_bloque, lote, motor, reiniciar, workers)
+        else:
+            # Cargar el archivo CSV completo
+            df_ventas = leer_csv(archivo)
+            procesadas = len(df_ventas)
+            if modo == 'filas':
+                migrar_filas(conn, df_ventas)
+            else:
+                migrar_bulk(conn, df_ventas, lote)
         conn.commit()
-        print(f"✅ Migración completada. Se procesaron {len(df_ventas)} registros.")
+        segundos = time.perf_counter() - inicio
+        print(f"✅ Migración completada. Se procesaron {procesadas} registros "
+              f"en {segundos:.2f} s ({procesadas / max(segundos, 1e-9):,.0f} filas/s).")
+
+        finalizar_migracion(conn)
 
     except mysql.connector.Error as err:
         print(f"Error en la migración a MySQL: {err}")
+    except RuntimeError as err:
+        print(f"ERROR: {err}")
     finally:
         if 'conn' in locals() and conn.is_connected():
             cursor.close()
@@ -143,4 +942,22 @@ def migrar_datos():
             print("Cerrando la conexión a la base de datos.")
 
 if __name__ == '__main__':
-    migrar_datos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Migra el export de ventas CSV a MySQL.")
+    parser.add_argument('archivo', nargs='?', default=ARCHIVO)
+    parser.add_argument('--modo', choices=['bulk', 'filas', 'streaming', 'incremental'], default='bulk',
+                        help="bulk: INSERT multi-fila por lotes (por defecto); filas: un INSERT por fila; "
+                             "streaming: lectura por bloques con checkpoint reanudable; "
+                             "incremental: solo líneas nuevas o cambiadas respecto de las cargas anteriores")
+    parser.add_argument('--lote', type=int, default=1000, help="filas por INSERT en modo bulk/streaming")
+    parser.add_argument('--bloque', type=int, default=20000, help="registros del CSV por bloque en modo streaming")
+    parser.add_argument('--motor', choices=['c', 'pyarrow'], default='c', help="lector del CSV en modo streaming")
+    parser.add_argument('--reiniciar', action='store_true', help="ignora el checkpoint y carga el archivo desde el inicio")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="procesos que limpian y clasifican en modo streaming (un único escritor)")
+    parser.add_argument('--margen-dias', type=int, default=31,
+                        help="modo incremental: días antes de la marca de agua que se vuelven a comparar")
+    parser.add_argument('--completo', action='store_true',
+                        help="modo incremental: compara todas las líneas, sin usar la marca de agua")
+    args = parser.parse_args()
+    migrar_datos(args.archivo, args.modo, args.lote, args.bloque, args.motor, args.reiniciar, args.workers,
+                 args.margen_dias, args.completo)
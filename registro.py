@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Registro estructurado de la app: una línea JSON por evento, con nivel.
+
+Los registros se encolan y los escribe un hilo aparte (QueueListener), así
+una petición no espera la escritura en stderr. Los mensajes de rutina de
+las lecturas van por un registro muestreado: de sus DEBUG/INFO se escribe
+solo la fracción LOG_MUESTREO; las advertencias y los errores siempre.
+
+Variables de entorno:
+- LOG_NIVEL: DEBUG, INFO (por defecto), WARNING o ERROR.
+- LOG_MUESTREO: fracción (0 a 1) de los mensajes muestreados que se escribe (0.1).
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+
+NIVEL = os.environ.get('LOG_NIVEL', 'INFO').upper()
+MUESTREO = float(os.environ.get('LOG_MUESTREO', 0.1))
+
+# Atributos propios de logging.LogRecord; el resto de `extra` son campos del evento
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class FormatoJSON(logging.Formatter):
+    """{"ts", "nivel", "origen", "mensaje", ...campos} en una línea."""
+
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "nivel": record.levelname,
+            "origen": record.name,
+            "mensaje": record.getMessage(),
+        }
+        evento.update((k, v) for k, v in vars(record).items() if k not in _ATRIBUTOS_RECORD)
+        if record.exc_info:
+            evento["traza"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+_lock = threading.Lock()
+_pid = None
+_escritor = None
+
+
+def configurar():
+    """Instala la cola y el hilo escritor en el logger raíz de la app.
+    Se repite tras un fork: el hilo del proceso padre no existe en el hijo."""
+    global _pid, _escritor
+    if _pid == os.getpid():
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        raiz = logging.getLogger('reporte')
+        raiz.setLevel(NIVEL)
+        raiz.propagate = False
+        raiz.handlers.clear()
+        cola = queue.SimpleQueue()
+        salida = logging.StreamHandler(sys.stderr)
+        salida.setFormatter(FormatoJSON())
+        raiz.addHandler(logging.handlers.QueueHandler(cola))
+        _escritor = logging.handlers.QueueListener(cola, salida)
+        _escritor.start()
+        _pid = os.getpid()
+
+
+class Registro:
+    """Registro con nombre. Los campos van como argumentos con nombre:
+    `log.info("Venta agregada", id_venta=10, articulos=2)`."""
+
+    def __init__(self, nombre, muestreado=False):
+        self._logger = logging.getLogger(f'reporte.{nombre}')
+        self.muestreado = muestreado
+
+    def _emitir(self, nivel, mensaje, campos, exc_info=False):
+        configurar()
+        if not self._logger.isEnabledFor(nivel):
+            return
+        if self.muestreado and nivel < logging.WARNING and random.random() >= MUESTREO:
+            return
+        self._logger.log(nivel, mensaje, extra=campos, exc_info=exc_info)
+
+    def debug(self, mensaje, **campos):
+        self._emitir(logging.DEBUG, mensaje, campos)
+
+    def info(self, mensaje, **campos):
+        self._emitir(logging.INFO, mensaje, campos)
+
+    def advertencia(self, mensaje, **campos):
+        self._emitir(logging.WARNING, mensaje, campos)
+
+    def error(self, mensaje, exc_info=False, **campos):
+        self._emitir(logging.ERROR, mensaje, campos, exc_info)
+
+
+def obtener(nombre, muestreado=False):
+    return Registro(nombre, muestreado)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Constructor de los datos del reporte Categoría → Marca → Producto.
+
+Genera la misma estructura `DATA` que usaba el HTML estático (ordenMeses,
+categorias, ventasTotalesPorMesImporte, mesMasVendido, ventasMesMasVendido,
+topProductosPorMes) a partir de `resumen_producto_mes`, y la guarda en caché
+asociada a la versión de los datos (versiones.py). Los productos se muestran
+por su nombre canónico (canonicos.py), así las variantes que solo difieren en
+el número de serie comparten una sola serie.
+"""
+import threading
+from datetime import date
+
+import versiones
+
+
+NOMBRES_MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+                 "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+CONSULTA_PRODUCTOS_MES = """
+SELECT
+    COALESCE(p.categoria, 'Otros') AS categoria,
+    COALESCE(p.marca, 'OTROS') AS marca,
+    COALESCE(pc.nombre_canonico, p.nombre_original) AS producto,
+    r.mes,
+    r.lineas,
+    r.cantidad,
+    r.importe
+FROM resumen_producto_mes r
+JOIN productos p ON r.id_producto = p.id_producto
+LEFT JOIN producto_canonico pc ON pc.id_producto = r.id_producto
+"""
+
+
+def nombre_mes(mes):
+    """date(2024, 7, 1) -> 'Julio 2024'."""
+    return f"{NOMBRES_MESES[mes.month - 1]} {mes.year}"
+
+
+def rango_meses(desde, hasta):
+    """Lista de primeros de mes entre `desde` y `hasta`, inclusive."""
+    meses = []
+    actual = date(desde.year, desde.month, 1)
+    while actual <= hasta:
+        meses.append(actual)
+        actual = date(actual.year + actual.month // 12, actual.month % 12 + 1, 1)
+    return meses
+
+
+def construir_reporte(conn):
+    """Calcula la estructura DATA del reporte con una sola consulta agrupada."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CONSULTA_PRODUCTOS_MES)
+        filas = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    if not filas:
+        return {"ordenMeses": [], "categorias": {}, "ventasTotalesPorMesImporte": {},
+                "mesMasVendido": None, "ventasMesMasVendido": "S/ 0.00", "topProductosPorMes": []}
+
+    meses = rango_meses(min(f[3] for f in filas), max(f[3] for f in filas))
+    posicion = {mes: i for i, mes in enumerate(meses)}
+    categorias = {}
+    importe_por_mes = [0.0] * len(meses)
+    top_por_mes = {}
+    # Cantidad por (producto, mes) para el top; un mismo nombre puede venir de varios ids
+    cantidad_producto_mes = {}
+
+    for categoria, marca, producto, mes, lineas, cantidad, importe in filas:
+        i = posicion[mes]
+        serie = categorias.setdefault(categoria, {}).setdefault(marca, {}).setdefault(producto, [0] * len(meses))
+        serie[i] += int(lineas)
+        importe_por_mes[i] += float(importe)
+        clave = (producto, i)
+        cantidad_producto_mes[clave] = cantidad_producto_mes.get(clave, 0) + float(cantidad)
+
+    for (producto, i), cantidad in cantidad_producto_mes.items():
+        actual = top_por_mes.get(i)
+        if actual is None or cantidad > actual[1]:
+            top_por_mes[i] = (producto, cantidad)
+
+    orden_meses = [nombre_mes(m) for m in meses]
+    i_max = max(range(len(meses)), key=lambda i: importe_por_mes[i])
+    return {
+        "ordenMeses": orden_meses,
+        "categorias": categorias,
+        "ventasTotalesPorMesImporte": {orden_meses[i]: round(v, 2) for i, v in enumerate(importe_por_mes)},
+        "mesMasVendido": orden_meses[i_max],
+        "ventasMesMasVendido": f"S/ {importe_por_mes[i_max]:,.2f}",
+        "topProductosPorMes": [
+            {"mes": orden_meses[i], "producto": producto, "cantidad": int(cantidad)}
+            for i, (producto, cantidad) in sorted(top_por_mes.items())
+        ],
+    }
+
+
+class CacheReporte:
+    """Guarda DATA (o un resultado derivado) por versión de datos.
+
+    `construir(data)` transforma los datos antes de guardarlos; el resultado
+    se reutiliza mientras la versión en la base no cambie.
+    """
+
+    def __init__(self, construir=None):
+        self._construir = construir or (lambda data: data)
+        self._lock = threading.Lock()
+        # (version, valor) en una sola tupla para que los lectores sin lock
+        # nunca vean una versión nueva con el valor anterior
+        self._entrada = (None, None)
+
+    def obtener(self, conn):
+        """Retorna (version, valor), reconstruyendo solo si cambió la versión."""
+        version, _ = versiones.leer_version(conn)
+        entrada = self._entrada
+        if entrada[0] == version:
+            return entrada
+        with self._lock:
+            if self._entrada[0] != version:
+                self._entrada = (version, self._construir(construir_reporte(conn)))
+            return self._entrada
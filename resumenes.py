@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""Resúmenes de ventas mantenidos con deltas.
+
+`resumen_ventas_vendedor` guarda (vendedor, mes, total, num_ventas),
+`resumen_producto_mes` guarda (id_producto, mes, lineas, cantidad, importe)
+y los resúmenes diarios de /api/series (series.py) guardan por día, vendedor
+y medio de pago los tickets (`resumen_diario_ventas`) y, además por producto,
+las ventas, cantidad e importe (`resumen_diario`).
+Los helpers de app.py restan el aporte de una venta antes de modificarla y
+lo vuelven a sumar después, dentro de la misma transacción, así el gráfico
+y el reporte leen filas pre-agregadas en lugar de recorrer `detalle_venta`.
+Uso: python resumenes.py reconstruir | verificar
+"""
+import sys
+
+import mysql.connector
+
+
+DDL_RESUMEN = """
+CREATE TABLE IF NOT EXISTS resumen_ventas_vendedor (
+  vendedor VARCHAR(100) NOT NULL DEFAULT '',
+  mes DATE NOT NULL,
+  total DECIMAL(14,2) NOT NULL DEFAULT 0,
+  num_ventas INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (vendedor, mes)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_RESUMEN_PRODUCTO = """
+CREATE TABLE IF NOT EXISTS resumen_producto_mes (
+  id_producto INTEGER NOT NULL,
+  mes DATE NOT NULL,
+  lineas INTEGER NOT NULL DEFAULT 0,
+  cantidad DECIMAL(14,2) NOT NULL DEFAULT 0,
+  importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (id_producto, mes),
+  KEY idx_resumen_producto_mes (mes)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_RESUMEN_DIARIO = """
+CREATE TABLE IF NOT EXISTS resumen_diario (
+  dia DATE NOT NULL,
+  vendedor VARCHAR(100) NOT NULL DEFAULT '',
+  medio_pago VARCHAR(100) NOT NULL DEFAULT '',
+  id_producto INTEGER NOT NULL,
+  ventas INTEGER NOT NULL DEFAULT 0,
+  cantidad DECIMAL(14,2) NOT NULL DEFAULT 0,
+  importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (dia, vendedor, medio_pago, id_producto),
+  KEY idx_resumen_diario_producto (id_producto, dia)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_RESUMEN_DIARIO_VENTAS = """
+CREATE TABLE IF NOT EXISTS resumen_diario_ventas (
+  dia DATE NOT NULL,
+  vendedor VARCHAR(100) NOT NULL DEFAULT '',
+  medio_pago VARCHAR(100) NOT NULL DEFAULT '',
+  tickets INTEGER NOT NULL DEFAULT 0,
+  importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (dia, vendedor, medio_pago)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Aporte de una venta (o de todas, sin el WHERE) al resumen.
+# El vendedor NULL se guarda como '' porque forma parte de la clave primaria.
+CONSULTA_APORTE = """
+SELECT
+    COALESCE(v.vendedor, '') AS vendedor,
+    DATE_SUB(v.fecha, INTERVAL DAYOFMONTH(v.fecha) - 1 DAY) AS mes,
+    COALESCE(SUM(dv.importe_soles), 0) AS total,
+    v.fecha AS dia,
+    COALESCE(v.medio_pago, '') AS medio_pago
+FROM ventas v
+LEFT JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+"""
+
+# Aporte por producto y mes de las líneas de una venta (o de todas)
+CONSULTA_APORTE_PRODUCTO = """
+SELECT
+    dv.id_producto,
+    DATE_SUB(v.fecha, INTERVAL DAYOFMONTH(v.fecha) - 1 DAY) AS mes,
+    COUNT(*) AS lineas,
+    COALESCE(SUM(dv.cantidad), 0) AS cantidad,
+    COALESCE(SUM(dv.importe_soles), 0) AS importe
+FROM ventas v
+JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+"""
+
+# Aporte por día, vendedor, medio de pago y producto de las líneas de una
+# venta (o de todas); `ventas` cuenta las ventas que incluyen el producto
+CONSULTA_APORTE_DIARIO = """
+SELECT
+    v.fecha AS dia,
+    COALESCE(v.vendedor, '') AS vendedor,
+    COALESCE(v.medio_pago, '') AS medio_pago,
+    dv.id_producto,
+    COUNT(DISTINCT v.id_venta) AS ventas,
+    COALESCE(SUM(dv.cantidad), 0) AS cantidad,
+    COALESCE(SUM(dv.importe_soles), 0) AS importe
+FROM ventas v
+JOIN detalle_venta dv ON v.id_venta = dv.id_venta
+"""
+AGRUPAR_DIARIO = " GROUP BY v.fecha, COALESCE(v.vendedor, ''), COALESCE(v.medio_pago, ''), dv.id_producto"
+
+
+# Lectura del gráfico: recorre el resumen (una fila por vendedor y mes)
+CONSULTA_TOTAL_POR_VENDEDOR = """
+SELECT NULLIF(vendedor, '') AS vendedor, SUM(total) AS total_ventas
+FROM resumen_ventas_vendedor
+GROUP BY vendedor
+ORDER BY total_ventas DESC
+"""
+
+
+def _aplicar_delta(cursor, vendedor, mes, total, num_ventas):
+    cursor.execute(
+        """
+        INSERT INTO resumen_ventas_vendedor (vendedor, mes, total, num_ventas)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total), num_ventas = num_ventas + VALUES(num_ventas)
+        """,
+        (vendedor, mes, total, num_ventas)
+    )
+    if num_ventas < 0:
+        cursor.execute(
+            "DELETE FROM resumen_ventas_vendedor WHERE vendedor = %s AND mes = %s AND num_ventas <= 0",
+            (vendedor, mes)
+        )
+
+
+def _aplicar_delta_productos(cursor, filas, signo):
+    cursor.executemany(
+        """
+        INSERT INTO resumen_producto_mes (id_producto, mes, lineas, cantidad, importe)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE lineas = lineas + VALUES(lineas),
+            cantidad = cantidad + VALUES(cantidad), importe = importe + VALUES(importe)
+        """,
+        [(id_producto, mes, signo * lineas, signo * cantidad, signo * importe)
+         for id_producto, mes, lineas, cantidad, importe in filas]
+    )
+    if signo < 0:
+        cursor.executemany(
+            "DELETE FROM resumen_producto_mes WHERE id_producto = %s AND mes = %s AND lineas <= 0",
+            [(fila[0], fila[1]) for fila in filas]
+        )
+
+
+def _aplicar_delta_diario(cursor, dia, vendedor, medio_pago, total, tickets, filas):
+    cursor.execute(
+        """
+        INSERT INTO resumen_diario_ventas (dia, vendedor, medio_pago, tickets, importe)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE tickets = tickets + VALUES(tickets), importe = importe + VALUES(importe)
+        """,
+        (dia, vendedor, medio_pago, tickets, total)
+    )
+    if filas:
+        cursor.executemany(
+            """
+            INSERT INTO resumen_diario (dia, vendedor, medio_pago, id_producto, ventas, cantidad, importe)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE ventas = ventas + VALUES(ventas),
+                cantidad = cantidad + VALUES(cantidad), importe = importe + VALUES(importe)
+            """,
+            filas
+        )
+    if tickets < 0:
+        cursor.execute(
+            "DELETE FROM resumen_diario_ventas WHERE dia = %s AND vendedor = %s AND medio_pago = %s AND tickets <= 0",
+            (dia, vendedor, medio_pago)
+        )
+        if filas:
+            cursor.executemany(
+                "DELETE FROM resumen_diario WHERE dia = %s AND vendedor = %s AND medio_pago = %s"
+                " AND id_producto = %s AND ventas <= 0",
+                [fila[:4] for fila in filas]
+            )
+
+
+def _mover_venta(conn, id_venta, signo):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CONSULTA_APORTE + " WHERE v.id_venta = %s GROUP BY v.id_venta", (id_venta,))
+        fila = cursor.fetchone()
+        if fila is None:
+            return
+        vendedor, mes, total, dia, medio_pago = fila
+        _aplicar_delta(cursor, vendedor, mes, signo * total, signo)
+
+        cursor.execute(CONSULTA_APORTE_PRODUCTO + " WHERE v.id_venta = %s GROUP BY dv.id_producto, mes", (id_venta,))
+        filas = cursor.fetchall()
+        if filas:
+            _aplicar_delta_productos(cursor, filas, signo)
+
+        cursor.execute(CONSULTA_APORTE_DIARIO + " WHERE v.id_venta = %s" + AGRUPAR_DIARIO, (id_venta,))
+        filas_diarias = [fila[:4] + tuple(signo * valor for valor in fila[4:]) for fila in cursor.fetchall()]
+        _aplicar_delta_diario(cursor, dia, vendedor, medio_pago, signo * total, signo, filas_diarias)
+    finally:
+        cursor.close()
+
+
+def sumar_venta(conn, id_venta):
+    """Suma el aporte actual de la venta (tras insertarla o editarla)."""
+    _mover_venta(conn, id_venta, 1)
+
+
+def restar_venta(conn, id_venta):
+    """Resta el aporte actual de la venta (antes de editarla o borrarla)."""
+    _mover_venta(conn, id_venta, -1)
+
+
+def _sumar_conjunto(cursor, filtro, params=()):
+    """Suma a los cuatro resúmenes el aporte de las ventas que cumplen `filtro`
+    (condición sobre `v`) con un INSERT … SELECT por tabla."""
+    cursor.execute(
+        f"""
+        INSERT INTO resumen_ventas_vendedor (vendedor, mes, total, num_ventas)
+        SELECT vendedor, mes, SUM(total), COUNT(*)
+        FROM ({CONSULTA_APORTE} WHERE {filtro} GROUP BY v.id_venta) aportes
+        GROUP BY vendedor, mes
+        ON DUPLICATE KEY UPDATE total = resumen_ventas_vendedor.total + VALUES(total),
+            num_ventas = resumen_ventas_vendedor.num_ventas + VALUES(num_ventas)
+        """,
+        params
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO resumen_producto_mes (id_producto, mes, lineas, cantidad, importe)
+        {CONSULTA_APORTE_PRODUCTO} WHERE {filtro} GROUP BY dv.id_producto, mes
+        ON DUPLICATE KEY UPDATE lineas = resumen_producto_mes.lineas + VALUES(lineas),
+            cantidad = resumen_producto_mes.cantidad + VALUES(cantidad),
+            importe = resumen_producto_mes.importe + VALUES(importe)
+        """,
+        params
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO resumen_diario_ventas (dia, vendedor, medio_pago, tickets, importe)
+        SELECT dia, vendedor, medio_pago, COUNT(*), SUM(total)
+        FROM ({CONSULTA_APORTE} WHERE {filtro} GROUP BY v.id_venta) aportes
+        GROUP BY dia, vendedor, medio_pago
+        ON DUPLICATE KEY UPDATE tickets = resumen_diario_ventas.tickets + VALUES(tickets),
+            importe = resumen_diario_ventas.importe + VALUES(importe)
+        """,
+        params
+    )
+    cursor.execute(
+        "INSERT INTO resumen_diario (dia, vendedor, medio_pago, id_producto, ventas, cantidad, importe)"
+        f" SELECT * FROM ({CONSULTA_APORTE_DIARIO} WHERE {filtro}{AGRUPAR_DIARIO}) aportes"
+        """
+        ON DUPLICATE KEY UPDATE ventas = resumen_diario.ventas + VALUES(ventas),
+            cantidad = resumen_diario.cantidad + VALUES(cantidad), importe = resumen_diario.importe + VALUES(importe)
+        """,
+        params
+    )
+
+
+def sumar_ventas(conn, ids):
+    """Suma de una vez el aporte de varias ventas recién insertadas (una carga
+    por bloques); no confirma la transacción."""
+    if not ids:
+        return
+    cursor = conn.cursor()
+    try:
+        _sumar_conjunto(cursor, f"v.id_venta IN ({', '.join(['%s'] * len(ids))})", tuple(ids))
+    finally:
+        cursor.close()
+
+
+def total_por_vendedor(cursor):
+    """Lectura del gráfico: total acumulado por vendedor, de mayor a menor."""
+    cursor.execute(CONSULTA_TOTAL_POR_VENDEDOR)
+    return cursor.fetchall()
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_RESUMEN)
+    cursor.execute(DDL_RESUMEN_PRODUCTO)
+    cursor.execute(DDL_RESUMEN_DIARIO)
+    cursor.execute(DDL_RESUMEN_DIARIO_VENTAS)
+
+
+def reconstruir_resumen(conn):
+    """Recalcula los resúmenes completos a partir de ventas/detalle_venta."""
+    cursor = conn.cursor()
+    try:
+        asegurar_tabla(cursor)
+        cursor.execute("DELETE FROM resumen_ventas_vendedor")
+        cursor.execute(
+            f"""
+            INSERT INTO resumen_ventas_vendedor (vendedor, mes, total, num_ventas)
+            SELECT vendedor, mes, SUM(total), COUNT(*)
+            FROM ({CONSULTA_APORTE} GROUP BY v.id_venta) aportes
+            GROUP BY vendedor, mes
+            """
+        )
+        filas_vendedor = cursor.rowcount
+        cursor.execute("DELETE FROM resumen_producto_mes")
+        cursor.execute(
+            f"""
+            INSERT INTO resumen_producto_mes (id_producto, mes, lineas, cantidad, importe)
+            {CONSULTA_APORTE_PRODUCTO} GROUP BY dv.id_producto, mes
+            """
+        )
+        filas_producto = cursor.rowcount
+        cursor.execute("DELETE FROM resumen_diario_ventas")
+        cursor.execute(
+            f"""
+            INSERT INTO resumen_diario_ventas (dia, vendedor, medio_pago, tickets, importe)
+            SELECT dia, vendedor, medio_pago, COUNT(*), SUM(total)
+            FROM ({CONSULTA_APORTE} GROUP BY v.id_venta) aportes
+            GROUP BY dia, vendedor, medio_pago
+            """
+        )
+        cursor.execute("DELETE FROM resumen_diario")
+        cursor.execute(
+            "INSERT INTO resumen_diario (dia, vendedor, medio_pago, id_producto, ventas, cantidad, importe)"
+            + CONSULTA_APORTE_DIARIO + AGRUPAR_DIARIO
+        )
+        conn.commit()
+        print(f"INFO: Resúmenes reconstruidos ({filas_vendedor} filas por vendedor, {filas_producto} por producto, "
+              f"{cursor.rowcount} diarias).")
+    finally:
+        cursor.close()
+
+
+def _comparar(cursor, consulta_en_vivo, consulta_resumen, nombre):
+    cursor.execute(consulta_en_vivo)
+    en_vivo = {(str(f[0]), str(f[1])): tuple(f[2:]) for f in cursor.fetchall()}
+    cursor.execute(consulta_resumen)
+    resumen = {(str(f[0]), str(f[1])): tuple(f[2:]) for f in cursor.fetchall()}
+    return [(nombre, clave[0], clave[1], resumen.get(clave), en_vivo.get(clave))
+            for clave in sorted(set(en_vivo) | set(resumen))
+            if resumen.get(clave) != en_vivo.get(clave)]
+
+
+def verificar_resumen(conn):
+    """Compara los resúmenes con la agregación en vivo. Retorna la lista de
+    diferencias (tabla, clave, mes, resumen, en_vivo); vacía si son consistentes."""
+    cursor = conn.cursor()
+    try:
+        diferencias = _comparar(
+            cursor,
+            f"""
+            SELECT vendedor, mes, SUM(total), COUNT(*)
+            FROM ({CONSULTA_APORTE} GROUP BY v.id_venta) aportes
+            GROUP BY vendedor, mes
+            """,
+            "SELECT vendedor, mes, total, num_ventas FROM resumen_ventas_vendedor",
+            'resumen_ventas_vendedor'
+        )
+        diferencias += _comparar(
+            cursor,
+            CONSULTA_APORTE_PRODUCTO + " GROUP BY dv.id_producto, mes",
+            "SELECT id_producto, mes, lineas, cantidad, importe FROM resumen_producto_mes",
+            'resumen_producto_mes'
+        )
+        diferencias += _comparar(
+            cursor,
+            f"""
+            SELECT dia, CONCAT_WS('|', vendedor, medio_pago), COUNT(*), SUM(total)
+            FROM ({CONSULTA_APORTE} GROUP BY v.id_venta) aportes
+            GROUP BY dia, vendedor, medio_pago
+            """,
+            "SELECT dia, CONCAT_WS('|', vendedor, medio_pago), tickets, importe FROM resumen_diario_ventas",
+            'resumen_diario_ventas'
+        )
+        diferencias += _comparar(
+            cursor,
+            "SELECT dia, CONCAT_WS('|', vendedor, medio_pago, id_producto), ventas, cantidad, importe FROM ("
+            + CONSULTA_APORTE_DIARIO + AGRUPAR_DIARIO + ") aportes",
+            "SELECT dia, CONCAT_WS('|', vendedor, medio_pago, id_producto), ventas, cantidad, importe FROM resumen_diario",
+            'resumen_diario'
+        )
+        return diferencias
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else 'reconstruir'
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if accion == 'verificar':
+            diferencias = verificar_resumen(conn)
+            for tabla, clave, mes, guardado, real in diferencias:
+                print(f"DIFERENCIA en {tabla}: {clave or '(vacío)'} {mes}: resumen={guardado} real={real}")
+            if diferencias:
+                sys.exit(1)
+            print("INFO: Los resúmenes son consistentes.")
+        else:
+            reconstruir_resumen(conn)
+    except mysql.connector.Error as err:
+        print(f"ERROR: {err}")
+        sys.exit(1)
+    finally:
+        conn.close()
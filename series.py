@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Series de tiempo para /api/series.
+
+Lee los resúmenes diarios de resumenes.py (`resumen_diario` por producto y
+`resumen_diario_ventas` por venta), que el camino de escritura mantiene con
+deltas, y los agrupa por día, semana (lunes) o mes y por las dimensiones
+pedidas. Cada serie trae un valor por periodo, alineado con `periodos`
+(los periodos sin ventas van en 0), igual que las series mensuales del reporte.
+
+Los tickets son exactos cuando la consulta se resuelve con
+`resumen_diario_ventas`: sin categoría, marca ni producto (como dimensión o
+filtro) y sin la métrica cantidad. Si no, salen de `resumen_diario`, donde
+una venta cuenta una vez por cada producto distinto que incluye; la
+respuesta lo indica en `tickets_exactos`.
+"""
+from datetime import date, timedelta
+
+
+GRANULARIDADES = {
+    'dia': "r.dia",
+    'semana': "DATE_SUB(r.dia, INTERVAL WEEKDAY(r.dia) DAY)",
+    'mes': "DATE_SUB(r.dia, INTERVAL DAYOFMONTH(r.dia) - 1 DAY)",
+}
+
+# Dimensión pública -> expresión SQL
+DIMENSIONES = {
+    'categoria': "COALESCE(p.categoria, 'Otros')",
+    'marca': "COALESCE(p.marca, 'OTROS')",
+    'producto': "COALESCE(pc.nombre_canonico, p.nombre_original)",
+    'vendedor': "NULLIF(r.vendedor, '')",
+    'medio_pago': "NULLIF(r.medio_pago, '')",
+}
+DIMENSIONES_PRODUCTO = ('categoria', 'marca', 'producto')
+
+# Métrica -> (expresión sobre resumen_diario, expresión sobre resumen_diario_ventas)
+METRICAS = {
+    'cantidad': ("SUM(r.cantidad)", None),
+    'importe_soles': ("SUM(r.importe)", "SUM(r.importe)"),
+    'tickets': ("SUM(r.ventas)", "SUM(r.tickets)"),
+}
+
+MAXIMO_PERIODOS = 1000
+LIMITE_SERIES = 50
+LIMITE_SERIES_MAXIMO = 500
+
+JOIN_PRODUCTOS = """
+JOIN productos p ON p.id_producto = r.id_producto
+LEFT JOIN producto_canonico pc ON pc.id_producto = r.id_producto
+"""
+
+
+def inicio_periodo(dia, granularidad):
+    if granularidad == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if granularidad == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def rango_periodos(desde, hasta, granularidad):
+    """Inicios de periodo entre `desde` y `hasta`, inclusive."""
+    periodos = []
+    actual = inicio_periodo(desde, granularidad)
+    while actual <= hasta:
+        periodos.append(actual)
+        if granularidad == 'mes':
+            actual = date(actual.year + actual.month // 12, actual.month % 12 + 1, 1)
+        else:
+            actual += timedelta(days=7 if granularidad == 'semana' else 1)
+    return periodos
+
+
+def _lista(valor, permitidos, nombre):
+    elegidos = [v.strip() for v in (valor or '').split(',') if v.strip()]
+    invalidos = [v for v in elegidos if v not in permitidos]
+    if invalidos:
+        raise ValueError(f"{nombre} no válida: {', '.join(invalidos)}. "
+                         f"Opciones: {', '.join(permitidos)}.")
+    return list(dict.fromkeys(elegidos))
+
+
+def _fecha(valor, nombre):
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{nombre} debe tener el formato AAAA-MM-DD.")
+
+
+def leer_parametros(args):
+    """Valida los parámetros de la petición (un dict o `request.args`).
+    Lanza ValueError con un mensaje para el cliente si alguno no es válido."""
+    granularidad = args.get('granularidad', 'mes')
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}.")
+    por = _lista(args.get('por'), list(DIMENSIONES), "Dimensión")
+    metricas = _lista(args.get('metricas') or 'importe_soles', list(METRICAS), "Métrica")
+    filtros = {d: args.get(d) for d in DIMENSIONES if args.get(d)}
+    desde = _fecha(args['desde'], 'desde') if args.get('desde') else None
+    hasta = _fecha(args['hasta'], 'hasta') if args.get('hasta') else None
+    if desde and hasta and desde > hasta:
+        raise ValueError("desde no puede ser posterior a hasta.")
+    try:
+        limite = max(1, min(int(args.get('limite', LIMITE_SERIES)), LIMITE_SERIES_MAXIMO))
+    except ValueError:
+        raise ValueError("limite debe ser un número entero.")
+    return {"desde": desde, "hasta": hasta, "granularidad": granularidad, "por": por,
+            "metricas": metricas, "filtros": filtros, "limite": limite}
+
+
+def usa_resumen_ventas(por, metricas, filtros):
+    """True si la consulta se puede resolver con `resumen_diario_ventas`."""
+    por_producto = any(d in DIMENSIONES_PRODUCTO for d in list(por) + list(filtros))
+    return not por_producto and all(METRICAS[m][1] for m in metricas)
+
+
+def consulta_series(desde, hasta, granularidad, por, metricas, filtros):
+    """Arma la consulta agrupada sobre el resumen diario que corresponda.
+    Retorna (sql, params); las columnas son periodo, dimensiones y métricas."""
+    por_venta = usa_resumen_ventas(por, metricas, filtros)
+    por_producto = not por_venta and any(d in DIMENSIONES_PRODUCTO for d in list(por) + list(filtros))
+    tabla = "resumen_diario_ventas" if por_venta else "resumen_diario"
+    columnas = [f"{GRANULARIDADES[granularidad]} AS periodo"]
+    columnas += [f"{DIMENSIONES[d]} AS {d}" for d in por]
+    columnas += [f"{METRICAS[m][1 if por_venta else 0]} AS {m}" for m in metricas]
+    sql = f"SELECT {', '.join(columnas)} FROM {tabla} r"
+    if por_producto:
+        sql += JOIN_PRODUCTOS
+    condiciones = ["r.dia BETWEEN %s AND %s"]
+    params = [desde, hasta]
+    for dimension, valor in filtros.items():
+        condiciones.append(f"{DIMENSIONES[dimension]} = %s")
+        params.append(valor)
+    sql += " WHERE " + " AND ".join(condiciones)
+    # Por posición: los alias (vendedor, categoria...) coinciden con nombres de columna
+    sql += " GROUP BY " + ", ".join(str(i) for i in range(1, len(por) + 2))
+    return sql, params
+
+
+def rango_datos(cursor):
+    """(primer día, último día) con ventas en el resumen, o (None, None)."""
+    cursor.execute("SELECT MIN(dia), MAX(dia) FROM resumen_diario_ventas")
+    return cursor.fetchone() or (None, None)
+
+
+def construir_series(conn, desde=None, hasta=None, granularidad='mes', por=(), metricas=('importe_soles',),
+                     filtros=None, limite=LIMITE_SERIES):
+    """Calcula las series. Sin `desde`/`hasta` se usa el rango con datos.
+    Las series se ordenan por el total de la primera métrica y se retornan
+    las `limite` mayores."""
+    filtros = filtros or {}
+    vacio = {"granularidad": granularidad, "desde": None, "hasta": None, "por": list(por),
+             "metricas": list(metricas), "periodos": [], "series": [], "total_series": 0,
+             "tickets_exactos": usa_resumen_ventas(por, metricas, filtros)}
+    cursor = conn.cursor()
+    try:
+        if desde is None or hasta is None:
+            primero, ultimo = rango_datos(cursor)
+            desde = desde or primero
+            hasta = hasta or ultimo
+        if desde is None or hasta is None:
+            return vacio
+        periodos = rango_periodos(desde, hasta, granularidad)
+        if len(periodos) > MAXIMO_PERIODOS:
+            raise ValueError(f"El rango pide {len(periodos)} periodos; el máximo es {MAXIMO_PERIODOS}. "
+                             "Use una granularidad mayor o un rango más corto.")
+        sql, params = consulta_series(desde, hasta, granularidad, por, metricas, filtros)
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    posicion = {periodo: i for i, periodo in enumerate(periodos)}
+    series = {}
+    for fila in filas:
+        i = posicion[fila[0]]
+        clave = tuple(fila[1:1 + len(por)])
+        valores = series.setdefault(clave, {m: [0] * len(periodos) for m in metricas})
+        for m, valor in zip(metricas, fila[1 + len(por):]):
+            valores[m][i] += int(valor) if m == 'tickets' else round(float(valor or 0), 2)
+
+    primera = metricas[0]
+    ordenadas = sorted(series.items(), key=lambda item: sum(item[1][primera]), reverse=True)[:limite]
+    return {
+        "granularidad": granularidad,
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "por": list(por),
+        "metricas": list(metricas),
+        "periodos": [p.isoformat() for p in periodos],
+        "series": [{"clave": dict(zip(por, clave)), "valores": valores} for clave, valores in ordenadas],
+        "total_series": len(series),
+        "tickets_exactos": vacio["tickets_exactos"],
+    }
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Configuración común de las pruebas: los módulos de la app están en la raíz
+del repositorio y se importan tal cual (import busqueda, import app, ...).
+
+Las pruebas que necesitan un servidor MySQL/MariaDB piden `base_vacia`:
+usan el servidor de DATABASE_URL (o el local de conexiones.py) y la base
+PRUEBAS_BASE (por defecto reporte_pruebas), que se BORRA y se crea con el
+esquema actual en cada sesión. Sin servidor esas pruebas se omiten.
+"""
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRUEBAS_BASE = os.environ.get('PRUEBAS_BASE', 'reporte_pruebas')
+
+
+@pytest.fixture(scope='session')
+def base_mysql():
+    import mysql.connector
+
+    import esquema
+    from conexiones import DB_CONFIG
+
+    if 'prueba' not in PRUEBAS_BASE:
+        raise ValueError(f"La base '{PRUEBAS_BASE}' se borra en cada sesión; use un nombre que contenga 'prueba'.")
+    config = {clave: valor for clave, valor in DB_CONFIG.items() if clave != 'database'}
+    try:
+        servidor = mysql.connector.connect(**config)
+    except mysql.connector.Error as err:
+        pytest.skip(f"Sin servidor MySQL: {err}")
+    cursor = servidor.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{PRUEBAS_BASE}`")
+    cursor.execute(f"CREATE DATABASE `{PRUEBAS_BASE}` CHARACTER SET utf8mb4")
+    conn = mysql.connector.connect(**dict(config, database=PRUEBAS_BASE))
+    with contextlib.redirect_stdout(io.StringIO()):
+        esquema.migrar(conn)
+    yield conn
+    conn.close()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{PRUEBAS_BASE}`")
+    cursor.close()
+    servidor.close()
+
+
+@pytest.fixture
+def base_vacia(base_mysql):
+    """La base de prueba sin datos (el esquema y la fila de versión quedan)."""
+    cursor = base_mysql.cursor()
+    cursor.execute("SHOW TABLES")
+    tablas = [fila[0] for fila in cursor.fetchall() if fila[0] not in ('esquema_version', 'version_datos')]
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for tabla in tablas:
+        cursor.execute(f"DELETE FROM `{tabla}`")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.execute("UPDATE version_datos SET version = 0, ediciones = 0")
+    base_mysql.commit()
+    cursor.close()
+    return base_mysql
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Conexión y cursor falsos para probar sin servidor MySQL.
+
+Cada consulta se responde con las filas de la primera regla de `respuestas`
+cuyo fragmento aparece en el SQL; el valor puede ser una lista de filas o
+una función (sql, params) -> filas. Todo lo ejecutado queda en `consultas`.
+"""
+
+
+class CursorFalso:
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.filas = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self.conexion.consultas.append((sql, params))
+        self.filas = list(self.conexion.responder(sql, params))
+        self.rowcount = len(self.filas)
+        self.lastrowid = self.conexion.siguiente_id()
+
+    def executemany(self, sql, filas):
+        filas = list(filas)
+        self.conexion.consultas.append((sql, filas))
+        self.filas = []
+        self.rowcount = len(filas)
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def fetchmany(self, tamano=1):
+        parte, self.filas = self.filas[:tamano], self.filas[tamano:]
+        return parte
+
+    def fetchall(self):
+        parte, self.filas = self.filas, []
+        return parte
+
+    def __iter__(self):
+        while self.filas:
+            yield self.filas.pop(0)
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    unread_result = False
+
+    def __init__(self, respuestas=None, primer_id=1):
+        self.respuestas = dict(respuestas or {})
+        self.consultas = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.cerrada = False
+        self._id = primer_id
+
+    def responder(self, sql, params):
+        for fragmento, filas in self.respuestas.items():
+            if fragmento in sql:
+                return filas(sql, params) if callable(filas) else filas
+        return []
+
+    def siguiente_id(self):
+        self._id += 1
+        return self._id - 1
+
+    def ejecutadas(self, fragmento):
+        """Sentencias ejecutadas que contienen `fragmento`."""
+        return [(sql, params) for sql, params in self.consultas if fragmento in sql]
+
+    def cursor(self, **opciones):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.cerrada = True
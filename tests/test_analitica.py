@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Motor en memoria de /api/series y /ventas-grafico (analitica.py) con una
+conexión falsa."""
+from datetime import date
+from decimal import Decimal
+
+import analitica
+
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.filas = []
+
+    def execute(self, sql, params=()):
+        self.base.consultas.append((sql, params))
+        if "FROM version_datos" in sql:
+            self.filas = [(self.base.version, self.base.ediciones)]
+        elif sql == analitica.CONSULTA_TOTALES:
+            ids = {linea[0] for linea in self.base.lineas}
+            self.filas = [(len(ids), sum(Decimal(str(linea[9] or 0)) for linea in self.base.lineas))]
+        elif sql == analitica.CONSULTA_LINEAS:
+            self.filas = [linea for linea in self.base.lineas if linea[0] > params[0]]
+        else:
+            self.filas = []
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def fetchmany(self, tamano):
+        parte, self.filas = self.filas[:tamano], self.filas[tamano:]
+        return parte
+
+    def fetchall(self):
+        parte, self.filas = self.filas, []
+        return parte
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    unread_result = False
+
+    def __init__(self, lineas=()):
+        self.lineas = list(lineas)
+        self.version = 1
+        self.ediciones = 0
+        self.consultas = []
+
+    def cursor(self, **opciones):
+        return CursorFalso(self)
+
+
+# (id_venta, fecha, vendedor, medio_pago, id_producto, categoria, marca, producto, cantidad, importe_soles)
+LINEAS = [
+    (1, date(2024, 1, 5), 'Ana', 'Efectivo', 10, 'Mouse', 'HP', 'Mouse HP', 2, Decimal('50.00')),
+    (1, date(2024, 1, 5), 'Ana', 'Efectivo', 11, 'Almacenamiento', 'OTROS', 'USB 32GB', 1, Decimal('30.00')),
+    (2, date(2024, 1, 20), 'Luis', 'Yape', 10, 'Mouse', 'HP', 'Mouse HP', 1, Decimal('25.00')),
+    (3, date(2024, 2, 3), 'Ana', None, 12, 'Impresoras y consumibles', 'EPSON', 'Tinta T544', 3, Decimal('60.00')),
+    # Venta sin líneas: cuenta como ticket, sin producto
+    (4, date(2024, 2, 10), None, 'Efectivo', None, 'Otros', 'OTROS', None, None, None),
+]
+
+
+def _motor(lineas=LINEAS):
+    conn = ConexionFalsa(lineas)
+    motor = analitica.MotorAnalitico()
+    motor.actualizar(conn)
+    return motor, conn
+
+
+def test_motor_series_por_vendedor():
+    motor, _ = _motor()
+    respuesta = motor.series(por=['vendedor'], metricas=['importe_soles', 'tickets'])
+    assert respuesta['periodos'] == ['2024-01-01', '2024-02-01']
+    assert respuesta['series'] == [
+        {"clave": {"vendedor": 'Ana'}, "valores": {"importe_soles": [80.0, 60.0], "tickets": [1, 1]}},
+        {"clave": {"vendedor": 'Luis'}, "valores": {"importe_soles": [25.0, 0], "tickets": [1, 0]}},
+        {"clave": {"vendedor": None}, "valores": {"importe_soles": [0, 0.0], "tickets": [0, 1]}},
+    ]
+
+
+def test_motor_series_por_categoria_excluye_ventas_sin_lineas():
+    motor, _ = _motor()
+    respuesta = motor.series(por=['categoria'], metricas=['cantidad', 'tickets'])
+    claves = {s['clave']['categoria']: s['valores'] for s in respuesta['series']}
+    assert claves == {
+        'Mouse': {"cantidad": [3.0, 0], "tickets": [2, 0]},
+        'Impresoras y consumibles': {"cantidad": [0, 3.0], "tickets": [0, 1]},
+        'Almacenamiento': {"cantidad": [1.0, 0], "tickets": [1, 0]},
+    }
+
+
+def test_motor_filtros_y_semanas():
+    motor, _ = _motor()
+    respuesta = motor.series(desde=date(2024, 1, 1), hasta=date(2024, 1, 31), granularidad='semana',
+                             metricas=['importe_soles'], filtros={'marca': 'HP'})
+    assert respuesta['periodos'][0] == '2024-01-01'
+    valores = respuesta['series'][0]['valores']['importe_soles']
+    assert valores[0] == 50.0 and valores[2] == 25.0 and sum(valores) == 75.0
+    assert motor.series(filtros={'vendedor': 'Nadie'})['series'] == []
+
+
+def test_motor_total_por_vendedor():
+    motor, _ = _motor()
+    assert motor.total_por_vendedor() == [
+        {"vendedor": 'Ana', "total_ventas": 140.0},
+        {"vendedor": 'Luis', "total_ventas": 25.0},
+        {"vendedor": None, "total_ventas": 0.0},
+    ]
+
+
+def test_motor_incremental_y_recarga_por_ediciones():
+    motor, conn = _motor()
+    conn.lineas.append((5, date(2024, 2, 11), 'Luis', 'Yape', 10, 'Mouse', 'HP', 'Mouse HP', 1, Decimal('25.00')))
+    conn.version += 1
+    motor.actualizar(conn)
+    assert (motor.incrementales, motor.recargas) == (1, 1)
+    assert motor.total_por_vendedor()[1] == {"vendedor": 'Luis', "total_ventas": 50.0}
+
+    # Una edición cambia una venta ya cargada: no alcanza con leer las nuevas
+    conn.lineas[2] = conn.lineas[2][:9] + (Decimal('5.00'),)
+    conn.version += 1
+    conn.ediciones += 1
+    motor.actualizar(conn)
+    assert (motor.incrementales, motor.recargas) == (1, 2)
+    assert motor.total_por_vendedor()[1] == {"vendedor": 'Luis', "total_ventas": 30.0}
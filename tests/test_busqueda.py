@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Ruteo de los términos de búsqueda a las ramas de busqueda_ventas."""
+import busqueda
+
+
+def test_normalizar_quita_tildes_y_signos():
+    assert busqueda.normalizar("  Cartucho EPSON-T544 Cían ") == "cartucho epson t544 cian"
+    assert busqueda.normalizar(None) == ''
+
+
+def test_termino_vacio_no_filtra():
+    assert busqueda.subconsulta_busqueda("  --  ") is None
+
+
+def test_texto_libre_usa_solo_fulltext():
+    sql, params = busqueda.subconsulta_busqueda("Mouse Logitech")
+    assert "MATCH(texto)" in sql
+    assert "doc_cliente" not in sql and "nro_doc" not in sql
+    assert params == ["+mouse* +logitech*", "+mouse* +logitech*"]
+
+
+def test_palabras_cortas_se_agregan_con_like():
+    sql, params = busqueda.subconsulta_busqueda("mouse hp")
+    assert sql.count("LIKE") == 1
+    assert params == ["+mouse*", "+mouse*", "%hp%"]
+
+
+def test_solo_palabras_cortas_recorre_la_tabla_de_busqueda():
+    sql, params = busqueda.subconsulta_busqueda("hp")
+    assert "MATCH" not in sql
+    assert "FROM busqueda_ventas WHERE texto LIKE %s" in sql
+    assert params == ["%hp%"]
+
+
+def test_documento_busca_por_documento_y_articulos():
+    sql, params = busqueda.subconsulta_busqueda("20100047218")
+    assert "WHERE doc_cliente = %s" in sql and "WHERE nro_doc = %s" in sql
+    assert "MATCH(texto)" in sql
+    assert "GROUP BY id_venta" in sql
+    base = busqueda.RELEVANCIA_DOCUMENTO
+    assert params[:8] == [base + 4, "20100047218", base + 3, "20100047218",
+                          base + 2, "20100047218%", base + 1, "20100047218%"]
+    assert params[8:] == ["+20100047218*", "+20100047218*"]
+
+
+def test_modelo_con_forma_de_documento_tambien_busca_articulos():
+    sql, params = busqueda.subconsulta_busqueda("T544")
+    assert "nro_doc LIKE %s" in sql
+    assert "MATCH(texto)" in sql
+    assert "t544%" in params and "+t544*" in params
+
+
+def test_serie_de_documento_con_guion():
+    sql, params = busqueda.subconsulta_busqueda("002-000937")
+    assert "nro_doc = %s" in sql
+    assert "002-000937" in params
+
+
+def test_documento_corto_solo_por_documento():
+    sql, params = busqueda.subconsulta_busqueda("12")
+    assert "doc_cliente = %s" in sql
+    assert "MATCH" not in sql and "texto LIKE" not in sql
+    assert len(params) == 8
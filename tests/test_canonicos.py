@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Productos canónicos (canonicos.py): las variantes que solo difieren en el
+número de serie se agrupan; modelos, capacidades o colores distintos no."""
+import canonicos
+from falsos import ConexionFalsa
+
+
+def test_nombre_base_quita_los_numeros_de_serie():
+    assert canonicos.nombre_base("IMPRESORA EPSON ECOTANK L3250. /XAH35001") == "IMPRESORA EPSON ECOTANK L3250"
+    assert canonicos.nombre_base("TONER HP 85A /SN123 /SN124") == "TONER HP 85A"
+    # Una barra sin espacio antes es parte del modelo
+    assert canonicos.nombre_base("MONITOR 24 5MS/100HZ") == "MONITOR 24 5MS/100HZ"
+
+
+def test_agrupa_variantes_por_serie_en_el_menor_id():
+    resultado = canonicos.agrupar([
+        (7, "IMPRESORA EPSON ECOTANK L3250. /XAH35001", 'Impresoras', 'EPSON'),
+        (3, "IMPRESORA EPSON ECOTANK L3250 /XAH35002", 'Impresoras', 'EPSON'),
+        (9, "IMPRESORA EPSON ECOTANK L3250 /XAH35003 /XAH35004", 'Impresoras', 'EPSON'),
+    ])
+    assert resultado == {i: (3, "IMPRESORA EPSON ECOTANK L3250") for i in (3, 7, 9)}
+
+
+def test_no_junta_modelos_ni_capacidades_distintas():
+    resultado = canonicos.agrupar([
+        (1, "MEMORIA USB KINGSTON 32GB /A1", 'Almacenamiento', 'KINGSTON'),
+        (2, "MEMORIA USB KINGSTON 64GB /A2", 'Almacenamiento', 'KINGSTON'),
+        (3, "IMPRESORA EPSON ECOTANK L3250 /B1", 'Impresoras', 'EPSON'),
+        (4, "IMPRESORA EPSON ECOTANK L3210 /B2", 'Impresoras', 'EPSON'),
+    ])
+    assert {id_canonico for id_canonico, _ in resultado.values()} == {1, 2, 3, 4}
+
+
+def test_no_junta_colores_de_una_o_dos_letras():
+    resultado = canonicos.agrupar([
+        (1, "BOTELLA DE TINTA CANON GI-11 M", 'Suministros', 'CANON'),
+        (2, "BOTELLA DE TINTA CANON GI-11 Y", 'Suministros', 'CANON'),
+    ])
+    assert resultado[1][0] == 1 and resultado[2][0] == 2
+
+
+def test_no_compara_entre_marcas_distintas():
+    resultado = canonicos.agrupar([
+        (1, "MOUSE INALAMBRICO M170 /X1", 'Accesorios', 'LOGITECH'),
+        (2, "MOUSE INALAMBRICO M170 /X2", 'Accesorios', 'GENIUS'),
+    ])
+    assert resultado[2][0] == 2
+
+
+def test_agrupar_productos_reescribe_la_tabla_y_sube_la_version():
+    conn = ConexionFalsa({"FROM productos": [
+        (1, "TONER HP 85A /SN1", 'Suministros', 'HP'),
+        (2, "TONER HP 85A /SN2", 'Suministros', 'HP'),
+        (3, "TONER HP 83A /SN3", 'Suministros', 'HP'),
+    ]})
+    assert canonicos.agrupar_productos(conn, lote=2) == (3, 2)
+    assert conn.ejecutadas("DELETE FROM producto_canonico")
+    lotes = [filas for _, filas in conn.ejecutadas("INSERT INTO producto_canonico")]
+    assert lotes == [[(1, 1, "TONER HP 85A"), (2, 1, "TONER HP 85A")], [(3, 3, "TONER HP 83A")]]
+    assert "ediciones = ediciones + 1" in conn.ejecutadas("UPDATE version_datos")[0][0]
+    assert conn.commits == 1
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Caché de ids de clientes y productos (catalogo.py): LRU con vencimiento,
+y los ids solo se publican después del commit de la venta."""
+import mysql.connector
+import pytest
+
+import app
+import catalogo
+from falsos import ConexionFalsa
+
+
+class Reloj:
+    ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(catalogo.time, 'monotonic', reloj)
+    return reloj
+
+
+@pytest.fixture(autouse=True)
+def caches_vacias():
+    catalogo.CACHE_CLIENTES.limpiar()
+    catalogo.CACHE_PRODUCTOS.limpiar()
+    yield
+    catalogo.CACHE_CLIENTES.limpiar()
+    catalogo.CACHE_PRODUCTOS.limpiar()
+
+
+def test_lru_descarta_la_entrada_menos_usada(reloj):
+    cache = catalogo.CacheIds(tamano=2, ttl=60)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obtener('a') == 1
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert (cache.obtener('a'), cache.obtener('c')) == (1, 3)
+
+
+def test_las_entradas_vencen(reloj):
+    cache = catalogo.CacheIds(tamano=10, ttl=60)
+    cache.guardar('a', 1)
+    reloj.ahora += 59
+    assert cache.obtener('a') == 1
+    reloj.ahora += 1
+    assert cache.obtener('a') is None
+    assert cache.estadisticas()["entradas"] == 0
+
+
+def test_estadisticas(reloj):
+    cache = catalogo.CacheIds()
+    assert cache.estadisticas()["tasa_aciertos"] is None
+    cache.guardar('a', 1)
+    cache.obtener('a')
+    cache.obtener('a')
+    cache.obtener('b')
+    cache.olvidar('a')
+    assert cache.estadisticas() == {"entradas": 0, "aciertos": 2, "fallos": 1, "tasa_aciertos": 0.6667}
+
+
+def test_resolver_productos_solo_consulta_los_que_no_estan_en_cache():
+    catalogo.CACHE_PRODUCTOS.guardar('MOUSE LOGITECH M90', 10)
+    conn = ConexionFalsa({"WHERE nombre_hash IN": [('TECLADO GENIUS KB-110', 11)]})
+    resueltos = catalogo.Resueltos()
+    ids = catalogo.resolver_productos(conn.cursor(), ['MOUSE LOGITECH M90', 'TECLADO GENIUS KB-110', ''], resueltos)
+    assert ids == {'MOUSE LOGITECH M90': 10, 'TECLADO GENIUS KB-110': 11}
+    assert conn.ejecutadas("WHERE nombre_hash IN")[0][1] == ['TECLADO GENIUS KB-110']
+    assert resueltos.productos == {'TECLADO GENIUS KB-110': 11}
+
+    # Todo resuelto: no hay consultas
+    conn.consultas.clear()
+    catalogo.resolver_productos(conn.cursor(), ['TECLADO GENIUS KB-110'], resueltos)
+    assert not conn.consultas
+
+
+def test_resolver_cliente_sin_documento_siempre_inserta():
+    conn = ConexionFalsa(primer_id=5)
+    resueltos = catalogo.Resueltos()
+    assert catalogo.resolver_cliente(conn.cursor(), '', 'Varios', None, resueltos) == 5
+    assert catalogo.resolver_cliente(conn.cursor(), '', 'Varios', None, resueltos) == 6
+    assert resueltos.clientes == {}
+
+
+# --- Publicación después del commit ---
+
+VENTA = {'fecha': '2024-06-01', 'documento': 'BOLETA', 'nro_doc': 'B001-78', 'medio_pago': 'Yape',
+         'vendedor': 'Ana', 'doc_cliente': '45678912', 'cliente': 'Luis Pérez',
+         'items': [{'articulos': 'MOUSE LOGITECH M90', 'cantidad': 1, 'importe_soles': 25}]}
+
+
+@pytest.fixture
+def conexion(monkeypatch):
+    conn = ConexionFalsa({"WHERE nombre_hash IN": [('MOUSE LOGITECH M90', 10)]}, primer_id=3)
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: conn)
+    return conn
+
+
+def test_los_ids_se_publican_despues_del_commit(monkeypatch, conexion):
+    en_cache_al_confirmar = []
+
+    def commit():
+        en_cache_al_confirmar.append((catalogo.CACHE_CLIENTES.estadisticas()["entradas"],
+                                      catalogo.CACHE_PRODUCTOS.estadisticas()["entradas"]))
+        conexion.commits += 1
+    monkeypatch.setattr(conexion, 'commit', commit)
+
+    assert app.agregar_venta(VENTA)
+    assert en_cache_al_confirmar == [(0, 0)]
+    assert catalogo.CACHE_CLIENTES.obtener('45678912') == 3
+    assert catalogo.CACHE_PRODUCTOS.obtener('MOUSE LOGITECH M90') == 10
+
+    # La siguiente venta del mismo cliente y producto no los vuelve a resolver
+    conexion.consultas.clear()
+    assert app.agregar_venta(VENTA)
+    assert not conexion.ejecutadas("INSERT INTO clientes") and not conexion.ejecutadas("INSERT INTO productos")
+
+
+def test_rollback_no_deja_ids_en_la_cache(conexion):
+    # Falla el último paso, con el cliente y los productos ya resueltos
+    def falla(sql, params):
+        raise mysql.connector.Error("Deadlock found")
+    conexion.respuestas["UPDATE version_datos"] = falla
+
+    assert not app.agregar_venta(VENTA)
+    assert conexion.rollbacks == 1 and conexion.commits == 0
+    assert catalogo.CACHE_CLIENTES.estadisticas()["entradas"] == 0
+    assert catalogo.CACHE_PRODUCTOS.estadisticas()["entradas"] == 0
+
+
+def test_venta_incompleta_no_resuelve_nada(conexion):
+    venta = {campo: valor for campo, valor in VENTA.items() if campo != 'fecha'}
+    assert not app.agregar_venta(venta)
+    assert not conexion.consultas
+    assert catalogo.CACHE_CLIENTES.estadisticas()["entradas"] == 0
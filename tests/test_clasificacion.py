@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""El motor de clasificación coincide con la referencia fila a fila de migrar_datos.py."""
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import clasificacion
+import migrar_datos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORT = os.path.join(RAIZ, migrar_datos.ARCHIVO)
+
+
+def referencia(articulo):
+    limpio = migrar_datos.limpiar_nombre(articulo)
+    categoria = migrar_datos.clasificar_categoria(limpio)
+    return limpio, categoria, migrar_datos.detectar_marca(categoria, limpio)
+
+
+@pytest.mark.skipif(not os.path.exists(EXPORT), reason="sin el export de ejemplo")
+def test_serie_coincide_con_la_referencia_en_el_export():
+    articulos = migrar_datos.leer_csv(EXPORT)['articulos']
+    clasificacion.clasificar.cache_clear()
+    obtenido = clasificacion.clasificar_serie(articulos)
+    esperado = [referencia(a) for a in articulos]
+    assert list(zip(*(obtenido[c].tolist() for c in obtenido))) == esperado
+
+
+def test_casos_de_prioridad():
+    casos = [
+        "Mouse Inalámbrico HP para Laptop",
+        "CARGADOR  LAPTOP   Lenovo 65W",
+        "Cartucho de tinta Epson T544 (cian)",
+        "Cable USB-C a HDMI",
+        "Memoria para laptop 8GB Kingston",
+        "Servicio a laptop / mantenimiento",
+        "Audífono Logitech H390",
+        "Producto sin palabras clave",
+        "  ",
+    ]
+    for caso in casos:
+        assert clasificacion.clasificar(caso) == referencia(caso), caso
+
+
+def test_nulos_y_alineacion_del_indice():
+    serie = pd.Series(["Mouse HP", None, "Mouse HP", "Toner Brother"], index=[10, 11, 12, 13])
+    resultado = clasificacion.clasificar_serie(serie)
+    assert list(resultado.columns) == ['nombre_limpio', 'categoria', 'marca']
+    assert list(resultado.index) == [10, 11, 12, 13]
+    assert resultado.loc[10].tolist() == ["mouse hp", "Mouse", "HP"]
+    assert resultado.loc[12].tolist() == resultado.loc[10].tolist()
+    assert resultado.loc[11].isna().all()
+    assert resultado.loc[13].tolist() == list(referencia("Toner Brother"))
+
+
+def test_serie_vacia():
+    resultado = clasificacion.clasificar_serie(pd.Series([], dtype=object))
+    assert resultado.empty and list(resultado.columns) == ['nombre_limpio', 'categoria', 'marca']
+
+
+def test_coincidencias_respeta_la_prioridad():
+    palabras = [p for _, lista in clasificacion.REGLAS_CATEGORIA for p in lista]
+    coincidencias = clasificacion.Coincidencias(palabras)
+    vocabulario = palabras + clasificacion.MARCAS_GENERALES + ["x", "a", "ca", "la", "memo"]
+    azar = random.Random(7)
+    for _ in range(3000):
+        texto = " ".join(azar.choice(vocabulario) for _ in range(azar.randint(0, 5)))
+        indices = [i for i, p in enumerate(palabras) if p in texto]
+        assert coincidencias.mejor(texto) == (min(indices) if indices else None), texto
+
+
+def test_marca_por_categoria_antes_que_general():
+    assert clasificacion.marca_de("Mouse", "mouse hp logitech") == "LOGITECH"
+    assert clasificacion.marca_de("Otros", "mouse hp logitech") == "HP"
+    assert clasificacion.marca_de("Otros", "sin marca") == clasificacion.MARCA_POR_DEFECTO
+    assert np.array_equal(clasificacion.clasificar_serie(pd.Series(["x"]))['marca'].to_numpy(), ["OTROS"])
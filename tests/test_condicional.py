@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""GET condicional de app.py: ETag y Last-Modified según la versión de los
+datos, 304 sin ejecutar la vista y sin cabeceras de caché en los errores."""
+from datetime import datetime
+
+import mysql.connector
+import pytest
+
+import app
+from falsos import ConexionFalsa
+
+
+ACTUALIZADO = datetime(2024, 5, 10, 15, 30, 45, 123456)
+
+
+class Estado:
+    """Versión de los datos y respuestas de las vistas que usan las pruebas."""
+    version = 3
+    grafico = [{"vendedor": "Ana", "total": 150.0}]
+    llamadas = 0
+
+
+@pytest.fixture
+def estado(monkeypatch):
+    estado = Estado()
+
+    def version(sql, params):
+        return [(estado.version, ACTUALIZADO)]
+
+    def agregadas():
+        estado.llamadas += 1
+        return estado.grafico
+
+    monkeypatch.setattr(app, 'get_db_connection',
+                        lambda consulta=None: ConexionFalsa({"FROM version_datos": version}))
+    monkeypatch.setattr(app, 'obtener_ventas_agregadas_por_vendedor', agregadas)
+    return estado
+
+
+@pytest.fixture
+def cliente():
+    return app.app.test_client()
+
+
+def test_respuesta_lleva_etag_debil_y_last_modified(estado, cliente):
+    respuesta = cliente.get('/ventas-grafico')
+    assert respuesta.status_code == 200
+    etag, debil = respuesta.get_etag()
+    assert debil and etag.startswith("v3-")
+    assert respuesta.headers['Last-Modified'] == 'Fri, 10 May 2024 15:30:45 GMT'
+    assert respuesta.headers['Cache-Control'] == 'no-cache'
+
+
+def test_if_none_match_vigente_responde_304_sin_ejecutar_la_vista(estado, cliente):
+    etag = cliente.get('/ventas-grafico').headers['ETag']
+    respuesta = cliente.get('/ventas-grafico', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 304 and respuesta.data == b''
+    assert respuesta.headers['ETag'] == etag
+    assert estado.llamadas == 1
+
+
+def test_la_etag_cambia_con_la_version_y_con_la_query(estado, cliente):
+    etag = cliente.get('/ventas-grafico').headers['ETag']
+    assert cliente.get('/ventas-grafico?x=1').headers['ETag'] != etag
+    estado.version = 4
+    respuesta = cliente.get('/ventas-grafico', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200 and respuesta.headers['ETag'] != etag
+
+
+def test_if_modified_since(estado, cliente):
+    respuesta = cliente.get('/ventas-grafico', headers={'If-Modified-Since': 'Fri, 10 May 2024 15:30:45 GMT'})
+    assert respuesta.status_code == 304
+    respuesta = cliente.get('/ventas-grafico', headers={'If-Modified-Since': 'Fri, 10 May 2024 15:30:44 GMT'})
+    assert respuesta.status_code == 200
+
+
+def test_if_none_match_tiene_prioridad_sobre_if_modified_since(estado, cliente):
+    respuesta = cliente.get('/ventas-grafico', headers={
+        'If-None-Match': 'W/"v2-viejo"', 'If-Modified-Since': 'Fri, 10 May 2024 15:30:45 GMT'})
+    assert respuesta.status_code == 200
+
+
+def test_error_de_la_vista_sin_etag(estado, cliente):
+    estado.grafico = None
+    respuesta = cliente.get('/ventas-grafico')
+    assert respuesta.status_code == 503
+    assert 'ETag' not in respuesta.headers and 'Last-Modified' not in respuesta.headers
+
+
+def test_sin_version_la_vista_responde_sin_cabeceras_de_cache(monkeypatch, estado, cliente):
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: None)
+    respuesta = cliente.get('/ventas-grafico', headers={'If-None-Match': '*'})
+    assert respuesta.status_code == 200 and 'ETag' not in respuesta.headers
+
+    def falla(sql, params):
+        raise mysql.connector.Error("sin tabla")
+    monkeypatch.setattr(app, 'get_db_connection',
+                        lambda consulta=None: ConexionFalsa({"FROM version_datos": falla}))
+    respuesta = cliente.get('/ventas-grafico')
+    assert respuesta.status_code == 200 and 'ETag' not in respuesta.headers
+
+
+def test_listado_en_streaming_sin_etag(monkeypatch, estado, cliente):
+    def iterar_ventas(search_term, limite, cursor_token, orden, descendente, resultado):
+        resultado['siguiente'] = None
+        yield {"id_venta": 1}
+    monkeypatch.setattr(app, 'iterar_ventas', iterar_ventas)
+
+    completa = cliente.get('/ventas?limit=10')
+    assert completa.status_code == 200 and 'ETag' in completa.headers
+    streaming = cliente.get('/ventas?limit=0')
+    assert streaming.get_json()["ventas"] == [{"id_venta": 1}]
+    assert 'ETag' not in streaming.headers
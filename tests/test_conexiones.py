@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Pool de conexiones de conexiones.py con conexiones falsas en lugar del driver."""
+import mysql.connector
+import pytest
+
+import conexiones
+import metricas
+
+
+class ConexionDriver:
+    """Lo que el pool usa de una conexión de mysql.connector."""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.viva = True
+        self.cerrada = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.viva:
+            raise mysql.connector.errors.InterfaceError("sin conexión")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return object()
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def creadas(monkeypatch):
+    """Conexiones que abre el pool, en orden."""
+    lista = []
+
+    def conectar(**config):
+        lista.append(ConexionDriver())
+        return lista[-1]
+
+    monkeypatch.setattr(conexiones.mysql.connector, 'connect', conectar)
+    return lista
+
+
+def test_reutiliza_la_conexion_devuelta(creadas):
+    pool = conexiones.PoolConexiones({}, tamano=2)
+    with pool.obtener() as conn:
+        conn.cursor()
+    with pool.obtener() as conn:
+        conn.cursor()
+    assert len(creadas) == 1
+    assert pool.estadisticas() == {"tamano": 2, "creadas": 1, "libres": 1}
+
+
+def test_devolver_hace_rollback_de_la_transaccion_abierta(creadas):
+    pool = conexiones.PoolConexiones({})
+    conn = pool.obtener()
+    creadas[0].in_transaction = True
+    conn.close()
+    conn.close()
+    assert creadas[0].rollbacks == 1 and not creadas[0].cerrada
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        conn.cursor()
+
+
+def test_pool_agotado_espera_y_falla(creadas):
+    pool = conexiones.PoolConexiones({}, tamano=1, timeout=0.05)
+    prestada = pool.obtener()
+    with pytest.raises(mysql.connector.errors.PoolError):
+        pool.obtener()
+    prestada.close()
+    pool.obtener().close()
+    assert len(creadas) == 1
+
+
+def test_descarta_las_conexiones_caidas_o_viejas(creadas):
+    pool = conexiones.PoolConexiones({}, tamano=1, reciclar_segundos=60)
+    pool.obtener().close()
+    creadas[0].viva = False
+    pool.obtener().close()
+    assert len(creadas) == 2 and creadas[0].cerrada
+
+    # Más antigua que reciclar_segundos
+    pool._creacion[id(creadas[1])] -= 120
+    pool.obtener().close()
+    assert len(creadas) == 3 and creadas[1].cerrada
+    assert pool.estadisticas()["creadas"] == 1
+
+
+def test_tras_un_fork_no_reutiliza_las_conexiones_del_padre(creadas, monkeypatch):
+    pool = conexiones.PoolConexiones({})
+    pool.obtener().close()
+    monkeypatch.setattr(conexiones.os, 'getpid', lambda: -1)
+    pool.obtener().close()
+    assert len(creadas) == 2 and not creadas[0].cerrada
+
+
+def test_cursor_medido_con_nombre_de_consulta(creadas):
+    pool = conexiones.PoolConexiones({})
+    with pool.obtener('obtener_ventas') as conn:
+        assert isinstance(conn.cursor(), metricas.CursorMedido)
+    with pool.obtener() as conn:
+        assert not isinstance(conn.cursor(), metricas.CursorMedido)
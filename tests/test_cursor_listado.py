@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Token opaco de la paginación por keyset del listado de ventas."""
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+import app
+
+
+def test_ida_y_vuelta_con_fecha():
+    token = app.codificar_cursor(date(2024, 5, 31), 1234)
+    assert app.decodificar_cursor(token) == ("2024-05-31", 1234)
+
+
+def test_ida_y_vuelta_con_decimal_y_entero():
+    assert app.decodificar_cursor(app.codificar_cursor(Decimal("12.50"), 7)) == ("12.50", 7)
+    assert app.decodificar_cursor(app.codificar_cursor(99, 99)) == (99, 99)
+
+
+def test_relevancia_float():
+    assert app.decodificar_cursor(app.codificar_cursor(1003.0, 5)) == (1003.0, 5)
+
+
+def test_token_seguro_para_url():
+    token = app.codificar_cursor("á/ñ?&", 2 ** 31)
+    assert all(ch.isalnum() or ch in "-_=" for ch in token)
+    assert app.decodificar_cursor(token) == ("á/ñ?&", 2 ** 31)
+
+
+def _token(valor):
+    return base64.urlsafe_b64encode(json.dumps(valor).encode('utf-8')).decode('ascii')
+
+
+def test_tokens_invalidos():
+    assert app.decodificar_cursor("no es base64!") is None
+    assert app.decodificar_cursor(_token({"a": 1})) is None
+    assert app.decodificar_cursor(_token(["2024-01-01"])) is None
+    assert app.decodificar_cursor(_token(["2024-01-01", 1, 2])) is None
+    assert app.decodificar_cursor(_token(["2024-01-01", "x"])) is None
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""API de drill-down del reporte (/api/reporte/*): cada nivel del árbol
+categoría → marca → producto se pide por separado."""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+import app
+import reporte
+from falsos import ConexionFalsa
+
+
+ENERO, FEBRERO = date(2024, 1, 1), date(2024, 2, 1)
+FILAS = [
+    ('Laptops', 'HP', 'HP 240 G8', ENERO, 2, Decimal('3'), Decimal('4500.00')),
+    ('Laptops', 'HP', 'HP 15', FEBRERO, 1, Decimal('1'), Decimal('1800.00')),
+    ('Laptops', 'ASUS', 'Vivobook 15', FEBRERO, 1, Decimal('1'), Decimal('2100.00')),
+    ('Accesorios', 'LOGITECH', 'Mouse M90', ENERO, 3, Decimal('5'), Decimal('100.00')),
+    ('Cámaras', 'TP-LINK', 'Tapo C200', FEBRERO, 1, Decimal('2'), Decimal('240.00')),
+]
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    conn = ConexionFalsa({
+        "FROM version_datos": [(4, datetime(2024, 2, 29, 9, 30))],
+        "FROM resumen_producto_mes": FILAS,
+    })
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: conn)
+    monkeypatch.setattr(app, 'cache_reporte', reporte.CacheReporte())
+    return app.app.test_client()
+
+
+def test_categorias_ordenadas(cliente):
+    assert cliente.get('/api/reporte/categorias').get_json() == ["Accesorios", "Cámaras", "Laptops"]
+
+
+def test_marcas_de_una_categoria(cliente):
+    assert cliente.get('/api/reporte/categorias/Laptops/marcas').get_json() == ["ASUS", "HP"]
+
+
+def test_productos_de_una_marca(cliente):
+    respuesta = cliente.get('/api/reporte/categorias/Laptops/marcas/HP/productos')
+    assert respuesta.get_json() == ["HP 15", "HP 240 G8"]
+
+
+def test_nombres_con_acentos_en_la_ruta(cliente):
+    assert cliente.get('/api/reporte/categorias/C%C3%A1maras/marcas').get_json() == ["TP-LINK"]
+    respuesta = cliente.get('/api/reporte/categorias/C%C3%A1maras/marcas/TP-LINK/productos')
+    assert respuesta.get_json() == ["Tapo C200"]
+
+
+def test_nivel_inexistente_responde_404(cliente):
+    assert cliente.get('/api/reporte/categorias/Celulares/marcas').status_code == 404
+    respuesta = cliente.get('/api/reporte/categorias/Laptops/marcas/DELL/productos')
+    assert respuesta.status_code == 404 and not respuesta.get_json()["success"]
+
+
+def test_sin_base_responde_503(monkeypatch, cliente):
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: None)
+    assert cliente.get('/api/reporte/categorias').status_code == 503
+    assert cliente.get('/api/reporte/categorias/Laptops/marcas').status_code == 503
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Escritores de GET /export: CSV, XLSX y Parquet a partir de lotes de filas."""
+import csv
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+
+import exportar
+
+NOMBRES = [nombre for nombre, _ in exportar.COLUMNAS]
+
+
+def fila(id_venta, fecha, articulo, importe, cliente='Cliente "A" & Cía'):
+    valores = dict.fromkeys(NOMBRES)
+    valores.update(id_venta=id_venta, fecha=fecha, documento='BOLETA', nro_doc=f'B001-{id_venta:06d}',
+                   tc=Decimal('1.00'), vendedor='Ana', doc_cliente='20100047218', cliente=cliente,
+                   id_detalle=id_venta * 10, articulos=articulo, producto=articulo, categoria='Mouse',
+                   marca='HP', cantidad=2, importe=importe, importe_soles=importe)
+    return tuple(valores[nombre] for nombre in NOMBRES)
+
+
+LOTES = [
+    [fila(1, date(2024, 1, 5), 'Mouse HP, inalámbrico', Decimal('50.00')),
+     fila(2, date(2024, 1, 6), 'Tinta\nT544', Decimal('25.50'))],
+    [fila(3, date(2024, 2, 1), 'Cable\x01USB', None)],
+]
+
+
+def test_csv_bom_encabezado_y_filas():
+    partes = list(exportar.escribir_csv(iter(LOTES)))
+    assert len(partes) == 1 + len(LOTES)
+    datos = b''.join(partes)
+    assert datos.startswith('﻿'.encode('utf-8'))
+    filas = list(csv.reader(io.StringIO(datos.decode('utf-8-sig'))))
+    assert filas[0] == NOMBRES
+    assert len(filas) == 4
+    primera = dict(zip(NOMBRES, filas[1]))
+    assert primera['fecha'] == '2024-01-05' and primera['articulos'] == 'Mouse HP, inalámbrico'
+    assert primera['cliente'] == 'Cliente "A" & Cía'
+    assert dict(zip(NOMBRES, filas[2]))['articulos'] == 'Tinta\nT544'
+    assert dict(zip(NOMBRES, filas[3]))['importe_soles'] == ''
+
+
+def test_csv_sin_filas_solo_encabezado():
+    datos = b''.join(exportar.escribir_csv(iter([])))
+    assert datos.decode('utf-8-sig').strip() == ','.join(NOMBRES)
+
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _hojas(datos):
+    libro = zipfile.ZipFile(io.BytesIO(datos))
+    assert libro.testzip() is None
+    nombres = sorted(n for n in libro.namelist() if n.startswith('xl/worksheets/'))
+    return libro, [ElementTree.fromstring(libro.read(n)).findall('.//x:row', NS) for n in nombres]
+
+
+def test_xlsx_parte_en_hojas_y_escribe_tipos():
+    datos = b''.join(exportar.escribir_xlsx(iter(LOTES), filas_por_hoja=2))
+    libro, hojas = _hojas(datos)
+    assert [len(filas) for filas in hojas] == [3, 2]
+    assert b'sheet2.xml' in libro.read('[Content_Types].xml')
+    assert b'Ventas 2' in libro.read('xl/workbook.xml')
+
+    celdas = hojas[0][1].findall('x:c', NS)
+    fecha = celdas[NOMBRES.index('fecha')]
+    assert fecha.get('s') == '1' and fecha.find('x:v', NS).text == str((date(2024, 1, 5) - date(1899, 12, 30)).days)
+    assert celdas[NOMBRES.index('importe_soles')].find('x:v', NS).text == '50.00'
+    cliente = celdas[NOMBRES.index('cliente')]
+    assert cliente.get('t') == 'inlineStr' and cliente.find('.//x:t', NS).text == 'Cliente "A" & Cía'
+    # Los caracteres de control no válidos en XML se descartan
+    articulo = hojas[1][1].findall('x:c', NS)[NOMBRES.index('articulos')]
+    assert articulo.find('.//x:t', NS).text == 'CableUSB'
+
+
+def test_xlsx_sin_filas_tiene_una_hoja_con_encabezado():
+    _, hojas = _hojas(b''.join(exportar.escribir_xlsx(iter([]))))
+    assert [len(filas) for filas in hojas] == [1]
+
+
+def test_parquet_un_grupo_por_lote():
+    pq = pytest.importorskip('pyarrow.parquet')
+    datos = b''.join(exportar.escribir_parquet(iter(LOTES)))
+    archivo = pq.ParquetFile(io.BytesIO(datos))
+    assert archivo.metadata.num_row_groups == len(LOTES)
+    tabla = archivo.read()
+    assert tabla.column_names == NOMBRES
+    assert tabla.column('id_venta').to_pylist() == [1, 2, 3]
+    assert tabla.column('fecha').to_pylist()[0] == date(2024, 1, 5)
+    assert tabla.column('importe_soles').to_pylist() == [50.0, 25.5, None]
+
+
+def test_rango_y_formato():
+    assert exportar.leer_rango('2024-01-01', None) == (date(2024, 1, 1), exportar.FECHA_MAXIMA)
+    with pytest.raises(ValueError):
+        exportar.leer_rango('2024-02-01', '2024-01-01')
+    with pytest.raises(ValueError):
+        exportar.leer_rango('01/02/2024', None)
+    with pytest.raises(ValueError):
+        exportar.verificar_formato('pdf')
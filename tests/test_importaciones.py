@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Importación del export desde la web (importaciones.py y POST /importar):
+la subida se guarda por partes, se valida y la carga registra su avance."""
+import io
+import os
+
+import pytest
+
+import app
+import canonicos
+import importaciones
+import migrar_datos
+from falsos import ConexionFalsa
+
+
+ENCABEZADO = ('"Lista de ventas\ndetallada"\n'
+              + ','.join(['#', 'FECHA'] + [c.upper() for c in migrar_datos.COLUMNAS_CSV[1:]]) + '\n')
+
+
+def test_guardar_subida_copia_por_partes(monkeypatch, tmp_path):
+    monkeypatch.setattr(importaciones, 'TAM_PARTE', 4)
+    destino = tmp_path / 'subida.csv'
+    assert importaciones.guardar_subida(io.BytesIO(b'0123456789'), destino) == 10
+    assert destino.read_bytes() == b'0123456789'
+
+
+# --- Tarea en segundo plano ---
+
+@pytest.fixture
+def carga(monkeypatch, tmp_path):
+    """Conexiones que abre ejecutar_importacion (la de estado primero) y el
+    archivo subido; la migración y el agrupamiento se reemplazan en cada prueba."""
+    conexiones = []
+
+    def conectar(**config):
+        conexiones.append(ConexionFalsa())
+        return conexiones[-1]
+
+    agrupadas = []
+    monkeypatch.setattr(importaciones.mysql.connector, 'connect', conectar)
+    monkeypatch.setattr(canonicos, 'agrupar_productos', lambda conn: agrupadas.append(conn))
+    ruta = tmp_path / 'importacion.csv'
+    ruta.write_text(ENCABEZADO, encoding='utf-8')
+    return conexiones, agrupadas, str(ruta)
+
+
+def estados(conn):
+    """(campos, valores) de cada UPDATE a `importaciones`."""
+    return [(sql.split(' SET ')[1].split(' WHERE ')[0], params[:-1])
+            for sql, params in conn.ejecutadas("UPDATE importaciones")]
+
+
+def test_importacion_en_streaming_registra_avance_y_termina(monkeypatch, carga):
+    conexiones, agrupadas, ruta = carga
+
+    def migrar_streaming(conn, archivo, progreso, en_linea):
+        assert archivo == ruta and en_linea
+        progreso(100, 80, 2.0)
+        return 120
+    monkeypatch.setattr(migrar_datos, 'migrar_streaming', migrar_streaming)
+
+    importaciones.ejecutar_importacion(5, ruta)
+    estado, datos = conexiones
+    actualizaciones = estados(estado)
+    assert actualizaciones[0] == ("estado = %s", ['procesando'])
+    assert actualizaciones[1][1] == [100, 80, 40.0]
+    campos, valores = actualizaciones[-1]
+    assert valores[0] == 'completado' and valores[1] == 120 and "terminado = CURRENT_TIMESTAMP" in campos
+    assert valores[-1] == "120 filas insertadas."
+    assert agrupadas == [datos]
+    assert estado.cerrada and datos.cerrada and not os.path.exists(ruta)
+
+
+def test_archivo_ya_importado_no_reagrupa(monkeypatch, carga):
+    conexiones, agrupadas, ruta = carga
+    monkeypatch.setattr(migrar_datos, 'migrar_streaming', lambda conn, archivo, progreso, en_linea: 0)
+    importaciones.ejecutar_importacion(6, ruta)
+    assert estados(conexiones[0])[-1][1][-1] == "El archivo ya había sido importado."
+    assert agrupadas == []
+
+
+def test_importacion_incremental(monkeypatch, carga):
+    conexiones, agrupadas, ruta = carga
+    monkeypatch.setattr(migrar_datos, 'migrar_incremental', lambda conn, archivo: (3, 2))
+    importaciones.ejecutar_importacion(7, ruta, modo='incremental')
+    assert estados(conexiones[0])[-1][1][-1] == "3 líneas nuevas, 2 cambiadas."
+    assert len(agrupadas) == 1
+
+
+def test_error_en_la_carga_queda_registrado(monkeypatch, carga):
+    conexiones, agrupadas, ruta = carga
+
+    def migrar_streaming(conn, archivo, progreso, en_linea):
+        raise ValueError("fila 12: fecha no válida")
+    monkeypatch.setattr(migrar_datos, 'migrar_streaming', migrar_streaming)
+
+    importaciones.ejecutar_importacion(8, ruta)
+    campos, valores = estados(conexiones[0])[-1]
+    assert valores == ['error', "fila 12: fecha no válida"] and "terminado" in campos
+    assert agrupadas == [] and not os.path.exists(ruta)
+
+
+# --- POST /importar y GET /importar/<id> ---
+
+@pytest.fixture
+def subida(monkeypatch, tmp_path):
+    """Cliente de prueba con los archivos subidos en tmp_path; retorna
+    (cliente, conexión de registro, importaciones lanzadas)."""
+    conn = ConexionFalsa(primer_id=41)
+    lanzadas = []
+    monkeypatch.setattr(app, 'DIRECTORIO_IMPORTACIONES', str(tmp_path))
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: conn)
+    monkeypatch.setattr(importaciones, 'iniciar_importacion',
+                        lambda id_importacion, ruta, modo: lanzadas.append((id_importacion, ruta, modo)))
+    return app.app.test_client(), conn, lanzadas
+
+
+def test_importar_cuerpo_csv(subida, tmp_path):
+    cliente, conn, lanzadas = subida
+    respuesta = cliente.post('/importar?modo=incremental&nombre=ventas.csv',
+                             data=ENCABEZADO.encode('utf-8'), content_type='text/csv')
+    assert respuesta.status_code == 202
+    cuerpo = respuesta.get_json()
+    assert cuerpo["estado"] == f"/importar/{cuerpo['id_importacion']}"
+    assert conn.ejecutadas("INSERT INTO importaciones")[0][1] == ('ventas.csv', 'incremental')
+    ((id_importacion, ruta, modo),) = lanzadas
+    assert id_importacion == cuerpo["id_importacion"] and modo == 'incremental'
+    assert open(ruta, encoding='utf-8').read() == ENCABEZADO
+
+
+def test_importar_formulario_multipart(subida):
+    cliente, conn, lanzadas = subida
+    datos = {'archivo': (io.BytesIO(ENCABEZADO.encode('utf-8')), 'Lista_Ventas_Detalle.csv')}
+    respuesta = cliente.post('/importar', data=datos, content_type='multipart/form-data')
+    assert respuesta.status_code == 202
+    assert conn.ejecutadas("INSERT INTO importaciones")[0][1] == ('Lista_Ventas_Detalle.csv', 'streaming')
+    assert lanzadas[0][2] == 'streaming'
+
+
+def test_importar_rechaza_modo_o_formato_no_validos(subida, tmp_path):
+    cliente, conn, lanzadas = subida
+    assert cliente.post('/importar?modo=todo', data=b'x').status_code == 400
+    respuesta = cliente.post('/importar', data=b'fecha,total\n1,2\n', content_type='text/csv')
+    assert respuesta.status_code == 400
+    assert cliente.post('/importar', data={}, content_type='multipart/form-data').status_code == 400
+    # El archivo rechazado no queda en disco ni se registra
+    assert list(tmp_path.iterdir()) == [] and not conn.consultas and not lanzadas
+
+
+def test_importar_sin_base_borra_el_archivo(monkeypatch, subida, tmp_path):
+    cliente, conn, lanzadas = subida
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: None)
+    respuesta = cliente.post('/importar', data=ENCABEZADO.encode('utf-8'), content_type='text/csv')
+    assert respuesta.status_code == 503
+    assert list(tmp_path.iterdir()) == [] and not lanzadas
+
+
+def test_estado_de_una_importacion(subida):
+    cliente, conn, lanzadas = subida
+    assert cliente.get('/importar/3').status_code == 404
+    conn.respuestas["FROM importaciones"] = [{"id_importacion": 3, "estado": "procesando", "filas_insertadas": 80}]
+    assert cliente.get('/importar/3').get_json()["estado"] == "procesando"
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Lectura del export con esquema explícito (migrar_datos.py)."""
+import csv
+import os
+
+import pytest
+
+import migrar_datos
+
+EXPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), migrar_datos.ARCHIVO)
+
+
+@pytest.fixture
+def export_con_importe_invalido(tmp_path):
+    with open(EXPORT, newline='', encoding='utf-8') as f:
+        filas = list(csv.reader(f))
+    # Columna IMPORTE EN SOLES de la primera venta
+    filas[2][1 + migrar_datos.COLUMNAS_CSV.index('importe_soles')] = 'N/D'
+    ruta = tmp_path / "ventas.csv"
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(filas)
+    return str(ruta)
+
+
+def test_columnas_numericas():
+    df = migrar_datos.leer_csv(EXPORT)
+    assert all(df[col].dtype == 'float64' for col in migrar_datos.COLUMNAS_NUMERICAS)
+
+
+@pytest.mark.parametrize("motor", ['c', 'pyarrow'])
+def test_importe_no_numerico_descarta_la_fila(export_con_importe_invalido, motor):
+    if motor == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    total = len(migrar_datos.leer_csv(EXPORT))
+    assert len(migrar_datos.leer_csv(export_con_importe_invalido)) == total - 1
+    bloques = migrar_datos.leer_csv_por_bloques(export_con_importe_invalido, 500, motor)
+    assert sum(len(migrar_datos.preparar_bloque(b)) for b in bloques) == total - 1
+    rangos = migrar_datos.rangos_csv(export_con_importe_invalido, 500)
+    assert sum(len(migrar_datos.preparar_bloque(migrar_datos.leer_rango(export_con_importe_invalido, i, f, motor)))
+               for _, i, f in rangos) == total - 1
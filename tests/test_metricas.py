@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Formato de exposición de Prometheus de metricas.py."""
+import pytest
+
+import metricas
+
+
+def test_contador_con_etiquetas_escapadas():
+    contador = metricas.Contador('prueba_total', 'Ayuda.', ('ruta', 'estado'))
+    contador.incrementar(ruta='/ventas', estado=200)
+    contador.incrementar(2, ruta='/ventas', estado=200)
+    contador.incrementar(ruta='a"b\\c\nd', estado=500)
+    assert contador.exponer() == [
+        '# HELP prueba_total Ayuda.',
+        '# TYPE prueba_total counter',
+        'prueba_total{ruta="/ventas",estado="200"} 3',
+        'prueba_total{ruta="a\\"b\\\\c\\nd",estado="500"} 1',
+    ]
+
+
+def test_histograma_acumula_cubetas():
+    histograma = metricas.Histograma('prueba_segundos', 'Duración.', ('consulta',), cubetas=(0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, consulta='ventas')
+    assert histograma.muestras() == [
+        'prueba_segundos_bucket{consulta="ventas",le="0.1"} 2',
+        'prueba_segundos_bucket{consulta="ventas",le="1.0"} 3',
+        'prueba_segundos_bucket{consulta="ventas",le="+Inf"} 4',
+        'prueba_segundos_sum{consulta="ventas"} 3.65',
+        'prueba_segundos_count{consulta="ventas"} 4',
+    ]
+
+
+def test_medidor_valor_o_lista():
+    assert metricas.Medidor('prueba_pool', 'Conexiones.', lambda: 3).exponer()[1:] == [
+        '# TYPE prueba_pool gauge', 'prueba_pool 3']
+    medidor = metricas.Medidor('prueba_cache_aciertos_total', 'Aciertos.',
+                               lambda: [({'cache': 'clientes'}, 5), ({'cache': 'productos'}, None)],
+                               ('cache',), tipo='counter')
+    assert medidor.exponer()[1:] == ['# TYPE prueba_cache_aciertos_total counter',
+                                     'prueba_cache_aciertos_total{cache="clientes"} 5']
+
+
+def test_registrar_una_vez_por_nombre_y_exponer():
+    primera = metricas.registrar(metricas.Contador('prueba_registro_total', 'Una.'))
+    segunda = metricas.registrar(metricas.Contador('prueba_registro_total', 'Otra.'))
+    assert segunda is primera
+    primera.incrementar()
+    texto = metricas.exponer()
+    assert texto.endswith('\n')
+    assert texto.count('# TYPE prueba_registro_total counter') == 1
+    assert 'prueba_registro_total 1\n' in texto
+    assert '# TYPE reporte_http_peticiones_total counter' in texto
+
+
+class CursorFalso:
+    def __init__(self, filas, fallar=False):
+        self.filas = filas
+        self.fallar = fallar
+        self.rowcount = len(filas)
+
+    def execute(self, sql, params=()):
+        if self.fallar:
+            raise RuntimeError(sql)
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def fetchall(self):
+        filas, self.filas = self.filas, []
+        return filas
+
+    def close(self):
+        pass
+
+
+def _muestra(familia, consulta):
+    prefijo = f'{familia.nombre}{{consulta="{consulta}"}} '
+    return next((l[len(prefijo):] for l in familia.muestras() if l.startswith(prefijo)), None)
+
+
+def test_cursor_medido_cuenta_filas_y_errores():
+    cursor = metricas.CursorMedido(CursorFalso([(1,), (2,), (3,)]), 'prueba_cursor')
+    cursor.execute("SELECT 1")
+    assert cursor.fetchone() == (1,)
+    assert cursor.fetchall() == [(2,), (3,)]
+    assert cursor.rowcount == 3
+    assert _muestra(metricas.CONSULTAS_FILAS, 'prueba_cursor') == '3'
+    assert metricas.CONSULTAS_DURACION.muestras()
+
+    with pytest.raises(RuntimeError):
+        metricas.CursorMedido(CursorFalso([], fallar=True), 'prueba_cursor').execute("SELECT 1")
+    assert _muestra(metricas.CONSULTAS_ERRORES, 'prueba_cursor') == '1'
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Resolución de clientes y productos de migrar_datos.py en cada modo, con
+tablas en memoria en lugar del servidor."""
+import os
+
+import pytest
+
+import migrar_datos
+
+EXPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), migrar_datos.ARCHIVO)
+
+
+class Tablas:
+    def __init__(self):
+        self.clientes = {}
+        self.productos = {}
+        self.ventas = 0
+        self.detalle = []
+
+
+class CursorTablas:
+    """Entiende solo las sentencias de la carga (ver migrar_datos._cargar_bloque)."""
+
+    def __init__(self, tablas):
+        self.t = tablas
+        self.filas = []
+        self.lastrowid = None
+
+    def _tabla(self, sql):
+        return self.t.clientes if 'clientes' in sql else self.t.productos
+
+    def execute(self, sql, params=()):
+        self.filas = []
+        if 'MAX(' in sql:
+            self.filas = [(len(self._tabla(sql)),)]
+        elif 'MIN(id_cliente)' in sql:
+            self.filas = [(self.t.clientes.get(None),)]
+        elif ' > %s' in sql:
+            self.filas = [(i, clave) for clave, i in self._tabla(sql).items() if i > params[0]]
+        elif ' IN (' in sql:
+            tabla = self._tabla(sql)
+            self.filas = [(clave, tabla[clave]) for clave in params]
+        elif sql.startswith("INSERT INTO clientes"):
+            self.lastrowid = self.t.clientes[params[0]] = len(self.t.clientes) + 1
+        elif sql.startswith("INSERT INTO ventas"):
+            self.t.ventas += 1
+            self.lastrowid = self.t.ventas
+
+    def executemany(self, sql, filas):
+        if sql.startswith("INSERT INTO ventas"):
+            self.lastrowid = self.t.ventas + 1
+            self.t.ventas += len(filas)
+        elif sql.startswith("INSERT INTO detalle_venta"):
+            self.t.detalle.extend(filas)
+        else:
+            tabla = self._tabla(sql)
+            for fila in filas:
+                tabla.setdefault(fila[0], len(tabla) + 1)
+
+    def fetchone(self):
+        return self.filas[0] if self.filas else None
+
+    def fetchall(self):
+        return self.filas
+
+
+@pytest.fixture(scope='module')
+def export():
+    return migrar_datos.leer_csv(EXPORT)
+
+
+@pytest.mark.parametrize("en_linea, paso", [(False, 1), (True, 1), (True, None)])
+def test_productos_por_nombre_original_en_todos_los_modos(export, en_linea, paso):
+    tablas = Tablas()
+    migrar_datos._cargar_bloque(CursorTablas(tablas), export, {}, {}, 500, paso, en_linea)
+    # Un producto por artículo distinto, como catalogo.resolver_productos en la app
+    assert set(tablas.productos) == set(export['articulos'])
+    por_id = {i: nombre for nombre, i in tablas.productos.items()}
+    assert [por_id[fila[1]] for fila in tablas.detalle] == export['articulos'].tolist()
+    assert [fila[0] for fila in tablas.detalle] == list(range(1, len(export) + 1))
+
+
+def test_variantes_del_mismo_nombre_limpio_son_productos_distintos(export):
+    df = export.iloc[:2].copy()
+    df['articulos'] = ['Mouse HP M100', 'MOUSE HP M100 ']
+    tablas = Tablas()
+    migrar_datos._cargar_bloque(CursorTablas(tablas), df, {}, {}, 500, 1)
+    assert len(tablas.productos) == 2
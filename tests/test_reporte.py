@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Datos del reporte /reporte (reporte.py): la estructura DATA que arma
+construir_reporte y la caché por versión de datos."""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+import app
+import reporte
+from falsos import ConexionFalsa
+
+
+ENERO, FEBRERO, MARZO = date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)
+# (categoria, marca, producto, mes, lineas, cantidad, importe) como los devuelve CONSULTA_PRODUCTOS_MES
+FILAS = [
+    ('Laptops', 'HP', 'HP 240 G8', ENERO, 2, Decimal('3'), Decimal('4500.00')),
+    ('Laptops', 'HP', 'HP 240 G8', MARZO, 1, Decimal('1'), Decimal('1500.00')),
+    ('Laptops', 'LENOVO', 'IdeaPad 3', ENERO, 1, Decimal('1'), Decimal('2000.00')),
+    # Dos ids con el mismo nombre canónico suman en una sola serie
+    ('Accesorios', 'LOGITECH', 'Mouse M90', MARZO, 3, Decimal('5'), Decimal('100.00')),
+    ('Accesorios', 'LOGITECH', 'Mouse M90', MARZO, 1, Decimal('2'), Decimal('40.00')),
+]
+
+
+def conexion_reporte(filas, version=1):
+    return ConexionFalsa({
+        "FROM version_datos": lambda sql, params: [(version, datetime(2024, 3, 31, 12, 0))],
+        "FROM resumen_producto_mes": filas,
+    })
+
+
+def test_rango_y_nombre_de_meses():
+    assert reporte.rango_meses(date(2023, 11, 15), date(2024, 2, 1)) == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+    assert reporte.nombre_mes(date(2024, 7, 1)) == "Julio 2024"
+
+
+def test_construir_reporte_rellena_los_meses_sin_ventas():
+    data = reporte.construir_reporte(conexion_reporte(FILAS))
+    assert data["ordenMeses"] == ["Enero 2024", "Febrero 2024", "Marzo 2024"]
+    assert data["categorias"]["Laptops"]["HP"]["HP 240 G8"] == [2, 0, 1]
+    assert data["categorias"]["Accesorios"]["LOGITECH"]["Mouse M90"] == [0, 0, 4]
+    assert data["ventasTotalesPorMesImporte"] == {"Enero 2024": 6500.0, "Febrero 2024": 0.0, "Marzo 2024": 1640.0}
+    assert data["mesMasVendido"] == "Enero 2024"
+    assert data["ventasMesMasVendido"] == "S/ 6,500.00"
+
+
+def test_top_de_productos_por_cantidad_y_solo_meses_con_ventas():
+    data = reporte.construir_reporte(conexion_reporte(FILAS))
+    assert data["topProductosPorMes"] == [
+        {"mes": "Enero 2024", "producto": "HP 240 G8", "cantidad": 3},
+        {"mes": "Marzo 2024", "producto": "Mouse M90", "cantidad": 7},
+    ]
+
+
+def test_construir_reporte_sin_ventas():
+    data = reporte.construir_reporte(conexion_reporte([]))
+    assert data["ordenMeses"] == [] and data["categorias"] == {}
+    assert data["mesMasVendido"] is None and data["ventasMesMasVendido"] == "S/ 0.00"
+
+
+def test_cache_reconstruye_solo_si_cambia_la_version():
+    construidos = []
+    cache = reporte.CacheReporte(construir=lambda data: construidos.append(data) or len(construidos))
+    conn = conexion_reporte(FILAS, version=1)
+    assert cache.obtener(conn) == (1, 1)
+    assert cache.obtener(conn) == (1, 1)
+    assert len(conn.ejecutadas("FROM resumen_producto_mes")) == 1
+
+    assert cache.obtener(conexion_reporte(FILAS, version=2)) == (2, 2)
+    assert len(construidos) == 2
+
+
+# --- /reporte ---
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(app, 'cache_reporte', reporte.CacheReporte())
+    return app.app.test_client()
+
+
+def test_resumen_sin_el_arbol_de_categorias(monkeypatch, cliente):
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: conexion_reporte(FILAS))
+    resumen = cliente.get('/api/reporte/resumen').get_json()
+    assert "categorias" not in resumen
+    assert resumen["mesMasVendido"] == "Enero 2024"
+
+
+def test_resumen_sin_base_responde_503(monkeypatch, cliente):
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: None)
+    respuesta = cliente.get('/api/reporte/resumen')
+    assert respuesta.status_code == 503 and not respuesta.get_json()["success"]
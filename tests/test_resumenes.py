@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Resúmenes mantenidos con deltas (resumenes.py): sumar_venta y restar_venta
+se cancelan entre sí y dejan lo mismo que reconstruir_resumen."""
+import contextlib
+import io
+import re
+from datetime import date
+from decimal import Decimal
+
+import resumenes
+
+
+# --- Deltas sobre tablas en memoria ---
+
+# Columnas de la clave primaria de cada resumen (las demás se acumulan)
+CLAVES = {'resumen_ventas_vendedor': 2, 'resumen_producto_mes': 2, 'resumen_diario_ventas': 3, 'resumen_diario': 4}
+
+ENERO, FEBRERO = date(2024, 1, 1), date(2024, 2, 1)
+# Lo que devuelven las consultas de aporte para cada venta
+APORTES = {
+    1: {
+        resumenes.CONSULTA_APORTE: [('Ana', ENERO, Decimal('80.00'), date(2024, 1, 5), 'Efectivo')],
+        resumenes.CONSULTA_APORTE_PRODUCTO: [(10, ENERO, 1, Decimal('2'), Decimal('50.00')),
+                                             (11, ENERO, 1, Decimal('1'), Decimal('30.00'))],
+        resumenes.CONSULTA_APORTE_DIARIO: [(date(2024, 1, 5), 'Ana', 'Efectivo', 10, 1, Decimal('2'), Decimal('50.00')),
+                                           (date(2024, 1, 5), 'Ana', 'Efectivo', 11, 1, Decimal('1'), Decimal('30.00'))],
+    },
+    2: {
+        resumenes.CONSULTA_APORTE: [('Ana', ENERO, Decimal('25.00'), date(2024, 1, 5), 'Efectivo')],
+        resumenes.CONSULTA_APORTE_PRODUCTO: [(10, ENERO, 1, Decimal('1'), Decimal('25.00'))],
+        resumenes.CONSULTA_APORTE_DIARIO: [(date(2024, 1, 5), 'Ana', 'Efectivo', 10, 1, Decimal('1'), Decimal('25.00'))],
+    },
+    # Venta sin líneas: cuenta como ticket
+    3: {
+        resumenes.CONSULTA_APORTE: [('', FEBRERO, Decimal('0'), date(2024, 2, 10), '')],
+        resumenes.CONSULTA_APORTE_PRODUCTO: [],
+        resumenes.CONSULTA_APORTE_DIARIO: [],
+    },
+}
+
+
+class CursorResumenes:
+    """Aplica los INSERT ... ON DUPLICATE KEY UPDATE y los DELETE de los
+    resúmenes sobre diccionarios; las consultas de aporte salen de APORTES."""
+
+    def __init__(self, tablas, columnas):
+        self.tablas = tablas
+        self.columnas = columnas
+        self.filas = []
+
+    def execute(self, sql, params=()):
+        self.filas = []
+        for consulta in (resumenes.CONSULTA_APORTE_PRODUCTO, resumenes.CONSULTA_APORTE_DIARIO,
+                         resumenes.CONSULTA_APORTE):
+            if sql.startswith(consulta):
+                self.filas = list(APORTES[params[0]][consulta])
+                return
+        insercion = re.search(r'INSERT INTO (\w+) \(([^)]*)\)', sql)
+        tabla = insercion.group(1) if insercion else re.search(r'DELETE FROM (\w+)', sql).group(1)
+        filas = self.tablas.setdefault(tabla, {})
+        clave, valores = tuple(params[:CLAVES[tabla]]), params[CLAVES[tabla]:]
+        if insercion:
+            self.columnas[tabla] = [c.strip() for c in insercion.group(2).split(',')][CLAVES[tabla]:]
+            anterior = filas.get(clave, (0,) * len(valores))
+            filas[clave] = tuple(a + v for a, v in zip(anterior, valores))
+        else:
+            # DELETE ... AND <columna> <= 0
+            columna = self.columnas[tabla].index(re.search(r'AND (\w+) <= 0', sql).group(1))
+            if clave in filas and filas[clave][columna] <= 0:
+                del filas[clave]
+
+    def executemany(self, sql, filas):
+        for params in filas:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self.filas[0] if self.filas else None
+
+    def fetchall(self):
+        return self.filas
+
+    def close(self):
+        pass
+
+
+class ConexionResumenes:
+    def __init__(self):
+        self.tablas = {}
+        self.columnas = {}
+
+    def cursor(self):
+        return CursorResumenes(self.tablas, self.columnas)
+
+    def contenido(self):
+        return {tabla: filas for tabla, filas in self.tablas.items() if filas}
+
+
+def _con_ventas(*ids):
+    conn = ConexionResumenes()
+    for id_venta in ids:
+        resumenes.sumar_venta(conn, id_venta)
+    return conn
+
+
+def test_sumar_acumula_por_clave():
+    conn = _con_ventas(1, 2, 3)
+    assert conn.tablas['resumen_ventas_vendedor'] == {
+        ('Ana', ENERO): (Decimal('105.00'), 2), ('', FEBRERO): (Decimal('0'), 1)}
+    assert conn.tablas['resumen_producto_mes'][(10, ENERO)] == (2, Decimal('3'), Decimal('75.00'))
+    assert conn.tablas['resumen_diario_ventas'][(date(2024, 1, 5), 'Ana', 'Efectivo')] == (2, Decimal('105.00'))
+
+
+def test_restar_deshace_sumar():
+    conn = _con_ventas(1, 2, 3)
+    resumenes.restar_venta(conn, 2)
+    assert conn.contenido() == _con_ventas(1, 3).contenido()
+    resumenes.sumar_venta(conn, 2)
+    assert conn.contenido() == _con_ventas(1, 2, 3).contenido()
+
+
+def test_restar_todas_deja_los_resumenes_vacios():
+    conn = _con_ventas(1, 2, 3)
+    for id_venta in (3, 1, 2):
+        resumenes.restar_venta(conn, id_venta)
+    assert conn.contenido() == {}
+
+
+# --- Contra reconstruir_resumen en un servidor MySQL ---
+
+def _insertar_ventas(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO clientes (doc_cliente, cliente) VALUES ('20100047218', 'Cliente')")
+    id_cliente = cursor.lastrowid
+    cursor.executemany("INSERT INTO productos (nombre_original, nombre_limpio, categoria, marca) VALUES (%s, %s, %s, %s)",
+                       [('Mouse HP', 'mouse hp', 'Mouse', 'HP'), ('USB 32GB', 'usb 32gb', 'Almacenamiento', 'OTROS')])
+    cursor.execute("SELECT id_producto FROM productos ORDER BY id_producto")
+    mouse, usb = [fila[0] for fila in cursor.fetchall()]
+    ventas = [
+        (date(2024, 1, 5), 'Ana', 'Efectivo', [(mouse, 2, '50.00'), (usb, 1, '30.00')]),
+        (date(2024, 1, 5), 'Ana', 'Efectivo', [(mouse, 1, '25.00')]),
+        (date(2024, 1, 20), 'Luis', 'Yape', [(mouse, 1, '25.00'), (mouse, 3, '60.00')]),
+        (date(2024, 2, 10), None, None, []),
+    ]
+    ids = []
+    for fecha, vendedor, medio_pago, lineas in ventas:
+        cursor.execute("INSERT INTO ventas (fecha, vendedor, medio_pago, id_cliente) VALUES (%s, %s, %s, %s)",
+                       (fecha, vendedor, medio_pago, id_cliente))
+        ids.append(cursor.lastrowid)
+        cursor.executemany("INSERT INTO detalle_venta (id_venta, id_producto, cantidad, importe_soles) "
+                           "VALUES (%s, %s, %s, %s)", [(ids[-1],) + linea for linea in lineas])
+    cursor.close()
+    return ids
+
+
+def _leer_resumenes(conn):
+    cursor = conn.cursor()
+    contenido = {}
+    for tabla in CLAVES:
+        cursor.execute(f"SELECT * FROM {tabla} ORDER BY 1, 2, 3")
+        contenido[tabla] = cursor.fetchall()
+    cursor.close()
+    return contenido
+
+
+def _reconstruir(conn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        resumenes.reconstruir_resumen(conn)
+    return _leer_resumenes(conn)
+
+
+def test_deltas_coinciden_con_reconstruir(base_vacia):
+    conn = base_vacia
+    ids = _insertar_ventas(conn)
+    for id_venta in ids:
+        resumenes.sumar_venta(conn, id_venta)
+    conn.commit()
+    por_deltas = _leer_resumenes(conn)
+    assert por_deltas == _reconstruir(conn)
+    assert resumenes.verificar_resumen(conn) == []
+
+    # Editar = restar, cambiar y volver a sumar; borrar = restar y borrar
+    cursor = conn.cursor()
+    resumenes.restar_venta(conn, ids[2])
+    cursor.execute("UPDATE detalle_venta SET importe_soles = 10 WHERE id_venta = %s", (ids[2],))
+    resumenes.sumar_venta(conn, ids[2])
+    resumenes.restar_venta(conn, ids[0])
+    cursor.execute("DELETE FROM detalle_venta WHERE id_venta = %s", (ids[0],))
+    cursor.execute("DELETE FROM ventas WHERE id_venta = %s", (ids[0],))
+    cursor.close()
+    conn.commit()
+    por_deltas = _leer_resumenes(conn)
+    assert por_deltas == _reconstruir(conn)
+
+
+def test_sumar_ventas_por_conjunto_coincide_con_reconstruir(base_vacia):
+    conn = base_vacia
+    ids = _insertar_ventas(conn)
+    resumenes.sumar_ventas(conn, ids)
+    conn.commit()
+    assert _leer_resumenes(conn) == _reconstruir(conn)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Agrupación de /api/series sobre los resúmenes (series.py) con una
+conexión falsa."""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import series
+
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.filas = []
+
+    def execute(self, sql, params=()):
+        self.base.consultas.append((sql, params))
+        if "MIN(dia), MAX(dia)" in sql:
+            self.filas = [self.base.rango]
+        else:
+            self.filas = list(self.base.resultado)
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def fetchall(self):
+        parte, self.filas = self.filas, []
+        return parte
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    unread_result = False
+
+    def __init__(self, resultado=(), rango=(None, None)):
+        self.resultado = resultado
+        self.rango = rango
+        self.consultas = []
+
+    def cursor(self, **opciones):
+        return CursorFalso(self)
+
+
+def test_periodos():
+    assert series.inicio_periodo(date(2024, 2, 29), 'mes') == date(2024, 2, 1)
+    assert series.inicio_periodo(date(2024, 2, 29), 'semana') == date(2024, 2, 26)
+    assert series.rango_periodos(date(2023, 11, 15), date(2024, 2, 1), 'mes') == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+    assert series.rango_periodos(date(2024, 1, 3), date(2024, 1, 15), 'semana') == [
+        date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)]
+    assert len(series.rango_periodos(date(2024, 1, 1), date(2024, 1, 31), 'dia')) == 31
+
+
+def test_tabla_segun_dimensiones_y_metricas():
+    assert series.usa_resumen_ventas(['vendedor'], ['importe_soles', 'tickets'], {})
+    assert not series.usa_resumen_ventas(['categoria'], ['importe_soles'], {})
+    assert not series.usa_resumen_ventas([], ['cantidad'], {})
+    assert not series.usa_resumen_ventas([], ['tickets'], {'marca': 'HP'})
+
+    sql, params = series.consulta_series(date(2024, 1, 1), date(2024, 1, 31), 'mes', ['vendedor'], ['tickets'], {})
+    assert "FROM resumen_diario_ventas r" in sql and "JOIN productos" not in sql
+    assert "SUM(r.tickets)" in sql and sql.endswith("GROUP BY 1, 2")
+    sql, params = series.consulta_series(date(2024, 1, 1), date(2024, 1, 31), 'semana', [], ['importe_soles'],
+                                         {'categoria': 'Mouse'})
+    assert "FROM resumen_diario r" in sql and "JOIN productos" in sql
+    assert params == [date(2024, 1, 1), date(2024, 1, 31), 'Mouse']
+
+
+def test_leer_parametros_valida():
+    parametros = series.leer_parametros({'por': 'vendedor,vendedor', 'metricas': 'tickets', 'desde': '2024-01-01'})
+    assert parametros['por'] == ['vendedor'] and parametros['desde'] == date(2024, 1, 1)
+    with pytest.raises(ValueError):
+        series.leer_parametros({'por': 'color'})
+    with pytest.raises(ValueError):
+        series.leer_parametros({'desde': '2024-02-01', 'hasta': '2024-01-01'})
+
+
+def test_construir_series_rellena_y_ordena():
+    resultado = [
+        (date(2024, 1, 1), 'Ana', Decimal('80.00'), 1),
+        (date(2024, 2, 1), 'Ana', Decimal('60.00'), 1),
+        (date(2024, 1, 1), 'Luis', Decimal('25.00'), 1),
+        (date(2024, 2, 1), None, Decimal('0.00'), 1),
+    ]
+    conn = ConexionFalsa(resultado=resultado, rango=(date(2024, 1, 5), date(2024, 2, 10)))
+    respuesta = series.construir_series(conn, por=['vendedor'], metricas=['importe_soles', 'tickets'], limite=2)
+    assert respuesta['periodos'] == ['2024-01-01', '2024-02-01']
+    assert respuesta['desde'] == '2024-01-05' and respuesta['hasta'] == '2024-02-10'
+    assert respuesta['total_series'] == 3 and respuesta['tickets_exactos']
+    assert respuesta['series'] == [
+        {"clave": {"vendedor": 'Ana'}, "valores": {"importe_soles": [80.0, 60.0], "tickets": [1, 1]}},
+        {"clave": {"vendedor": 'Luis'}, "valores": {"importe_soles": [25.0, 0], "tickets": [1, 0]}},
+    ]
+
+
+def test_construir_series_sin_datos():
+    respuesta = series.construir_series(ConexionFalsa())
+    assert respuesta['series'] == [] and respuesta['periodos'] == []
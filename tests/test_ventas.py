@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Escrituras de ventas de app.py (agregar, editar, eliminar) con una
+conexión falsa en lugar del pool."""
+import pytest
+
+import app
+import catalogo
+from falsos import ConexionFalsa
+
+
+@pytest.fixture
+def conexion(monkeypatch):
+    """Conexión falsa que recibe toda escritura; se configura con `respuestas`."""
+    conn = ConexionFalsa()
+    monkeypatch.setattr(app, 'get_db_connection', lambda consulta=None: conn)
+    return conn
+
+
+@pytest.fixture
+def cliente():
+    return app.app.test_client()
+
+
+def test_eliminar_venta_inexistente_responde_404_sin_tocar_la_version(conexion, cliente):
+    respuesta = cliente.post('/eliminar-venta', json={'id_venta': 99})
+    assert respuesta.status_code == 404
+    assert not conexion.ejecutadas("DELETE") and not conexion.ejecutadas("version_datos")
+    assert (conexion.commits, conexion.rollbacks) == (0, 1)
+
+
+def test_eliminar_venta_existente(conexion, cliente):
+    conexion.respuestas["FROM ventas WHERE id_venta = %s FOR UPDATE"] = [(7,)]
+    respuesta = cliente.post('/eliminar-venta', json={'id_venta': 7})
+    assert respuesta.status_code == 200 and respuesta.get_json()['success']
+    assert conexion.ejecutadas("DELETE FROM ventas")[0][1] == (7,)
+    assert "ediciones = ediciones + 1" in conexion.ejecutadas("version_datos")[0][0]
+    assert conexion.commits == 1
+
+
+# --- Ventas con varias líneas (agregar_venta / editar_venta) ---
+
+VENTA = {'fecha': '2024-06-01', 'documento': 'BOLETA', 'nro_doc': 'B001-77', 'medio_pago': 'Efectivo',
+         'vendedor': 'Ana', 'doc_cliente': '45678912', 'cliente': 'Luis Pérez', 'telefono': '999888777'}
+ITEMS = [{'articulos': 'MOUSE LOGITECH M90', 'cantidad': 2, 'importe_soles': 50},
+         {'articulos': 'TECLADO GENIUS KB-110', 'cantidad': 1, 'importe_soles': 35},
+         {'articulos': 'MOUSE LOGITECH M90', 'cantidad': 1, 'importe_soles': 25}]
+IDS_PRODUCTOS = {'MOUSE LOGITECH M90': 10, 'TECLADO GENIUS KB-110': 11}
+
+
+@pytest.fixture(autouse=True)
+def caches_vacias():
+    catalogo.CACHE_CLIENTES.limpiar()
+    catalogo.CACHE_PRODUCTOS.limpiar()
+
+
+@pytest.fixture
+def productos(conexion):
+    """Los productos que pide resolver_productos ya están en la tabla."""
+    conexion.respuestas["WHERE nombre_hash IN"] = lambda sql, params: [(n, IDS_PRODUCTOS[n]) for n in params]
+    return conexion
+
+
+def test_agregar_venta_con_varias_lineas(productos, cliente):
+    respuesta = cliente.post('/agregar-venta', json=dict(VENTA, items=ITEMS))
+    assert respuesta.get_json()['success']
+    (sql_cliente, params_cliente), = productos.ejecutadas("INSERT INTO clientes")
+    assert "ON DUPLICATE KEY UPDATE" in sql_cliente and params_cliente == ('45678912', 'Luis Pérez', '999888777')
+
+    # Un solo INSERT multi-fila y un solo SELECT para los productos distintos
+    (_, nuevos), = productos.ejecutadas("INSERT INTO productos")
+    assert [fila[0] for fila in nuevos] == ['MOUSE LOGITECH M90', 'TECLADO GENIUS KB-110']
+    (_, nombres), = productos.ejecutadas("WHERE nombre_hash IN")
+    assert nombres == ['MOUSE LOGITECH M90', 'TECLADO GENIUS KB-110']
+
+    # La venta usa el id del cliente y las líneas el de la venta (lastrowid de cada INSERT)
+    (_, params_venta), = productos.ejecutadas("INSERT INTO ventas")
+    assert params_venta[-1] == 1
+    (_, lineas), = productos.ejecutadas("INSERT INTO detalle_venta")
+    assert lineas == [(2, 10, 2, 50), (2, 11, 1, 35), (2, 10, 1, 25)]
+    assert productos.commits == 1
+
+
+def test_agregar_venta_de_un_solo_articulo(productos, cliente):
+    venta = dict(VENTA, articulos='MOUSE LOGITECH M90', cantidad=3, importe_soles=75)
+    assert cliente.post('/agregar-venta', json=venta).get_json()['success']
+    (_, lineas), = productos.ejecutadas("INSERT INTO detalle_venta")
+    assert [fila[1:] for fila in lineas] == [(10, 3, 75)]
+
+
+def test_agregar_venta_sin_articulos_o_campos_no_escribe(conexion, cliente):
+    assert not cliente.post('/agregar-venta', json=dict(VENTA, items=[])).get_json()['success']
+    sin_vendedor = {campo: valor for campo, valor in VENTA.items() if campo != 'vendedor'}
+    assert not cliente.post('/agregar-venta', json=dict(sin_vendedor, items=ITEMS)).get_json()['success']
+    assert not conexion.consultas
+
+
+def test_editar_venta_con_items_reemplaza_las_lineas(productos, cliente):
+    productos.respuestas["FROM ventas WHERE id_venta = %s FOR UPDATE"] = [(7,)]
+    respuesta = cliente.post('/editar-venta', json=dict(VENTA, id_venta=7, items=ITEMS[:2]))
+    assert respuesta.get_json()['success']
+    assert productos.ejecutadas("DELETE FROM detalle_venta")[0][1] == (7,)
+    (_, lineas), = productos.ejecutadas("INSERT INTO detalle_venta")
+    assert lineas == [(7, 10, 2, 50), (7, 11, 1, 35)]
+
+
+def test_editar_venta_de_un_articulo_conserva_las_demas_lineas(productos, cliente):
+    productos.respuestas["FROM ventas WHERE id_venta = %s FOR UPDATE"] = [(7,)]
+    productos.respuestas["SELECT COUNT(*) FROM detalle_venta"] = [(3,)]
+    venta = dict(VENTA, id_venta=7, articulos='TECLADO GENIUS KB-110', cantidad=1, importe_soles=40)
+    assert cliente.post('/editar-venta', json=venta).get_json()['success']
+    assert not productos.ejecutadas("DELETE FROM detalle_venta")
+    (sql, params), = productos.ejecutadas("UPDATE detalle_venta")
+    assert "LIMIT 1" in sql and params == (11, 1, 40, 7)
+
+
+def test_editar_venta_inexistente_responde_404(conexion, cliente):
+    respuesta = cliente.post('/editar-venta', json=dict(VENTA, id_venta=99, items=ITEMS))
+    assert respuesta.status_code == 404
+    assert not conexion.ejecutadas("UPDATE ventas") and conexion.rollbacks == 1
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Contador de versión de los datos de ventas.
+
+Cada escritura (agregar, editar, eliminar, migración) incrementa la versión
+dentro de su transacción. Los lectores que guardan resultados en caché los
+asocian a la versión con la que se calcularon y solo recalculan cuando cambia.
+Las escrituras que modifican o borran ventas ya existentes (no solo agregan)
+incrementan además `ediciones`: así un lector incremental (analitica.py)
+sabe cuándo no le basta con leer las ventas nuevas.
+"""
+import mysql.connector
+
+
+DDL_VERSION = """
+CREATE TABLE IF NOT EXISTS version_datos (
+  id TINYINT NOT NULL PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  ediciones BIGINT NOT NULL DEFAULT 0,
+  actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB
+"""
+
+
+def asegurar_ediciones(cursor):
+    """Agrega la columna `ediciones` a una tabla creada sin ella."""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'version_datos' AND COLUMN_NAME = 'ediciones'"
+    )
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE version_datos ADD COLUMN ediciones BIGINT NOT NULL DEFAULT 0 AFTER version")
+
+
+def asegurar_tabla(cursor):
+    cursor.execute(DDL_VERSION)
+    asegurar_ediciones(cursor)
+    cursor.execute("INSERT IGNORE INTO version_datos (id, version) VALUES (1, 0)")
+
+
+def incrementar_version(conn, edicion=False):
+    """Incrementa la versión; debe llamarse antes del commit de la escritura.
+    `edicion` indica que la escritura cambió o borró ventas existentes."""
+    cursor = conn.cursor()
+    try:
+        if edicion:
+            cursor.execute("UPDATE version_datos SET version = version + 1, ediciones = ediciones + 1, "
+                           "actualizado = CURRENT_TIMESTAMP WHERE id = 1")
+        else:
+            cursor.execute("UPDATE version_datos SET version = version + 1, actualizado = CURRENT_TIMESTAMP WHERE id = 1")
+    finally:
+        cursor.close()
+
+
+def leer_version(conn):
+    """Retorna (version, actualizado); (0, None) si la tabla aún no tiene fila."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, actualizado FROM version_datos WHERE id = 1")
+        fila = cursor.fetchone()
+        return (fila[0], fila[1]) if fila else (0, None)
+    finally:
+        cursor.close()
+
+
+def leer_contadores(conn):
+    """Retorna (version, ediciones); (0, 0) si la tabla aún no tiene fila."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, ediciones FROM version_datos WHERE id = 1")
+        fila = cursor.fetchone()
+        return (fila[0], fila[1]) if fila else (0, 0)
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from conexiones import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        asegurar_tabla(cursor)
+        conn.commit()
+        cursor.close()
+        print(f"INFO: Versión actual de los datos: {leer_version(conn)[0]}")
+    finally:
+        conn.close()